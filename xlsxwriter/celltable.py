@@ -0,0 +1,513 @@
+###############################################################################
+#
+# CellTable - A class for storing the cell data of a worksheet.
+#
+# Copyright 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+# Standard packages.
+import os
+import tempfile
+from array import array
+from bisect import bisect_left
+from heapq import merge
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Package imports.
+from .compatibility import namedtuple
+
+
+###############################################################################
+#
+# Named tuples used for cell types.
+#
+###############################################################################
+cell_string_tuple = namedtuple('String', 'string, format')
+cell_number_tuple = namedtuple('Number', 'number, format')
+cell_blank_tuple = namedtuple('Blank', 'format')
+cell_boolean_tuple = namedtuple('Boolean', 'boolean, format')
+cell_formula_tuple = namedtuple('Formula', 'formula, format, value')
+cell_arformula_tuple = namedtuple('ArrayFormula',
+                                  'formula, format, value, range')
+
+# Integer tags for the cell types. Each cell tuple type has a "tag" class
+# attribute so that readers of the table can dispatch on the cell type.
+CELL_NUMBER = 1
+CELL_STRING = 2
+CELL_BLANK = 3
+CELL_BOOLEAN = 4
+CELL_FORMULA = 5
+CELL_ARRAY_FORMULA = 6
+
+cell_number_tuple.tag = CELL_NUMBER
+cell_string_tuple.tag = CELL_STRING
+cell_blank_tuple.tag = CELL_BLANK
+cell_boolean_tuple.tag = CELL_BOOLEAN
+cell_formula_tuple.tag = CELL_FORMULA
+cell_arformula_tuple.tag = CELL_ARRAY_FORMULA
+
+# The cell keys in a CellRow store the tag in the low bits of the column.
+TAG_BITS = 3
+TAG_MASK = (1 << TAG_BITS) - 1
+
+# Create cell tuples without the overhead of the namedtuple constructor.
+tuple_new = tuple.__new__
+
+# The approximate memory used by a row, a cell and the non-numeric data of
+# a cell, such as a formula, in the cell table.
+ROW_BYTES = 300
+CELL_BYTES = 16
+OBJECT_BYTES = 200
+
+
+class CellRow(object):
+    """
+    A row of worksheet cells stored in typed arrays ordered by column. It
+    behaves like a dict of column numbers to cell tuples but a number cell
+    costs 12 bytes instead of a dict entry, a tuple and a float.
+
+    """
+
+    __slots__ = ('table', 'keys', 'numbers', 'format_ids', 'objects')
+
+    def __init__(self, table):
+        # The table holds the formats that the format ids refer to.
+        self.table = table
+
+        # Parallel arrays of the cell keys, which are the column number and
+        # the type tag, and the number values. String cells store the shared
+        # string index as the number.
+        self.keys = array('I')
+        self.numbers = array('d')
+
+        # The format ids and the non-numeric data of the cells, such as
+        # formulas, are only stored for rows that need them.
+        self.format_ids = None
+        self.objects = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return (key >> TAG_BITS for key in self.keys)
+
+    def __contains__(self, col):
+        return self._find(col) >= 0
+
+    def __getitem__(self, col):
+        index = self._find(col)
+
+        if index < 0:
+            raise KeyError(col)
+
+        return self._get_cell(index)
+
+    def __setitem__(self, col, cell):
+        # Store a cell tuple by breaking it into the row arrays.
+        tag = cell.tag
+
+        if tag == CELL_NUMBER:
+            self._set_cell(col, tag, cell.format, number=cell.number)
+        elif tag == CELL_STRING:
+            self._set_cell(col, tag, cell.format, number=cell.string)
+        elif tag == CELL_BOOLEAN:
+            self._set_cell(col, tag, cell.format, number=cell.boolean)
+        elif tag == CELL_FORMULA:
+            self._set_cell(col, tag, cell.format,
+                           data=(cell.formula, cell.value))
+        elif tag == CELL_ARRAY_FORMULA:
+            self._set_cell(col, tag, cell.format,
+                           data=(cell.formula, cell.value, cell.range))
+        else:
+            self._set_cell(col, tag, cell.format)
+
+    def get(self, col, default=None):
+        index = self._find(col)
+
+        if index < 0:
+            return default
+
+        return self._get_cell(index)
+
+    def items(self):
+        # Return the (col, cell) pairs of the row in column order.
+        return [(key >> TAG_BITS, self._get_cell(index))
+                for index, key in enumerate(self.keys)]
+
+    def _get_formats(self):
+        # Return the (col, format) pairs of the row in column order.
+        cols = [key >> TAG_BITS for key in self.keys]
+
+        if self.format_ids is None:
+            return [(col, None) for col in cols]
+
+        formats = self.table.formats
+        return [(col, formats[format_id])
+                for col, format_id in zip(cols, self.format_ids)]
+
+    def _get_first_col(self):
+        # Return the first column in the row.
+        return self.keys[0] >> TAG_BITS
+
+    def _get_last_col(self):
+        # Return the last column in the row.
+        return self.keys[-1] >> TAG_BITS
+
+    def _find(self, col):
+        # Return the array index of a column or -1 if it isn't stored.
+        keys = self.keys
+        index = bisect_left(keys, col << TAG_BITS)
+
+        if index < len(keys) and keys[index] >> TAG_BITS == col:
+            return index
+
+        return -1
+
+    def _set_cell(self, col, tag, cell_format, number=0, data=None):
+        # Store a cell in the row arrays. Numbers, including shared string
+        # indices and booleans, are stored in a double array and any other
+        # data is stored in the objects dict.
+        keys = self.keys
+        key = col << TAG_BITS | tag
+
+        if not keys or col > keys[-1] >> TAG_BITS:
+            # Cells are usually written in column order so we can append.
+            index = len(keys)
+            keys.append(key)
+            self.numbers.append(0)
+
+            if self.format_ids is not None:
+                self.format_ids.append(0)
+        else:
+            index = bisect_left(keys, col << TAG_BITS)
+
+            if keys[index] >> TAG_BITS != col:
+                keys.insert(index, key)
+                self.numbers.insert(index, 0)
+
+                if self.format_ids is not None:
+                    self.format_ids.insert(index, 0)
+            else:
+                keys[index] = key
+
+        # Store the number or the data in the objects dict. For example,
+        # strings are stored as objects in constant_memory mode.
+        if data is None:
+            try:
+                self.numbers[index] = number
+            except TypeError:
+                data = number
+
+        if data is not None:
+            if self.objects is None:
+                self.objects = {}
+
+            self.objects[col] = data
+
+        elif self.objects and col in self.objects:
+            del self.objects[col]
+
+        # Store the format id.
+        if cell_format is not None:
+            if self.format_ids is None:
+                self.format_ids = array('i', [0] * len(keys))
+
+            self.format_ids[index] = self.table._get_format_id(cell_format)
+
+        elif self.format_ids is not None:
+            self.format_ids[index] = 0
+
+    def _set_numbers(self, first_col, numbers, cell_format):
+        # Store a run of number cells from an array of doubles. If the run
+        # comes after the last cell in the row the arrays are extended in
+        # bulk, otherwise each cell is stored in turn.
+        keys = self.keys
+        count = len(numbers)
+
+        if keys and first_col <= keys[-1] >> TAG_BITS:
+            for index, number in enumerate(numbers):
+                self._set_cell(first_col + index, CELL_NUMBER, cell_format,
+                               number)
+            return
+
+        first_key = first_col << TAG_BITS | CELL_NUMBER
+        keys.extend(range(first_key, first_key + (count << TAG_BITS),
+                          1 << TAG_BITS))
+        self.numbers.extend(numbers)
+
+        if cell_format is not None and self.format_ids is None:
+            self.format_ids = array('i', [0] * (len(keys) - count))
+
+        if self.format_ids is not None:
+            format_id = 0
+            if cell_format is not None:
+                format_id = self.table._get_format_id(cell_format)
+
+            self.format_ids.extend([format_id] * count)
+
+    def _get_cell(self, index):
+        # Create a cell tuple from the row arrays.
+        key = self.keys[index]
+        col = key >> TAG_BITS
+        tag = key & TAG_MASK
+
+        if self.format_ids is not None:
+            cell_format = self.table.formats[self.format_ids[index]]
+        else:
+            cell_format = None
+
+        if self.objects and col in self.objects:
+            data = self.objects[col]
+        else:
+            data = None
+
+        if tag == CELL_NUMBER:
+            if data is None:
+                data = self.numbers[index]
+
+            return tuple_new(cell_number_tuple, (data, cell_format))
+
+        elif tag == CELL_STRING:
+            if data is None:
+                data = int(self.numbers[index])
+
+            return tuple_new(cell_string_tuple, (data, cell_format))
+
+        elif tag == CELL_FORMULA:
+            return tuple_new(cell_formula_tuple,
+                             (data[0], cell_format, data[1]))
+
+        elif tag == CELL_ARRAY_FORMULA:
+            return tuple_new(cell_arformula_tuple,
+                             (data[0], cell_format, data[1], data[2]))
+
+        elif tag == CELL_BOOLEAN:
+            return tuple_new(cell_boolean_tuple,
+                             (int(self.numbers[index]), cell_format))
+
+        else:
+            return tuple_new(cell_blank_tuple, (cell_format,))
+
+    def _compact(self):
+        # Release the unused space that the arrays allocate as they grow.
+        self.keys = array('I', self.keys)
+        self.numbers = array('d', self.numbers)
+
+        if self.format_ids is not None:
+            self.format_ids = array('i', self.format_ids)
+
+
+class SpillCellRow(CellRow):
+    """
+    A row of a SpillCellTable. The approximate memory used by the cells that
+    are added to the row is added to the size of the table.
+
+    """
+
+    __slots__ = ()
+
+    def _set_cell(self, col, tag, cell_format, number=0, data=None):
+        size = self._get_size()
+        CellRow._set_cell(self, col, tag, cell_format, number, data)
+        self.table.size += self._get_size() - size
+
+    def _set_numbers(self, first_col, numbers, cell_format):
+        size = self._get_size()
+        CellRow._set_numbers(self, first_col, numbers, cell_format)
+        self.table.size += self._get_size() - size
+
+    def _get_size(self):
+        # Return the approximate memory used by the cells of the row.
+        size = len(self.keys) * CELL_BYTES
+
+        if self.objects:
+            size += len(self.objects) * OBJECT_BYTES
+
+        return size
+
+
+class CellTable(dict):
+    """
+    A table of the cell data in a worksheet. It maps row numbers to
+    CellRow objects and, like a defaultdict, adds a row when a missing row
+    is accessed.
+
+    """
+
+    # The class of the rows of the table.
+    row_class = CellRow
+
+    def __init__(self):
+        super(CellTable, self).__init__()
+
+        # The formats used by the cells, indexed by format id. Id 0 is used
+        # for cells without a format.
+        self.formats = [None]
+        self.format_ids = {}
+
+        # The last row that was added. Rows are usually complete when the
+        # next row is added so the previous row is compacted.
+        self.last_row_data = None
+
+    def __missing__(self, row):
+        if self.last_row_data is not None:
+            self.last_row_data._compact()
+
+        row_data = self.row_class(self)
+        self[row] = row_data
+        self.last_row_data = row_data
+
+        return row_data
+
+    def clear(self):
+        super(CellTable, self).clear()
+        self.last_row_data = None
+
+    def _get_rows(self):
+        # Return the (row, row_data) pairs of the table in row order.
+        return sorted(self.items())
+
+    def _get_format_id(self, cell_format):
+        # Get the id of a format, adding it to the table if required.
+        format_id = self.format_ids.get(id(cell_format))
+
+        if format_id is None:
+            format_id = len(self.formats)
+            self.formats.append(cell_format)
+            self.format_ids[id(cell_format)] = format_id
+
+        return format_id
+
+
+class SpillCellTable(CellTable):
+    """
+    A cell table with a memory budget. When the approximate size of the
+    table exceeds the budget the rows are written, in row order, to a
+    temporary "spill run" file and the table is cleared. The runs and the
+    rows in memory are merged in row order when the worksheet is written.
+
+    """
+
+    def __init__(self, memory_budget, tmpdir=None):
+        super(SpillCellTable, self).__init__()
+
+        self.memory_budget = memory_budget
+        self.tmpdir = tmpdir
+        self.size = 0
+        self.spill_runs = []
+
+    # The rows add the size of their new cells to the table size.
+    row_class = SpillCellRow
+
+    def __getitem__(self, row):
+        # Spill the table to disk if it is over the budget before a row is
+        # accessed to add cells. The accessed row is kept in memory since
+        # the caller may add more cells to it.
+        if self.size > self.memory_budget:
+            self._spill(row)
+
+        return super(SpillCellTable, self).__getitem__(row)
+
+    def __missing__(self, row):
+        self.size += ROW_BYTES
+
+        return super(SpillCellTable, self).__missing__(row)
+
+    def _spill(self, keep_row=None):
+        # Write the rows, other than the kept row, to a new spill run file
+        # and clear the table. The existing cells of the kept row aren't
+        # counted again.
+        kept_row_data = self.pop(keep_row, None)
+
+        if not self:
+            self.size = 0
+        else:
+            (fd, filename) = tempfile.mkstemp(dir=self.tmpdir)
+            self.spill_runs.append(filename)
+
+            fh = os.fdopen(fd, 'wb')
+
+            for row, row_data in sorted(self.items()):
+                pickle.dump((row, row_data.keys, row_data.numbers,
+                             row_data.format_ids, row_data.objects),
+                            fh, pickle.HIGHEST_PROTOCOL)
+
+            fh.close()
+
+            self.clear()
+            self.size = 0
+
+        if kept_row_data is not None:
+            dict.__setitem__(self, keep_row, kept_row_data)
+            self.last_row_data = kept_row_data
+            self.size = ROW_BYTES
+
+    def _read_spill_run(self, filename, index):
+        # Read the rows of a spill run file. The index of the run is used
+        # to order the rows of the runs when they are merged.
+        fh = open(filename, 'rb')
+
+        try:
+            while True:
+                try:
+                    (row, keys, numbers, format_ids,
+                     objects) = pickle.load(fh)
+                except EOFError:
+                    break
+
+                row_data = CellRow(self)
+                row_data.keys = keys
+                row_data.numbers = numbers
+                row_data.format_ids = format_ids
+                row_data.objects = objects
+
+                yield row, index, row_data
+        finally:
+            fh.close()
+
+    def _get_rows(self):
+        # Return an iterator of the (row, row_data) pairs of the spill runs
+        # and the table in row order. A row that was written in more than
+        # one run is merged with the cells of later runs taking precedence.
+        if not self.spill_runs:
+            return super(SpillCellTable, self)._get_rows()
+
+        index = len(self.spill_runs)
+        runs = [self._read_spill_run(filename, run_index)
+                for run_index, filename in enumerate(self.spill_runs)]
+        runs.append([(row, index, row_data)
+                     for row, row_data in sorted(self.items())])
+
+        return self._merge_rows(merge(*runs))
+
+    def _merge_rows(self, rows):
+        # Merge the cells of consecutive (row, index, row_data) items for
+        # the same row.
+        merged_row = None
+        merged_data = None
+
+        for row, _, row_data in rows:
+            if row == merged_row:
+                for col, cell in row_data.items():
+                    merged_data[col] = cell
+                continue
+
+            if merged_data is not None:
+                yield merged_row, merged_data
+
+            merged_row = row
+            merged_data = row_data
+
+        if merged_data is not None:
+            yield merged_row, merged_data
+
+    def _close(self):
+        # Remove the spill run files.
+        for filename in self.spill_runs:
+            os.unlink(filename)
+
+        self.spill_runs = []
@@ -59,6 +59,7 @@ class Chart(xmlwriter.XMLwriter):
         self.val_axis_position = 'l'
         self.formula_ids = {}
         self.formula_data = []
+        self.range_capture = None
         self.horiz_cat_axis = 0
         self.horiz_val_axis = 1
         self.protection = 0
@@ -905,6 +906,11 @@ class Chart(xmlwriter.XMLwriter):
 
             self.formula_data.append(data)
             self.formula_ids[formula] = formula_id
+
+            # In constant_memory mode the workbook registers the range so
+            # that its data is kept as the worksheet rows are written.
+            if data is None and self.range_capture:
+                self.range_capture(formula)
         else:
             # Formula already seen. Return existing id.
             formula_id = self.formula_ids[formula]
@@ -20,6 +20,12 @@ try:
 except ImportError:
     Fraction = float
 
+try:
+    # For compatibility between Python 2 and 3.
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
 try:
     # For Python 2.6+.
     from collections import defaultdict
@@ -34,10 +40,14 @@ if sys.version_info[0] == 2:
     int_types = (int, long)
     num_types = (float, int, long, Decimal, Fraction)
     str_types = basestring
+    plain_num_types = (float, int, long)
+    plain_str_types = (str, unicode)
 else:
     int_types = (int)
     num_types = (float, int, Decimal, Fraction)
     str_types = str
+    plain_num_types = (float, int)
+    plain_str_types = (str,)
 
 
 if sys.version_info < (2, 6, 0):
@@ -103,6 +103,17 @@ class Format(xmlwriter.XMLwriter):
         self.color_indexed = 0
         self.font_only = 0
 
+        # Cached hash keys, which are cleared when a property is set.
+        self.format_key = None
+        self.font_key = None
+        self.border_key = None
+        self.fill_key = None
+        self.alignment_key = None
+        self.intern_key = None
+
+        # The workbook that uses the format as a template format, if any.
+        self.template = None
+
         # Convert properties in the constructor to method calls.
         for key, value in properties.items():
             getattr(self, 'set_' + key)(value)
@@ -126,6 +137,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_name = font_name
+        self._clear_keys()
 
     def set_font_size(self, font_size=11):
         """
@@ -139,6 +151,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_size = font_size
+        self._clear_keys()
 
     def set_font_color(self, font_color):
         """
@@ -152,6 +165,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_color = self._get_color(font_color)
+        self._clear_keys()
 
     def set_bold(self, bold=True):
         """
@@ -165,6 +179,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.bold = bold
+        self._clear_keys()
 
     def set_italic(self, italic=True):
         """
@@ -178,6 +193,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.italic = italic
+        self._clear_keys()
 
     def set_underline(self, underline=1):
         """
@@ -191,6 +207,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.underline = underline
+        self._clear_keys()
 
     def set_font_strikeout(self, font_strikeout=True):
         """
@@ -204,6 +221,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_strikeout = font_strikeout
+        self._clear_keys()
 
     def set_font_script(self, font_script=1):
         """
@@ -217,6 +235,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_script = font_script
+        self._clear_keys()
 
     def set_font_outline(self, font_outline=True):
         """
@@ -230,6 +249,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_outline = font_outline
+        self._clear_keys()
 
     def set_font_shadow(self, font_shadow=True):
         """
@@ -243,6 +263,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.font_shadow = font_shadow
+        self._clear_keys()
 
     def set_num_format(self, num_format):
         """
@@ -256,6 +277,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.num_format = num_format
+        self._clear_keys()
 
     def set_locked(self, locked=True):
         """
@@ -269,6 +291,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.locked = locked
+        self._clear_keys()
 
     def set_hidden(self, hidden=True):
         """
@@ -282,6 +305,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.hidden = hidden
+        self._clear_keys()
 
     def set_align(self, alignment):
         """
@@ -356,6 +380,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.text_wrap = text_wrap
+        self._clear_keys()
 
     def set_rotation(self, rotation):
         """
@@ -381,6 +406,7 @@ class Format(xmlwriter.XMLwriter):
                 "Rotation rotation outside range: -90 <= angle <= 90")
 
         self.rotation = rotation
+        self._clear_keys()
 
     def set_indent(self, indent=1):
         """
@@ -394,6 +420,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.indent = indent
+        self._clear_keys()
 
     def set_shrink(self, shrink=True):
         """
@@ -407,6 +434,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.shrink = shrink
+        self._clear_keys()
 
     def set_text_justlast(self, text_justlast=True):
         """
@@ -420,6 +448,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.text_justlast = text_justlast
+        self._clear_keys()
 
     def set_pattern(self, pattern=1):
         """
@@ -433,6 +462,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.pattern = pattern
+        self._clear_keys()
 
     def set_bg_color(self, bg_color):
         """
@@ -446,6 +476,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.bg_color = self._get_color(bg_color)
+        self._clear_keys()
 
     def set_fg_color(self, fg_color):
         """
@@ -459,6 +490,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.fg_color = self._get_color(fg_color)
+        self._clear_keys()
 
     # set_border(style) Set cells borders to the same style
     def set_border(self, style=1):
@@ -506,6 +538,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.bottom = bottom
+        self._clear_keys()
 
     def set_bottom_color(self, bottom_color):
         """
@@ -519,6 +552,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.bottom_color = self._get_color(bottom_color)
+        self._clear_keys()
 
     def set_diag_type(self, diag_type=1):
         """
@@ -532,6 +566,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.diag_type = diag_type
+        self._clear_keys()
 
     def set_left(self, left=1):
         """
@@ -545,6 +580,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.left = left
+        self._clear_keys()
 
     def set_left_color(self, left_color):
         """
@@ -558,6 +594,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.left_color = self._get_color(left_color)
+        self._clear_keys()
 
     def set_right(self, right=1):
         """
@@ -571,6 +608,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.right = right
+        self._clear_keys()
 
     def set_right_color(self, right_color):
         """
@@ -584,6 +622,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.right_color = self._get_color(right_color)
+        self._clear_keys()
 
     def set_top(self, top=1):
         """
@@ -597,6 +636,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.top = top
+        self._clear_keys()
 
     def set_top_color(self, top_color):
         """
@@ -610,6 +650,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.top_color = self._get_color(top_color)
+        self._clear_keys()
 
     def set_diag_color(self, diag_color):
         """
@@ -623,6 +664,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.diag_color = self._get_color(diag_color)
+        self._clear_keys()
 
     def set_diag_border(self, diag_border=1):
         """
@@ -636,6 +678,7 @@ class Format(xmlwriter.XMLwriter):
 
         """
         self.diag_border = diag_border
+        self._clear_keys()
 
     ###########################################################################
     #
@@ -671,14 +714,17 @@ class Format(xmlwriter.XMLwriter):
     def set_text_h_align(self, text_h_align):
         # Set the text_h_align property.
         self.text_h_align = text_h_align
+        self._clear_keys()
 
     def set_text_v_align(self, text_v_align):
         # Set the text_v_align property.
         self.text_v_align = text_v_align
+        self._clear_keys()
 
     def set_reading_order(self, reading_order=True):
         # Set the reading_order property.
         self.reading_order = reading_order
+        self._clear_keys()
 
     def set_valign(self, align):
         # Set vertical cell alignment. This is required by the constructor
@@ -689,26 +735,32 @@ class Format(xmlwriter.XMLwriter):
     def set_font_family(self, font_family):
         # Set the Format font_family property.
         self.font_family = font_family
+        self._clear_keys()
 
     def set_font_charset(self, font_charset):
         # Set the Format font_charset property.
         self.font_charset = font_charset
+        self._clear_keys()
 
     def set_font_scheme(self, font_scheme):
         # Set the Format font_scheme property.
         self.font_scheme = font_scheme
+        self._clear_keys()
 
     def set_font_condense(self, font_condense):
         # Set the Format font_condense property.
         self.font_condense = font_condense
+        self._clear_keys()
 
     def set_font_extend(self, font_extend):
         # Set the Format font_extend property.
         self.font_extend = font_extend
+        self._clear_keys()
 
     def set_theme(self, theme):
         # Set the Format theme property.
         self.theme = theme
+        self._clear_keys()
 
     def set_hyperlink(self, hyperlink=True):
         # Set the properties for the hyperlink style. This doesn't
@@ -718,27 +770,33 @@ class Format(xmlwriter.XMLwriter):
         self.set_theme(10)
         self.set_align('top')
         self.hyperlink = hyperlink
+        self._clear_keys()
 
     def set_color_indexed(self, color_index):
         # Used in the cell comment format.
         self.color_indexed = color_index
+        self._clear_keys()
 
     def set_font_only(self, font_only=True):
         # Used in the cell comment format.
         self.font_only = font_only
+        self._clear_keys()
 
     # Compatibility methods.
     def set_font(self, font_name):
         #  For compatibility with Excel::Writer::XLSX.
         self.font_name = font_name
+        self._clear_keys()
 
     def set_size(self, font_size):
         #  For compatibility with Excel::Writer::XLSX.
         self.font_size = font_size
+        self._clear_keys()
 
     def set_color(self, font_color):
         #  For compatibility with Excel::Writer::XLSX.
         self.font_color = self._get_color(font_color)
+        self._clear_keys()
 
     ###########################################################################
     #
@@ -843,74 +901,93 @@ class Format(xmlwriter.XMLwriter):
 
     def _get_format_key(self):
         # Returns a unique hash key for a font. Used by Workbook.
-        key = ':'.join(self._to_string(x) for x in (
-            self._get_font_key(),
-            self._get_border_key(),
-            self._get_fill_key(),
-            self._get_alignment_key(),
-            self.num_format,
-            self.locked,
-            self.hidden))
-
-        return key
+        if self.format_key is None:
+            self.format_key = ':'.join(self._to_string(x) for x in (
+                self._get_font_key(),
+                self._get_border_key(),
+                self._get_fill_key(),
+                self._get_alignment_key(),
+                self.num_format,
+                self.locked,
+                self.hidden))
+
+        return self.format_key
 
     def _get_font_key(self):
         # Returns a unique hash key for a font. Used by Workbook.
-        key = ':'.join(self._to_string(x) for x in (
-            self.bold,
-            self.font_color,
-            self.font_charset,
-            self.font_family,
-            self.font_outline,
-            self.font_script,
-            self.font_shadow,
-            self.font_strikeout,
-            self.font_name,
-            self.italic,
-            self.font_size,
-            self.underline))
-
-        return key
+        if self.font_key is None:
+            self.font_key = ':'.join(self._to_string(x) for x in (
+                self.bold,
+                self.font_color,
+                self.font_charset,
+                self.font_family,
+                self.font_outline,
+                self.font_script,
+                self.font_shadow,
+                self.font_strikeout,
+                self.font_name,
+                self.italic,
+                self.font_size,
+                self.underline))
+
+        return self.font_key
 
     def _get_border_key(self):
         # Returns a unique hash key for a border style. Used by Workbook.
-        key = ':'.join(self._to_string(x) for x in (
-            self.bottom,
-            self.bottom_color,
-            self.diag_border,
-            self.diag_color,
-            self.diag_type,
-            self.left,
-            self.left_color,
-            self.right,
-            self.right_color,
-            self.top,
-            self.top_color))
-
-        return key
+        if self.border_key is None:
+            self.border_key = ':'.join(self._to_string(x) for x in (
+                self.bottom,
+                self.bottom_color,
+                self.diag_border,
+                self.diag_color,
+                self.diag_type,
+                self.left,
+                self.left_color,
+                self.right,
+                self.right_color,
+                self.top,
+                self.top_color))
+
+        return self.border_key
 
     def _get_fill_key(self):
         # Returns a unique hash key for a fill style. Used by Workbook.
-        key = ':'.join(self._to_string(x) for x in (
-            self.pattern,
-            self.bg_color,
-            self.fg_color))
+        if self.fill_key is None:
+            self.fill_key = ':'.join(self._to_string(x) for x in (
+                self.pattern,
+                self.bg_color,
+                self.fg_color))
 
-        return key
+        return self.fill_key
 
     def _get_alignment_key(self):
         # Returns a unique hash key for alignment formats.
-
-        key = ':'.join(self._to_string(x) for x in (
-            self.text_h_align,
-            self.text_v_align,
-            self.indent,
-            self.rotation,
-            self.text_wrap,
-            self.shrink,
-            self.reading_order))
-
-        return key
+        if self.alignment_key is None:
+            self.alignment_key = ':'.join(self._to_string(x) for x in (
+                self.text_h_align,
+                self.text_v_align,
+                self.indent,
+                self.rotation,
+                self.text_wrap,
+                self.shrink,
+                self.reading_order))
+
+        return self.alignment_key
+
+    def _clear_keys(self):
+        # Clear the cached hash keys when a property changes. A changed
+        # format is also no longer shared by Workbook.add_format().
+        self.format_key = None
+        self.font_key = None
+        self.border_key = None
+        self.fill_key = None
+        self.alignment_key = None
+        self.intern_key = None
+
+        # A changed template format also changes the style table that is
+        # prepared for the workbooks created from the template.
+        if self.template is not None:
+            self.template._clear_template_styles()
 
     def _get_xf_index(self):
         # Returns the XF index number used by Excel to identify a format.
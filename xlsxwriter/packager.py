@@ -10,8 +10,15 @@ import os
 import stat
 import tempfile
 from shutil import copy
+from warnings import warn
+from zipfile import ZIP_STORED, ZIP_DEFLATED
+
+try:
+    # For Python 3.2+ or with the futures backport.
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
 
-from .compatibility import StringIO
 from .compatibility import BytesIO
 
 # Package imports.
@@ -26,6 +33,22 @@ from .theme import Theme
 from .vml import Vml
 from .table import Table
 from .comments import Comments
+from .xmlwriter import BufferedStreamWriter
+from .xmlwriter import DEFAULT_BUFFER_SIZE
+from .zipwriter import write_zip_member
+
+# The package parts that are usually byte-identical between workbooks with
+# the same layout. Their compressed data is taken from the process-wide part
+# cache instead of being compressed again for each workbook.
+CACHED_PARTS = frozenset([
+    '[Content_Types].xml',
+    '_rels/.rels',
+    'docProps/app.xml',
+    'xl/_rels/workbook.xml.rels',
+    'xl/styles.xml',
+    'xl/theme/theme1.xml',
+    'xl/workbook.xml',
+])
 
 
 class Packager(object):
@@ -86,6 +109,15 @@ class Packager(object):
 
         self.tmpdir = ''
         self.in_memory = False
+        self.buffer_size = DEFAULT_BUFFER_SIZE
+        self.zip_file = None
+        self.zip_member = None
+        self.allow_zip64 = False
+        self.workers = 1
+        self.compression_level = None
+        self.compression_levels = {}
+        self.executor = None
+        self.futures = []
         self.workbook = None
         self.worksheet_count = 0
         self.chartsheet_count = 0
@@ -111,6 +143,30 @@ class Packager(object):
         # Set the optional 'in_memory' mode.
         self.in_memory = in_memory
 
+    def _set_buffer_size(self, buffer_size):
+        # Set the size of the XML write buffer.
+        self.buffer_size = buffer_size
+
+    def _set_workers(self, workers):
+        # Set the number of threads used to assemble the package parts.
+        if workers > 1 and ThreadPoolExecutor is None:
+            warn("The 'workers' option requires the concurrent.futures "
+                 "module. Parts will be assembled serially.")
+            workers = 1
+
+        self.workers = workers
+
+    def _set_compression(self, compression_level, compression_levels):
+        # Set the zip compression level and any overrides by part type.
+        self.compression_level = compression_level
+        self.compression_levels = compression_levels
+
+    def _set_zip_file(self, zip_file, allow_zip64=False):
+        # Set a ZipFile to stream the package parts directly into, instead
+        # of writing them to temp files or in-memory streams.
+        self.zip_file = zip_file
+        self.allow_zip64 = allow_zip64
+
     def _add_workbook(self, workbook):
         # Add the Excel::Writer::XLSX::Workbook object to the package.
         self.workbook = workbook
@@ -128,6 +184,21 @@ class Packager(object):
 
     def _create_package(self):
         # Write the xml files that make up the XLSX OPC package.
+        if self.workers > 1:
+            self.executor = ThreadPoolExecutor(self.workers)
+
+        try:
+            self._write_package_files()
+            self._wait_for_parts()
+        finally:
+            if self.executor:
+                self.executor.shutdown()
+                self.executor = None
+
+        return self.filenames
+
+    def _write_package_files(self):
+        # Write the xml files in the order they are added to the package.
         self._write_worksheet_files()
         self._write_chartsheet_files()
         self._write_workbook_file()
@@ -151,13 +222,11 @@ class Packager(object):
         self._add_image_files()
         self._add_vba_project()
 
-        return self.filenames
-
     def _filename(self, xml_filename):
         # Create a temp filename to write the XML data to and store the Excel
         # filename to use as the name in the Zip container.
         if self.in_memory:
-            os_filename = StringIO()
+            os_filename = BytesIO()
         else:
             (fd, os_filename) = tempfile.mkstemp(dir=self.tmpdir)
             os.close(fd)
@@ -166,11 +235,105 @@ class Packager(object):
 
         return os_filename
 
+    def _assemble_part(self, xml_object, *args):
+        # Assemble the XML file of a package part. In parallel mode the part
+        # is assembled by a worker thread.
+        if self.executor:
+            future = self.executor.submit(xml_object._assemble_xml_file,
+                                          *args)
+            self.futures.append(future)
+        else:
+            xml_object._assemble_xml_file(*args)
+
+    def _wait_for_parts(self):
+        # Wait for any parts being assembled in parallel and raise any error.
+        for future in self.futures:
+            future.result()
+
+        self.futures = []
+
+    def _get_compression(self, xml_filename):
+        # Get the zip compression type and level for a package part. A level
+        # of 0 means that the part is stored without compression.
+        if xml_filename.startswith('xl/media/'):
+            part_type = 'media'
+        elif xml_filename.startswith('xl/worksheets/sheet'):
+            part_type = 'worksheets'
+        elif xml_filename == 'xl/sharedStrings.xml':
+            part_type = 'sharedStrings'
+        else:
+            part_type = None
+
+        if part_type in self.compression_levels:
+            level = self.compression_levels[part_type]
+        elif xml_filename.endswith(('.png', '.jpeg')):
+            # PNG and JPEG images are already compressed.
+            level = 0
+        else:
+            level = self.compression_level
+
+        if level == 0:
+            return ZIP_STORED, None
+        else:
+            return ZIP_DEFLATED, level
+
+    def _set_zip_compression(self, zip_file, xml_filename):
+        # Set the compression of the next member added to a ZipFile. The
+        # level is ignored by ZipFile in Python < 3.7.
+        compress_type, level = self._get_compression(xml_filename)
+        zip_file.compression = compress_type
+        zip_file.compresslevel = level
+
+    def _xml_file(self, xml_filename):
+        # Create a buffered writer for an XML part. The XML is written as
+        # utf-8 encoded bytes to a zip member, a temp file or to an
+        # in-memory stream.
+        if self.zip_file:
+            if xml_filename in CACHED_PARTS:
+                # Collect the XML so that the compressed data can be taken
+                # from the part cache when the writer is closed.
+                return BufferedStreamWriter(CachedPartStream(self,
+                                                             xml_filename),
+                                            self.buffer_size)
+
+            # Write the XML directly into a member of the zip file.
+            self._set_zip_compression(self.zip_file, xml_filename)
+            self.zip_member = self.zip_file.open(xml_filename, 'w',
+                                                 force_zip64=self.allow_zip64)
+            return BufferedStreamWriter(self.zip_member, self.buffer_size)
+
+        os_filename = self._filename(xml_filename)
+
+        if self.in_memory:
+            return BufferedStreamWriter(os_filename, self.buffer_size,
+                                        close_stream=False)
+        else:
+            return BufferedStreamWriter(open(os_filename, 'wb'),
+                                        self.buffer_size)
+
+    def _close_zip_member(self):
+        # Close the zip member of a part that wasn't completed because of an
+        # error, so that the zip file can be closed.
+        if self.zip_member is not None:
+            self.zip_member.close()
+            self.zip_member = None
+
+    def _write_cached_part(self, zip_file, xml_filename, data):
+        # Add a part to a ZipFile using the compressed data from the part
+        # cache.
+        compress_type, level = self._get_compression(xml_filename)
+
+        write_zip_member(zip_file, xml_filename, data, compress_type, level)
+
     def _write_workbook_file(self):
         # Write the workbook.xml file.
         workbook = self.workbook
 
-        workbook._set_xml_writer(self._filename('xl/workbook.xml'))
+        # The workbook prepares the format properties so it has to wait
+        # for any worksheets that are being assembled in parallel.
+        self._wait_for_parts()
+
+        workbook._set_xml_writer(self._xml_file('xl/workbook.xml'))
         workbook._assemble_xml_file()
 
     def _write_worksheet_files(self):
@@ -184,9 +347,14 @@ class Packager(object):
                 worksheet._opt_reopen()
                 worksheet._write_single_row()
 
-            worksheet._set_xml_writer(self._filename('xl/worksheets/sheet'
+            if self.executor:
+                # Assign the format indices in worksheet order before the
+                # worksheets are assembled in parallel.
+                worksheet._prepare_xf_indices()
+
+            worksheet._set_xml_writer(self._xml_file('xl/worksheets/sheet'
                                                      + str(index) + '.xml'))
-            worksheet._assemble_xml_file()
+            self._assemble_part(worksheet)
             index += 1
 
     def _write_chartsheet_files(self):
@@ -196,9 +364,9 @@ class Packager(object):
             if not worksheet.is_chartsheet:
                 continue
 
-            worksheet._set_xml_writer(self._filename('xl/chartsheets/sheet'
+            worksheet._set_xml_writer(self._xml_file('xl/chartsheets/sheet'
                                                      + str(index) + '.xml'))
-            worksheet._assemble_xml_file()
+            self._assemble_part(worksheet)
             index += 1
 
     def _write_chart_files(self):
@@ -214,9 +382,9 @@ class Packager(object):
                                 "data series. See chart.add_series()."
                                 % index)
 
-            chart._set_xml_writer(self._filename('xl/charts/chart'
+            chart._set_xml_writer(self._xml_file('xl/charts/chart'
                                                  + str(index) + '.xml'))
-            chart._assemble_xml_file()
+            self._assemble_part(chart)
             index += 1
 
     def _write_drawing_files(self):
@@ -226,9 +394,9 @@ class Packager(object):
 
         index = 1
         for drawing in self.workbook.drawings:
-            drawing._set_xml_writer(self._filename('xl/drawings/drawing'
+            drawing._set_xml_writer(self._xml_file('xl/drawings/drawing'
                                                    + str(index) + '.xml'))
-            drawing._assemble_xml_file()
+            self._assemble_part(drawing)
             index += 1
 
     def _write_vml_files(self):
@@ -239,24 +407,26 @@ class Packager(object):
                 continue
             if worksheet.has_vml:
                 vml = Vml()
-                vml._set_xml_writer(self._filename('xl/drawings/vmlDrawing'
+                vml._set_xml_writer(self._xml_file('xl/drawings/vmlDrawing'
                                                    + str(index) + '.vml'))
-                vml._assemble_xml_file(worksheet.vml_data_id,
-                                       worksheet.vml_shape_id,
-                                       worksheet.comments_list,
-                                       worksheet.buttons_list)
+                self._assemble_part(vml,
+                                    worksheet.vml_data_id,
+                                    worksheet.vml_shape_id,
+                                    worksheet.comments_list,
+                                    worksheet.buttons_list)
                 index += 1
 
             if worksheet.has_header_vml:
                 vml = Vml()
 
-                vml._set_xml_writer(self._filename('xl/drawings/vmlDrawing'
+                vml._set_xml_writer(self._xml_file('xl/drawings/vmlDrawing'
                                                    + str(index) + '.vml'))
-                vml._assemble_xml_file(worksheet.vml_header_id,
-                                       worksheet.vml_header_id * 1024,
-                                       None,
-                                       None,
-                                       worksheet.header_images_list)
+                self._assemble_part(vml,
+                                    worksheet.vml_header_id,
+                                    worksheet.vml_header_id * 1024,
+                                    None,
+                                    None,
+                                    worksheet.header_images_list)
 
                 self._write_vml_drawing_rels_file(worksheet, index)
                 index += 1
@@ -269,9 +439,9 @@ class Packager(object):
                 continue
 
             comment = Comments()
-            comment._set_xml_writer(self._filename('xl/comments'
+            comment._set_xml_writer(self._xml_file('xl/comments'
                                                    + str(index) + '.xml'))
-            comment._assemble_xml_file(worksheet.comments_list)
+            self._assemble_part(comment, worksheet.comments_list)
             index += 1
 
     def _write_shared_strings_file(self):
@@ -282,8 +452,8 @@ class Packager(object):
         if not self.workbook.str_table.count:
             return
 
-        sst._set_xml_writer(self._filename('xl/sharedStrings.xml'))
-        sst._assemble_xml_file()
+        sst._set_xml_writer(self._xml_file('xl/sharedStrings.xml'))
+        self._assemble_part(sst)
 
     def _write_app_file(self):
         # Write the app.xml file.
@@ -318,8 +488,8 @@ class Packager(object):
 
         app._set_properties(properties)
 
-        app._set_xml_writer(self._filename('docProps/app.xml'))
-        app._assemble_xml_file()
+        app._set_xml_writer(self._xml_file('docProps/app.xml'))
+        self._assemble_part(app)
 
     def _write_core_file(self):
         # Write the core.xml file.
@@ -327,8 +497,8 @@ class Packager(object):
         core = Core()
 
         core._set_properties(properties)
-        core._set_xml_writer(self._filename('docProps/core.xml'))
-        core._assemble_xml_file()
+        core._set_xml_writer(self._xml_file('docProps/core.xml'))
+        self._assemble_part(core)
 
     def _write_custom_file(self):
         # Write the custom.xml file.
@@ -339,8 +509,8 @@ class Packager(object):
             return
 
         custom._set_properties(properties)
-        custom._set_xml_writer(self._filename('docProps/custom.xml'))
-        custom._assemble_xml_file()
+        custom._set_xml_writer(self._xml_file('docProps/custom.xml'))
+        self._assemble_part(custom)
 
     def _write_content_types_file(self):
         # Write the ContentTypes.xml file.
@@ -384,11 +554,30 @@ class Packager(object):
         if self.workbook.custom_properties:
             content._add_custom_properties()
 
-        content._set_xml_writer(self._filename('[Content_Types].xml'))
-        content._assemble_xml_file()
+        content._set_xml_writer(self._xml_file('[Content_Types].xml'))
+        self._assemble_part(content)
 
     def _write_styles_file(self):
         # Write the style xml file.
+        template = self.workbook.styles_template
+
+        # Workbooks that reuse the prepared style table of a template also
+        # reuse the styles XML, which is assembled once for the template.
+        if template is not None:
+            if template.template_styles_xml is None:
+                stream = BytesIO()
+                self._assemble_styles(BufferedStreamWriter(stream,
+                                                           close_stream=False))
+                template.template_styles_xml = stream.getvalue()
+
+            xml_file = self._xml_file('xl/styles.xml')
+            xml_file.write_bytes(template.template_styles_xml)
+            xml_file.close()
+        else:
+            self._assemble_styles(self._xml_file('xl/styles.xml'), True)
+
+    def _assemble_styles(self, xml_file, parallel=False):
+        # Assemble the styles XML from the workbook format properties.
         xf_formats = self.workbook.xf_formats
         palette = self.workbook.palette
         font_count = self.workbook.font_count
@@ -409,15 +598,19 @@ class Packager(object):
             custom_colors,
             dxf_formats])
 
-        styles._set_xml_writer(self._filename('xl/styles.xml'))
-        styles._assemble_xml_file()
+        styles._set_xml_writer(xml_file)
+
+        if parallel:
+            self._assemble_part(styles)
+        else:
+            styles._assemble_xml_file()
 
     def _write_theme_file(self):
         # Write the theme xml file.
         theme = Theme()
 
-        theme._set_xml_writer(self._filename('xl/theme/theme1.xml'))
-        theme._assemble_xml_file()
+        theme._set_xml_writer(self._xml_file('xl/theme/theme1.xml'))
+        self._assemble_part(theme)
 
     def _write_table_files(self):
         # Write the table files.
@@ -430,10 +623,10 @@ class Packager(object):
 
             for table_props in table_props:
                 table = Table()
-                table._set_xml_writer(self._filename('xl/tables/table'
+                table._set_xml_writer(self._xml_file('xl/tables/table'
                                                      + str(index) + '.xml'))
                 table._set_properties(table_props)
-                table._assemble_xml_file()
+                self._assemble_part(table)
                 self.table_count += 1
                 index += 1
 
@@ -453,9 +646,9 @@ class Packager(object):
             rels._add_document_relationship('/custom-properties',
                                             'docProps/custom.xml')
 
-        rels._set_xml_writer(self._filename('_rels/.rels'))
+        rels._set_xml_writer(self._xml_file('_rels/.rels'))
 
-        rels._assemble_xml_file()
+        self._assemble_part(rels)
 
     def _write_workbook_rels_file(self):
         # Write the _rels/.rels xml file.
@@ -490,8 +683,8 @@ class Packager(object):
         if self.workbook.vba_project:
             rels._add_ms_package_relationship('/vbaProject', 'vbaProject.bin')
 
-        rels._set_xml_writer(self._filename('xl/_rels/workbook.xml.rels'))
-        rels._assemble_xml_file()
+        rels._set_xml_writer(self._xml_file('xl/_rels/workbook.xml.rels'))
+        self._assemble_part(rels)
 
     def _write_worksheet_rels_files(self):
         # Write data such as hyperlinks or drawings.
@@ -519,9 +712,9 @@ class Packager(object):
                 rels._add_worksheet_relationship(*link_data)
 
             # Create .rels file such as /xl/worksheets/_rels/sheet1.xml.rels.
-            rels._set_xml_writer(self._filename('xl/worksheets/_rels/sheet'
+            rels._set_xml_writer(self._xml_file('xl/worksheets/_rels/sheet'
                                                 + str(index) + '.xml.rels'))
-            rels._assemble_xml_file()
+            self._assemble_part(rels)
 
     def _write_chartsheet_rels_files(self):
         # Write the chartsheet .rels files for links to drawing files.
@@ -545,9 +738,9 @@ class Packager(object):
                 rels._add_worksheet_relationship(*link_data)
 
             # Create .rels file such as /xl/chartsheets/_rels/sheet1.xml.rels.
-            rels._set_xml_writer(self._filename('xl/chartsheets/_rels/sheet'
+            rels._set_xml_writer(self._xml_file('xl/chartsheets/_rels/sheet'
                                                 + str(index) + '.xml.rels'))
-            rels._assemble_xml_file()
+            self._assemble_part(rels)
 
     def _write_drawing_rels_files(self):
         # Write the drawing .rels files for worksheets with charts or drawings.
@@ -564,9 +757,9 @@ class Packager(object):
                 rels._add_document_relationship(*drawing_data)
 
             # Create .rels file such as /xl/drawings/_rels/sheet1.xml.rels.
-            rels._set_xml_writer(self._filename('xl/drawings/_rels/drawing'
+            rels._set_xml_writer(self._xml_file('xl/drawings/_rels/drawing'
                                                 + str(index) + '.xml.rels'))
-            rels._assemble_xml_file()
+            self._assemble_part(rels)
 
     def _write_vml_drawing_rels_file(self, worksheet, index):
         # Write the vmlDdrawing .rels files for worksheets with images in
@@ -579,10 +772,10 @@ class Packager(object):
             rels._add_document_relationship(*drawing_data)
 
         # Create .rels file such as /xl/drawings/_rels/vmlDrawing1.vml.rels.
-        rels._set_xml_writer(self._filename('xl/drawings/_rels/vmlDrawing'
+        rels._set_xml_writer(self._xml_file('xl/drawings/_rels/vmlDrawing'
                                             + str(index)
                                             + '.vml.rels'))
-        rels._assemble_xml_file()
+        self._assemble_part(rels)
 
     def _add_image_files(self):
         # Write the /xl/media/image?.xml files.
@@ -596,7 +789,16 @@ class Packager(object):
 
             xml_image_name = 'xl/media/image' + str(index) + ext
 
-            if not self.in_memory:
+            if self.zip_file:
+                # In zip streaming mode we add the image to the zip directly.
+                self._set_zip_compression(self.zip_file, xml_image_name)
+
+                if image_data:
+                    self.zip_file.writestr(xml_image_name,
+                                           image_data.getvalue())
+                else:
+                    self.zip_file.write(filename, xml_image_name)
+            elif not self.in_memory:
                 # In file mode we just write or copy the image file.
                 os_filename = self._filename(xml_image_name)
 
@@ -639,7 +841,15 @@ class Packager(object):
 
         xml_vba_name = 'xl/vbaProject.bin'
 
-        if not self.in_memory:
+        if self.zip_file:
+            # In zip streaming mode we add the VBA file to the zip directly.
+            self._set_zip_compression(self.zip_file, xml_vba_name)
+
+            if vba_is_stream:
+                self.zip_file.writestr(xml_vba_name, vba_project.getvalue())
+            else:
+                self.zip_file.write(vba_project, xml_vba_name)
+        elif not self.in_memory:
             # In file mode we just write or copy the VBA file.
             os_filename = self._filename(xml_vba_name)
 
@@ -663,3 +873,24 @@ class Packager(object):
                 vba_file.close()
 
             self.filenames.append((os_filename, xml_vba_name, True))
+
+
+class CachedPartStream(BytesIO):
+    """
+    An in-memory stream for a package part that is added to the zip file,
+    from the part cache, when the stream is closed.
+
+    """
+
+    def __init__(self, packager, xml_filename):
+        super(CachedPartStream, self).__init__()
+        self.packager = packager
+        self.xml_filename = xml_filename
+
+    def close(self):
+        if not self.closed:
+            self.packager._write_cached_part(self.packager.zip_file,
+                                             self.xml_filename,
+                                             self.getvalue())
+
+        super(CachedPartStream, self).close()
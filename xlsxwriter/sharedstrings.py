@@ -6,12 +6,21 @@
 #
 
 # Standard packages.
-import re
-import sys
+import os
+import tempfile
+
+try:
+    # SQLite is optional and is only used by the DiskSharedStringTable.
+    import sqlite3
+except ImportError:
+    sqlite3 = None
 
 # Package imports.
 from . import xmlwriter
 
+# The default number of strings in the DiskSharedStringTable cache.
+DEFAULT_STRING_CACHE_SIZE = 100000
+
 
 class SharedStrings(xmlwriter.XMLwriter):
     """
@@ -85,41 +94,16 @@ class SharedStrings(xmlwriter.XMLwriter):
 
     def _write_si(self, string):
         # Write the <si> element.
-        attributes = []
-
-        # Excel escapes control characters with _xHHHH_ and also escapes any
-        # literal strings of that type by encoding the leading underscore.
-        # So "\0" -> _x0000_ and "_x0000_" -> _x005F_x0000_.
-        # The following substitutions deal with those cases.
-
-        # Escape the escape.
-        string = re.sub('(_x[0-9a-fA-F]{4}_)', r'_x005F\1', string)
-
-        # Convert control character to the _xHHHH_ escape.
-        string = re.sub(r'([\x00-\x08\x0B-\x1F])',
-                        lambda match: "_x%04X_" %
-                        ord(match.group(1)), string)
-
-        # Escape Unicode non-characters FFFE and FFFF.
-        if sys.version_info[0] == 2:
-            non_char1 = unichr(0xFFFE)
-            non_char2 = unichr(0xFFFF)
-        else:
-            non_char1 = "\uFFFE"
-            non_char2 = "\uFFFF"
-
-        string = re.sub(non_char1, '_xFFFE_', string)
-        string = re.sub(non_char2, '_xFFFF_', string)
-
-        # Add attribute to preserve leading or trailing whitespace.
-        if re.search('^\s', string) or re.search('\s$', string):
-            attributes.append(('xml:space', 'preserve'))
+        string, preserve, is_rich = self._sanitize_string(string)
 
         # Write any rich strings without further tags.
-        if re.search('^<r>', string) and re.search('</r>$', string):
+        if is_rich:
             self._xml_rich_si_element(string)
+        elif preserve:
+            # Add attribute to preserve leading or trailing whitespace.
+            self.fh.write('<si><t xml:space="preserve">%s</t></si>' % string)
         else:
-            self._xml_si_element(string, attributes)
+            self.fh.write('<si><t>%s</t></si>' % string)
 
 
 # A metadata class to store Excel strings between worksheets.
@@ -141,6 +125,7 @@ class SharedStringTable(object):
             # String isn't already stored in the table so add it.
             index = self.unique_count
             self.string_table[string] = index
+            self.string_array.append(string)
             self.count += 1
             self.unique_count += 1
             return index
@@ -155,11 +140,100 @@ class SharedStringTable(object):
         return self.string_array[index]
 
     def _sort_string_data(self):
-        """" Sort the shared string data and convert from dict to list. """
-        self.string_array = sorted(self.string_table,
-                                   key=self.string_table.__getitem__)
+        """" Release the string dict. The list is already in index order. """
         self.string_table = {}
 
     def _get_strings(self):
         """" Return the sorted string list. """
         return self.string_array
+
+    def _close(self):
+        """" Release any resources used by the table. """
+        pass
+
+
+class DiskSharedStringTable(SharedStringTable):
+    """
+    A shared string table that stores the strings in a temporary SQLite
+    database so that the memory used doesn't grow with the number of unique
+    strings. Recently used strings are kept in a bounded cache.
+
+    """
+
+    def __init__(self, tmpdir=None, cache_size=DEFAULT_STRING_CACHE_SIZE):
+        super(DiskSharedStringTable, self).__init__()
+
+        self.cache_size = cache_size
+        self.tmpdir = tmpdir
+        self.filename = None
+
+        # The database is created when the first string is added so that
+        # workbooks without strings, or that are discarded before any are
+        # written, don't leave a temp file behind.
+        self.db = None
+
+    def _open(self):
+        """" Create the temporary database. """
+        (fd, self.filename) = tempfile.mkstemp(dir=self.tmpdir)
+        os.close(fd)
+
+        # The database is only needed until the file is closed so it
+        # doesn't need to survive a crash.
+        self.db = sqlite3.connect(self.filename, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute('CREATE TABLE strings '
+                        '(id INTEGER PRIMARY KEY, string TEXT UNIQUE)')
+
+    def _get_shared_string_index(self, string):
+        """" Get the index of the string in the Shared String table. """
+        # The string_table dict is used as the cache of recent strings.
+        index = self.string_table.get(string)
+
+        if index is None:
+            if self.db is None:
+                self._open()
+
+            row = self.db.execute('SELECT id FROM strings WHERE string = ?',
+                                  (string,)).fetchone()
+
+            if row is None:
+                # String isn't already stored in the table so add it.
+                index = self.unique_count
+                self.db.execute('INSERT INTO strings VALUES (?, ?)',
+                                (index, string))
+                self.unique_count += 1
+            else:
+                index = row[0]
+
+            if len(self.string_table) >= self.cache_size:
+                self.string_table.clear()
+
+            self.string_table[string] = index
+
+        self.count += 1
+        return index
+
+    def _get_shared_string(self, index):
+        """" Get a shared string from the index. """
+        return self.db.execute('SELECT string FROM strings WHERE id = ?',
+                               (index,)).fetchone()[0]
+
+    def _sort_string_data(self):
+        """" Release the cache. The strings are already stored in order. """
+        self.string_table = {}
+
+    def _get_strings(self):
+        """" Return an iterator of the strings in index order. """
+        if self.db is None:
+            return iter(())
+
+        cursor = self.db.execute('SELECT string FROM strings ORDER BY id')
+        return (row[0] for row in cursor)
+
+    def _close(self):
+        """" Close and remove the database. """
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            os.remove(self.filename)
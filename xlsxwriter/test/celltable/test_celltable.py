@@ -0,0 +1,88 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...celltable import CellTable
+from ...celltable import cell_number_tuple, cell_string_tuple
+from ...celltable import cell_blank_tuple, cell_boolean_tuple
+from ...celltable import cell_formula_tuple, cell_arformula_tuple
+from ...format import Format
+
+
+class TestCellTable(unittest.TestCase):
+    """
+    Test the CellTable and CellRow classes.
+
+    """
+
+    def setUp(self):
+        self.table = CellTable()
+        self.format = Format()
+
+    def test_set_cells(self):
+        """Test storing and retrieving each cell type."""
+        cells = [
+            (0, cell_number_tuple(1.5, None)),
+            (1, cell_string_tuple(7, self.format)),
+            (2, cell_blank_tuple(self.format)),
+            (3, cell_boolean_tuple(1, None)),
+            (4, cell_formula_tuple('=A1', None, 0)),
+            (5, cell_arformula_tuple('{=A1}', self.format, 0, 'F1')),
+            (6, cell_string_tuple('inline', None)),
+        ]
+
+        for col, cell in cells:
+            self.table[3][col] = cell
+
+        self.assertEqual(self.table[3].items(), cells)
+        self.assertEqual(list(self.table[3]), list(range(7)))
+        self.assertEqual(len(self.table), 1)
+
+    def test_unordered_cells(self):
+        """Test writing and overwriting cells out of column order."""
+        row_data = self.table[0]
+
+        row_data[5] = cell_number_tuple(5, None)
+        row_data[1] = cell_string_tuple('one', self.format)
+        row_data[3] = cell_number_tuple(3, None)
+        row_data[1] = cell_formula_tuple('=1', None, 1)
+        row_data[5] = cell_string_tuple(2, None)
+
+        exp = [(1, cell_formula_tuple('=1', None, 1)),
+               (3, cell_number_tuple(3, None)),
+               (5, cell_string_tuple(2, None))]
+
+        self.assertEqual(row_data.items(), exp)
+        self.assertEqual(row_data._get_formats(),
+                         [(1, None), (3, None), (5, None)])
+        self.assertEqual(row_data._get_first_col(), 1)
+        self.assertEqual(row_data._get_last_col(), 5)
+
+    def test_missing_cells(self):
+        """Test the dict behavior for missing rows and cells."""
+        self.table[2][4] = cell_number_tuple(1, None)
+
+        self.assertNotIn(1, self.table)
+        self.assertIsNone(self.table.get(1))
+        self.assertIn(4, self.table[2])
+        self.assertNotIn(3, self.table[2])
+        self.assertIsNone(self.table[2].get(3))
+        self.assertRaises(KeyError, lambda: self.table[2][3])
+
+        self.table.clear()
+        self.assertFalse(self.table)
+
+    def test_compact(self):
+        """Test that adding a row compacts the previous row."""
+        for col in range(100):
+            self.table[0][col] = cell_number_tuple(col, self.format)
+
+        exp = self.table[0].items()
+        self.table[1][0] = cell_number_tuple(0, None)
+
+        self.assertEqual(self.table[0].items(), exp)
+        self.assertEqual(self.table[0].numbers.buffer_info()[1], 100)
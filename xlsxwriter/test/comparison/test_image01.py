@@ -7,6 +7,7 @@
 
 from ..excel_comparsion_test import ExcelComparisonTest
 from ...workbook import Workbook
+from ... import workbook as workbook_module
 
 
 class TestCompareXLSXFiles(ExcelComparisonTest):
@@ -53,3 +54,22 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_with_temp_files(self):
+        """Test the creation of a file without zip streaming."""
+
+        zip_streaming = workbook_module.ZIP_STREAMING
+        workbook_module.ZIP_STREAMING = False
+
+        try:
+            workbook = Workbook(self.got_filename)
+
+            worksheet = workbook.add_worksheet()
+
+            worksheet.insert_image('E9', self.image_dir + 'red.png')
+
+            workbook.close()
+        finally:
+            workbook_module.ZIP_STREAMING = zip_streaming
+
+        self.assertExcelEqual()
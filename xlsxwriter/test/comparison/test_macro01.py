@@ -7,6 +7,7 @@
 
 from ..excel_comparsion_test import ExcelComparisonTest
 from ...workbook import Workbook
+from ... import workbook as workbook_module
 from ...compatibility import BytesIO
 
 
@@ -96,3 +97,24 @@ class TestCompareXLSXFiles(ExcelComparisonTest):
         workbook.close()
 
         self.assertExcelEqual()
+
+    def test_create_file_with_temp_files(self):
+        """Test the creation of a file without zip streaming."""
+
+        zip_streaming = workbook_module.ZIP_STREAMING
+        workbook_module.ZIP_STREAMING = False
+
+        try:
+            workbook = Workbook(self.got_filename)
+
+            worksheet = workbook.add_worksheet()
+
+            workbook.add_vba_project(self.vba_dir + 'vbaProject01.bin')
+
+            worksheet.write('A1', 123)
+
+            workbook.close()
+        finally:
+            workbook_module.ZIP_STREAMING = zip_streaming
+
+        self.assertExcelEqual()
@@ -0,0 +1,39 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...format import Format
+
+
+class TestFormatKeys(unittest.TestCase):
+    """
+    Test the cached Format hash keys.
+
+    """
+
+    def test_cached_keys(self):
+        """Test that the keys are cached until a property is set."""
+        xf_format = Format({'bold': True, 'border': 1})
+
+        key = xf_format._get_format_key()
+        font_key = xf_format._get_font_key()
+
+        self.assertIs(xf_format._get_format_key(), key)
+        self.assertEqual(xf_format.font_key, font_key)
+
+        xf_format.set_italic()
+
+        self.assertEqual(xf_format.format_key, None)
+        self.assertNotEqual(xf_format._get_format_key(), key)
+        self.assertNotEqual(xf_format._get_font_key(), font_key)
+
+        xf_format.set_border_color('red')
+        self.assertEqual(xf_format.border_key, None)
+
+        exp = Format({'bold': True, 'italic': True, 'border': 1,
+                      'border_color': 'red'})
+        self.assertEqual(xf_format._get_format_key(), exp._get_format_key())
@@ -30,3 +30,33 @@ class TestWriteSi(unittest.TestCase):
         got = self.fh.getvalue()
 
         self.assertEqual(got, exp)
+
+    def test_write_si_escapes(self):
+        """Test the _write_si() method with Excel and XML escapes"""
+
+        self.sharedstrings._write_si('_x0000_ \x01 & <>')
+
+        exp = """<si><t>_x005F_x0000_ _x0001_ &amp; &lt;&gt;</t></si>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_si_preserve(self):
+        """Test the _write_si() method with surrounding whitespace"""
+
+        self.sharedstrings._write_si('neptune\n')
+
+        exp = """<si><t xml:space="preserve">neptune\n</t></si>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_si_rich(self):
+        """Test the _write_si() method with a rich string"""
+
+        self.sharedstrings._write_si('<r><t>a &amp; b\x02</t></r>')
+
+        exp = """<si><r><t>a &amp; b_x0002_</t></r></si>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
@@ -0,0 +1,97 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from datetime import date, datetime, time, timedelta, tzinfo
+from ...utility import datetimes_to_excel_serials
+from ...utility import _datetime_to_excel_datetime
+from ...utility import DATE_SERIALS_1900, DATE_SERIALS_CACHE_SIZE
+
+
+class MyDateTime(datetime):
+    pass
+
+
+class UTC(tzinfo):
+    def utcoffset(self, dt):
+        return timedelta(0)
+
+
+class TestUtility(unittest.TestCase):
+    """
+    Test datetimes_to_excel_serials() utility function.
+
+    """
+
+    def test_datetimes_to_excel_serials(self):
+        """Test datetimes_to_excel_serials() against the general conversion"""
+
+        dates = [
+            date(1899, 12, 30),
+            date(1900, 1, 1),
+            date(1900, 2, 28),
+            date(1900, 3, 1),
+            date(1904, 1, 1),
+            date(2017, 6, 30),
+            datetime(1899, 12, 31),
+            datetime(1900, 1, 1, 12),
+            datetime(1900, 2, 28, 23, 59, 59, 999999),
+            datetime(1900, 3, 1, 0, 0, 1),
+            datetime(2017, 6, 30, 15, 30, 45, 123456),
+            time(0, 0),
+            time(12, 30, 1, 500000),
+            timedelta(days=70, seconds=30),
+            MyDateTime(2017, 6, 30, 15, 30),
+        ]
+
+        for date_1904 in (False, True):
+            exp = [_datetime_to_excel_datetime(dt, date_1904, False)
+                   for dt in dates]
+            got = datetimes_to_excel_serials(dates, date_1904, False)
+
+            self.assertEqual(got, exp)
+
+            # Check the cached values.
+            got = datetimes_to_excel_serials(dates, date_1904, False)
+
+            self.assertEqual(got, exp)
+
+    def test_datetimes_to_excel_serials_none(self):
+        """Test datetimes_to_excel_serials() with None values"""
+
+        got = datetimes_to_excel_serials([None, date(2017, 1, 1), None])
+
+        self.assertEqual(got, [None, 42736.0, None])
+
+    def test_datetimes_to_excel_serials_timezone(self):
+        """Test datetimes_to_excel_serials() with timezones"""
+
+        dates = [datetime(2017, 1, 1, 12, tzinfo=UTC()),
+                 time(12, tzinfo=UTC())]
+
+        got = datetimes_to_excel_serials(dates, False, True)
+
+        self.assertEqual(got, [42736.5, 0.5])
+
+        self.assertRaises(TypeError, datetimes_to_excel_serials, dates[:1])
+        self.assertRaises(TypeError, datetimes_to_excel_serials, dates[1:])
+
+    def test_datetimes_to_excel_serials_cache(self):
+        """Test that the date cache is bounded"""
+
+        dates = [date(2000, 1, 1) + timedelta(days=i)
+                 for i in range(DATE_SERIALS_CACHE_SIZE + 10)]
+
+        got = datetimes_to_excel_serials(dates)
+
+        self.assertEqual(got[-1], got[0] + DATE_SERIALS_CACHE_SIZE + 9)
+        self.assertTrue(len(DATE_SERIALS_1900) <= DATE_SERIALS_CACHE_SIZE)
+
+    def test_datetimes_to_excel_serials_unsupported(self):
+        """Test datetimes_to_excel_serials() with an unsupported type"""
+
+        self.assertRaises(TypeError, datetimes_to_excel_serials, ['2017'])
@@ -0,0 +1,110 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestChartRangeCapture(unittest.TestCase):
+    """
+    Test the chart cached data in constant_memory mode.
+
+    """
+
+    def _get_chart_xml(self, options, chart_first=True):
+        # Create a workbook with a chart of streamed data and return the
+        # chart XML files.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'column'})
+        chart2 = workbook.add_chart({'type': 'line'})
+
+        def add_series():
+            chart.add_series({'categories': '=Sheet1!$A$1:$A$100',
+                              'values': '=Sheet1!$B$1:$B$100'})
+            chart.add_series({'values': '=Sheet1!$C$1:$C$100'})
+            chart2.add_series({'values': '=Data!$A$3:$A$5'})
+
+        if chart_first:
+            add_series()
+
+        for row in range(100):
+            worksheet.write_string(row, 0, 'Item %d' % row)
+            worksheet.write_number(row, 1, row * 1.5)
+            if row % 3:
+                worksheet.write_formula(row, 2, '=B%d*2' % (row + 1), None,
+                                        row * 3)
+
+        # The chart refers to a worksheet that is added later.
+        data = workbook.add_worksheet('Data')
+        data.write_column(0, 0, [1, 2, 3, 4, 5, 6])
+
+        if not chart_first:
+            add_series()
+
+        worksheet.insert_chart('E2', chart)
+        worksheet.insert_chart('E20', chart2)
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        charts = [xlsx_file.read('xl/charts/chart1.xml'),
+                  xlsx_file.read('xl/charts/chart2.xml')]
+        xlsx_file.close()
+
+        return charts
+
+    def test_chart_range_capture(self):
+        """Test constant_memory chart data against the default mode."""
+        exp = self._get_chart_xml({})
+
+        got = self._get_chart_xml({'constant_memory': True})
+        self.assertEqual(got, exp)
+
+        got = self._get_chart_xml({'constant_memory': True,
+                                   'reorder_window': 5})
+        self.assertEqual(got, exp)
+
+    def test_chart_range_added_late(self):
+        """Test that ranges added after the data have no cached data."""
+        got = self._get_chart_xml({'constant_memory': True},
+                                  chart_first=False)
+
+        self.assertNotIn(b'<c:v>Item 1</c:v>', got[0])
+        self.assertNotIn(b'<c:pt ', got[1])
+
+        got = self._get_chart_xml({}, chart_first=False)
+
+        self.assertIn(b'<c:v>Item 1</c:v>', got[0])
+
+    def test_chart_range_partly_written(self):
+        """Test that ranges added after some of their rows are empty."""
+        output = BytesIO()
+        workbook = Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_column('A1', [1, 2, 3, 4, 5])
+
+        chart = workbook.add_chart({'type': 'line'})
+        chart.add_series({'values': '=Sheet1!$A$1:$A$10'})
+        chart.add_series({'values': '=Sheet1!$A$6:$A$10'})
+        worksheet.insert_chart('C2', chart)
+
+        worksheet.write_column('A6', [6, 7, 8, 9, 10])
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        got = xlsx_file.read('xl/charts/chart1.xml')
+        xlsx_file.close()
+
+        # Only the range that starts after the written rows has data.
+        self.assertEqual(got.count(b'<c:ptCount val="5"/>'), 1)
+        self.assertNotIn(b'<c:ptCount val="10"/>', got)
+        self.assertNotIn(b'<c:v>5</c:v>', got)
+        self.assertIn(b'<c:v>10</c:v>', got)
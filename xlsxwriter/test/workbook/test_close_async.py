@@ -0,0 +1,113 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook, asyncio
+
+
+@unittest.skipIf(asyncio is None, "asyncio is required for the methods")
+class TestCloseAsync(unittest.TestCase):
+    """
+    Test the asynchronous Workbook close methods.
+
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _create_workbook(self, filename, options):
+        workbook = Workbook(filename, options)
+        worksheet = workbook.add_worksheet()
+
+        for row in range(1000):
+            worksheet.write_string(row, 0, 'Row %d' % row)
+            worksheet.write_number(row, 1, row * 3.5)
+
+        return workbook
+
+    def _get_members(self, output):
+        # Return the zip file members, without the creation date.
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _read_chunks(self, chunks, limit=None):
+        # Read the chunks of an asynchronous iterator.
+        got = []
+        while limit is None or len(got) < limit:
+            try:
+                got.append(self.loop.run_until_complete(chunks.__anext__()))
+            except StopAsyncIteration:
+                break
+
+        return got
+
+    def test_close_async(self):
+        """Test closing a workbook in an executor."""
+        output = BytesIO()
+        self._create_workbook(output, {}).close()
+        exp = self._get_members(output)
+
+        for options in ({}, {'in_memory': True}):
+            filename = os.path.join(self.tmpdir, 'async.xlsx')
+            workbook = self._create_workbook(filename, options)
+            self.loop.run_until_complete(workbook.close_async())
+
+            self.assertEqual(self._get_members(filename), exp)
+
+    def test_close_async_running_loop(self):
+        """Test that the running loop is used, not the current loop."""
+        output = BytesIO()
+        workbook = self._create_workbook(output, {})
+
+        asyncio.set_event_loop(None)
+        awaitable = workbook.close_async()
+        self.loop.run_until_complete(awaitable)
+
+        self.assertTrue(len(output.getvalue()) > 0)
+
+    def test_close_stream_async(self):
+        """Test reading a workbook as an asynchronous iterator."""
+        output = BytesIO()
+        self._create_workbook(output, {}).close()
+        exp = self._get_members(output)
+
+        for options in ({}, {'in_memory': True}):
+            workbook = self._create_workbook(None, options)
+            chunks = workbook.close_stream_async(chunk_size=4096)
+
+            self.assertIs(chunks.__aiter__(), chunks)
+
+            got = self._read_chunks(chunks)
+            self.assertTrue(len(got) > 2)
+            self.assertEqual(self._get_members(BytesIO(b''.join(got))), exp)
+
+    def test_close_stream_async_stopped(self):
+        """Test that the writer stops if the iterator is closed early."""
+        workbook = self._create_workbook(None, {})
+        chunks = workbook.close_stream_async(chunk_size=1024)
+
+        self._read_chunks(chunks, limit=1)
+        self.loop.run_until_complete(chunks.aclose())
+
+        self.assertTrue(workbook.filename.cancelled)
@@ -0,0 +1,148 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class NonSeekableWriter(object):
+    """A write only file object such as a pipe or a socket."""
+
+    def __init__(self):
+        self.output = BytesIO()
+
+    def write(self, data):
+        return self.output.write(data)
+
+    def flush(self):
+        pass
+
+    def seekable(self):
+        return False
+
+
+class TestCloseStream(unittest.TestCase):
+    """
+    Test writing workbooks to non-seekable outputs and chunk iterators.
+
+    """
+
+    def _create_workbook(self, filename, options):
+        # Create a workbook with enough data to fill several chunks.
+        workbook = Workbook(filename, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+
+        for row in range(2000):
+            worksheet.write_string(row, 0, 'Row %d' % row, bold)
+            worksheet.write_number(row, 1, row * 3.5)
+
+        chart = workbook.add_chart({'type': 'line'})
+        chart.add_series({'values': '=Sheet1!$B$1:$B$10'})
+        worksheet.insert_chart('D2', chart)
+
+        return workbook
+
+    def _get_members(self, data):
+        # Return the zip file members, without the creation date.
+        xlsx_file = ZipFile(BytesIO(data))
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _get_expected(self):
+        output = BytesIO()
+        workbook = self._create_workbook(output, {})
+        workbook.close()
+
+        return self._get_members(output.getvalue())
+
+    def test_non_seekable_output(self):
+        """Test writing to a non-seekable file object."""
+        exp = self._get_expected()
+
+        for options in ({}, {'in_memory': True}, {'workers': 2},
+                        {'compression_workers': 2}):
+            output = NonSeekableWriter()
+            workbook = self._create_workbook(output, options)
+            workbook.close()
+
+            got = self._get_members(output.output.getvalue())
+            self.assertEqual(got, exp, options)
+
+    def test_close_stream(self):
+        """Test reading a workbook as an iterator of chunks."""
+        exp = self._get_expected()
+
+        for options in ({}, {'in_memory': True}, {'workers': 2}):
+            workbook = self._create_workbook(None, options)
+            chunks = list(workbook.close_stream(chunk_size=4096))
+
+            self.assertTrue(len(chunks) > 2)
+            self.assertTrue(all(chunks))
+
+            got = self._get_members(b''.join(chunks))
+            self.assertEqual(got, exp, options)
+
+            # The workbook is closed.
+            self.assertEqual(list(workbook.close_stream()), [])
+
+    def test_close_stream_stopped(self):
+        """Test that the writer stops if the reader stops early."""
+        workbook = self._create_workbook(None, {})
+        chunks = workbook.close_stream(chunk_size=1024)
+
+        next(chunks)
+        chunks.close()
+
+        self.assertTrue(workbook.filename.cancelled)
+
+    def test_close_stream_error(self):
+        """Test that errors in the writer are raised in the reader."""
+        workbook = self._create_workbook(None, {})
+
+        def write_error():
+            raise ValueError("Invalid part")
+
+        workbook._prepare_tables = write_error
+
+        with self.assertRaises(ValueError):
+            list(workbook.close_stream())
+
+    def test_close_stream_not_read(self):
+        """Test that the temp files are removed if the stream isn't read."""
+        tmpdir = tempfile.mkdtemp()
+
+        for options in ({'shared_strings_on_disk': True,
+                         'memory_budget': 1000},
+                        {'constant_memory': True}):
+            options['tmpdir'] = tmpdir
+            workbook = self._create_workbook(None, options)
+            self.assertNotEqual(os.listdir(tmpdir), [], options)
+
+            chunks = workbook.close_stream()
+            del chunks
+
+            self.assertEqual(os.listdir(tmpdir), [], options)
+
+            # The iterator can also be closed explicitly.
+            workbook = self._create_workbook(None, options)
+            chunks = workbook.close_stream()
+            chunks.close()
+
+            self.assertEqual(list(chunks), [])
+            self.assertEqual(os.listdir(tmpdir), [], options)
+
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,83 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestCompressionLevel(unittest.TestCase):
+    """
+    Test the compression of the parts in the XLSX file.
+
+    """
+
+    def _get_compress_types(self, options):
+        # Create a workbook with images and return the compression type of
+        # each of the zip file members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        image_dir = 'xlsxwriter/test/comparison/images/'
+
+        worksheet.write_string('A1', 'Foo')
+        worksheet.insert_image('E9', image_dir + 'red.png')
+        worksheet.insert_image('E19', image_dir + 'red.jpg')
+        worksheet.insert_image('E29', image_dir + 'red.bmp')
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        self.assertIsNone(xlsx_file.testzip())
+
+        compress_types = dict((info.filename, info.compress_type)
+                              for info in xlsx_file.infolist())
+        xlsx_file.close()
+
+        return compress_types
+
+    def _check_compress_types(self, options, exp):
+        # Check the compression types in each of the packaging modes.
+        for mode in ({}, {'in_memory': True}, {'compression_workers': 2}):
+            mode.update(options)
+            got = self._get_compress_types(mode)
+
+            for filename in exp:
+                self.assertEqual(got[filename], exp[filename],
+                                 '%s in %s' % (filename, mode))
+
+    def test_default_compression(self):
+        """Test that PNG and JPEG images are stored by default."""
+        exp = {'xl/worksheets/sheet1.xml': ZIP_DEFLATED,
+               'xl/sharedStrings.xml': ZIP_DEFLATED,
+               'xl/media/image1.png': ZIP_STORED,
+               'xl/media/image2.jpeg': ZIP_STORED,
+               'xl/media/image3.bmp': ZIP_DEFLATED}
+
+        self._check_compress_types({}, exp)
+
+    def test_compression_levels(self):
+        """Test overriding the compression by part type."""
+        options = {'compression_level': 1,
+                   'compression_levels': {'worksheets': 0,
+                                          'sharedStrings': 9,
+                                          'media': 6}}
+
+        exp = {'xl/workbook.xml': ZIP_DEFLATED,
+               'xl/worksheets/sheet1.xml': ZIP_STORED,
+               'xl/sharedStrings.xml': ZIP_DEFLATED,
+               'xl/media/image1.png': ZIP_DEFLATED,
+               'xl/media/image3.bmp': ZIP_DEFLATED}
+
+        self._check_compress_types(options, exp)
+
+    def test_store_only(self):
+        """Test storing all of the parts without compression."""
+        got = self._get_compress_types({'compression_level': 0})
+
+        self.assertEqual(set(got.values()), set([ZIP_STORED]))
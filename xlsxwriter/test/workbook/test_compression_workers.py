@@ -0,0 +1,67 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestCompressionWorkers(unittest.TestCase):
+    """
+    Test that parts compressed in parallel match the serial output.
+
+    """
+
+    def _create_workbook(self, options):
+        # Create a workbook with formats shared between worksheets, charts
+        # and hyperlinks and return the zip file members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+
+        bold = workbook.add_format({'bold': True})
+        red = workbook.add_format({'font_color': 'red', 'bg_color': 'yellow'})
+        dates = workbook.add_format({'num_format': 'dd/mm/yy'})
+        italic = workbook.add_format({'italic': True})
+
+        for index in range(6):
+            worksheet = workbook.add_worksheet()
+            formats = [italic, dates, red, bold][index % 4:]
+
+            worksheet.set_column('E:E', 20, formats[-1])
+            worksheet.set_row(3, 30, formats[0])
+
+            for row in range(20):
+                for col in range(4):
+                    cell_format = formats[(row + col) % len(formats)]
+                    worksheet.write(row, col, row * col, cell_format)
+
+                worksheet.write_string(row, 4, 'Row %d' % row)
+
+            worksheet.write_url('F1', 'http://www.python.org/')
+
+            chart = workbook.add_chart({'type': 'line'})
+            chart.add_series({'values': [worksheet.name, 0, 1, 19, 1]})
+            worksheet.insert_chart('H2', chart)
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()]
+        xlsx_file.close()
+
+        return members
+
+    def test_compression_workers(self):
+        """Test that the parallel compressed parts match the serial parts."""
+        self.maxDiff = None
+
+        exp = self._create_workbook({})
+        got = self._create_workbook({'compression_workers': 4})
+
+        self.assertEqual(got, exp)
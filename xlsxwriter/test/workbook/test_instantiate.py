@@ -0,0 +1,166 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+import warnings
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestInstantiate(unittest.TestCase):
+    """
+    Test creating workbooks from a template with the Workbook instantiate()
+    method.
+
+    """
+
+    def _add_formats(self, workbook):
+        # Add the formats and workbook properties that are shared by the
+        # reports.
+        workbook.set_properties({'title': 'Report'})
+        workbook.define_name('Rate', '=0.05')
+
+        return {
+            'header': workbook.add_format({'bold': True, 'pattern': 1,
+                                           'bg_color': 'yellow',
+                                           'fg_color': 'red'}),
+            'money': workbook.add_format({'num_format': '$#,##0',
+                                          'border': 1}),
+            'alert': workbook.add_format({'font_color': '#9C0006',
+                                          'bg_color': '#FFC7CE'}),
+        }
+
+    def _add_data(self, workbook, formats, extra):
+        # Add the data of a report.
+        worksheet = workbook.add_worksheet('Data')
+        worksheet.set_column('B:B', 12, formats['money'])
+
+        for row in range(20):
+            worksheet.write_string(row, 0, 'Item %d' % row, formats['header'])
+            worksheet.write_number(row, 1, row * 250, formats['money'])
+
+        worksheet.conditional_format('B1:B20', {'type': 'cell',
+                                                'criteria': '>',
+                                                'value': 4000,
+                                                'format': formats['alert']})
+
+        if extra:
+            italic = workbook.add_format({'italic': True})
+            worksheet.write_string(21, 0, 'Total', italic)
+            worksheet.write_comment('D2', 'Comment')
+
+    def _get_members(self, output):
+        # Return the zip file members, without the creation date.
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _get_expected(self, extra):
+        # Create the equivalent workbook without a template. The template
+        # formats are indexed in creation order.
+        output = BytesIO()
+        workbook = Workbook(output)
+        formats = self._add_formats(workbook)
+
+        for xf_format in workbook.formats:
+            xf_format._get_xf_index()
+
+        self._add_data(workbook, formats, extra)
+        workbook.close()
+
+        return self._get_members(output)
+
+    def test_instantiate(self):
+        """Test that template instances give the same output."""
+        for extra in (False, True):
+            exp = self._get_expected(extra)
+
+            template = Workbook()
+            formats = self._add_formats(template)
+
+            for _ in range(3):
+                output = BytesIO()
+                workbook = template.instantiate(output)
+                self._add_data(workbook, formats, extra)
+                workbook.close()
+
+                self.assertEqual(self._get_members(output), exp, extra)
+
+            # The template formats aren't changed by the instances.
+            self.assertEqual(template.dxf_format_indices, {})
+            self.assertEqual(formats['alert'].dxf_index, None)
+            self.assertEqual(formats['header'].fg_color, '#FF0000')
+
+    def test_instantiate_options(self):
+        """Test the template options and the instance overrides."""
+        template = Workbook(None, {'in_memory': True,
+                                   'strings_to_numbers': True})
+        workbook = template.instantiate(BytesIO(), {'in_memory': False})
+
+        self.assertTrue(workbook.strings_to_numbers)
+        self.assertFalse(workbook.in_memory)
+        self.assertIs(workbook.default_url_format,
+                      template.default_url_format)
+        self.assertTrue(template.fileclosed)
+
+    def test_instantiate_added_formats(self):
+        """Test that formats added to the template are prepared."""
+        template = Workbook()
+        template.instantiate(BytesIO())
+        bold = template.add_format({'bold': True})
+
+        output = BytesIO()
+        workbook = template.instantiate(output)
+        workbook.add_worksheet().write_string(0, 0, 'Bold', bold)
+        workbook.close()
+
+        self.assertEqual(bold.xf_index, 2)
+        self.assertEqual(len(template.template_styles[2]), 3)
+        self.assertIs(workbook.styles_template, template)
+
+    def test_instantiate_changed_formats(self):
+        """Test that template formats changed after instantiate() are used."""
+        template = Workbook()
+        formats = self._add_formats(template)
+
+        workbook1 = template.instantiate(BytesIO())
+        formats['money'].set_italic()
+
+        for workbook in (workbook1, template.instantiate(BytesIO())):
+            worksheet = workbook.add_worksheet()
+            worksheet.write_number(0, 0, 1, formats['money'])
+            workbook.close()
+
+            styles = dict(self._get_members(workbook.filename))
+            self.assertIn(b'<i/>', styles['xl/styles.xml'])
+
+        # The changed format is prepared again for later workbooks.
+        workbook = template.instantiate(BytesIO())
+        formats['money'].set_italic(False)
+        workbook.add_worksheet()
+        workbook.close()
+
+        styles = dict(self._get_members(workbook.filename))
+        self.assertNotIn(b'<i/>', styles['xl/styles.xml'])
+
+    def test_instantiate_template_close(self):
+        """Test that closing a template with a filename warns."""
+        output = BytesIO()
+        template = Workbook(output)
+        template.instantiate(BytesIO())
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            template.close()
+
+        self.assertEqual(len(caught), 1)
+        self.assertEqual(output.getvalue(), b'')
@@ -0,0 +1,72 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestInternFormats(unittest.TestCase):
+    """
+    Test the 'intern_formats' workbook option.
+
+    """
+
+    def _get_members(self, options):
+        # Create a workbook that adds a format for every cell and return the
+        # zip file members and the number of formats.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+
+        for row in range(100):
+            bold = workbook.add_format({'bold': True})
+            color = workbook.add_format({'font_color': 'red',
+                                         'num_format': row % 3})
+            worksheet.write_number(row, 0, row, bold)
+            worksheet.write_number(row, 1, row, color)
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members, len(workbook.formats)
+
+    def test_intern_formats(self):
+        """Test that formats with the same properties are shared."""
+        exp, count = self._get_members({})
+        self.assertEqual(count, 202)
+
+        got, count = self._get_members({'intern_formats': True})
+        self.assertEqual(got, exp)
+        self.assertEqual(count, 6)
+
+    def test_intern_formats_changed(self):
+        """Test that changed formats aren't shared."""
+        workbook = Workbook(None, {'intern_formats': True})
+
+        bold = workbook.add_format({'bold': True})
+        self.assertIs(workbook.add_format({'bold': 1}), bold)
+
+        bold.set_italic()
+        self.assertIsNot(workbook.add_format({'bold': True}), bold)
+
+        # The default formats aren't shared.
+        url_format = workbook.add_format({'color': 'blue', 'underline': 1})
+        self.assertIsNot(url_format, workbook.default_url_format)
+
+        # Unhashable properties aren't shared.
+        fill = workbook.add_format({'bg_color': 'red', 'border': [1]})
+        self.assertIsNot(workbook.add_format({'bg_color': 'red',
+                                              'border': [1]}), fill)
+
+        workbook.fileclosed = 1
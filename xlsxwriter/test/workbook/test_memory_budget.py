@@ -0,0 +1,200 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """
+    Test the 'memory_budget' workbook option.
+
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _get_members(self, options, workers=1):
+        # Create a workbook with cells and row formats written in a random
+        # order and return the zip file members and the number of spill
+        # runs.
+        output = BytesIO()
+        options['tmpdir'] = self.tmpdir
+        options['workers'] = workers
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+        italic = workbook.add_format({'italic': True})
+
+        chart = workbook.add_chart({'type': 'line'})
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$200',
+                          'values': '=Sheet1!$B$1:$B$200'})
+        worksheet.insert_chart('H2', chart)
+
+        cells = [(row, col) for row in range(200) for col in range(4)]
+        random.Random(42).shuffle(cells)
+
+        for row, col in cells:
+            if col == 0:
+                worksheet.write_string(row, col, 'Name %d' % (row % 17))
+            elif col == 1:
+                worksheet.write_number(row, col, row * 1.25, bold)
+            elif col == 2:
+                worksheet.write_formula(row, col, '=B%d*2' % (row + 1))
+            else:
+                worksheet.write_url(row, col, 'http://example.com/%d' % row)
+
+            # Update some rows again after they may have been spilled.
+            if row % 50 == 7 and col == 3:
+                worksheet.set_row(row, 20, italic)
+                worksheet.write_number(row, 1, -row)
+
+        worksheet.set_row(250, None, italic)
+        worksheet.write_comment('F30', 'Comment')
+        worksheet.write_number(300, 5, 1, italic)
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members, worksheet.table
+
+    def test_memory_budget(self):
+        """Test that spilled rows give the same output as the default."""
+        exp, _ = self._get_members({})
+
+        got, table = self._get_members({'memory_budget': 1000000})
+        self.assertEqual(table.spill_runs, [])
+        self.assertEqual(got, exp)
+
+        got, table = self._get_members({'memory_budget': '4KB'})
+        self.assertEqual(got, exp)
+
+        got, table = self._get_members({'memory_budget': '4KB'}, workers=2)
+        self.assertEqual(got, exp)
+
+        # The spill run files should be removed.
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_spill_runs(self):
+        """Test that the table is spilled when it is over the budget."""
+        output = BytesIO()
+        workbook = Workbook(output, {'memory_budget': '10KB',
+                                     'tmpdir': self.tmpdir})
+        worksheet = workbook.add_worksheet()
+
+        for row in reversed(range(500)):
+            worksheet.write_number(row, 0, row)
+
+        table = worksheet.table
+        self.assertTrue(len(table.spill_runs) > 10)
+        self.assertTrue(len(table) < 40)
+        self.assertEqual([row for row, _ in table._get_rows()],
+                         list(range(500)))
+
+        workbook.close()
+
+    def test_chart_ranges(self):
+        """Test that the spill runs are read once for all chart ranges."""
+
+        def get_chart_data(options):
+            workbook = Workbook(BytesIO(), options)
+            worksheet = workbook.add_worksheet()
+
+            for row in reversed(range(300)):
+                worksheet.write_row(row, 0, [row, row * 2, 'Row %d' % row])
+
+            for col in 'ABC':
+                chart = workbook.add_chart({'type': 'line'})
+                chart.add_series({'values': '=Sheet1!$%s$1:$%s$300'
+                                            % (col, col)})
+                worksheet.insert_chart('E2', chart)
+
+            # Count the reads of the spill runs.
+            reads = []
+            table = worksheet.table
+            get_rows = table._get_rows
+
+            def count_reads():
+                if table.spill_runs:
+                    reads.append(1)
+                return get_rows()
+
+            table._get_rows = count_reads
+
+            workbook.close()
+
+            return [chart.formula_data for chart in workbook.charts], reads
+
+        exp, _ = get_chart_data({})
+        got, reads = get_chart_data({'memory_budget': '4KB',
+                                     'tmpdir': self.tmpdir})
+
+        self.assertEqual(got, exp)
+
+        # The runs are read for the chart data and to write the worksheet.
+        self.assertEqual(len(reads), 2)
+
+    def test_spill_runs_by_column(self):
+        """Test that cells added to existing rows are counted."""
+
+        def get_members(options):
+            output = BytesIO()
+            options['tmpdir'] = self.tmpdir
+            workbook = Workbook(output, options)
+            worksheet = workbook.add_worksheet()
+
+            for col in range(40):
+                for row in range(300):
+                    worksheet.write_number(row, col, row * col)
+
+                worksheet.write_string(0, col, 'Column %d' % col)
+
+            # The table is spilled before it goes over the budget by more
+            # than the size of a single cell write.
+            table = worksheet.table
+            if 'memory_budget' in options:
+                self.assertTrue(table.size <= 100000 + 1000)
+                self.assertTrue(len(table.spill_runs) > 1)
+
+            workbook.close()
+
+            xlsx_file = ZipFile(output)
+            members = [(name, xlsx_file.read(name))
+                       for name in xlsx_file.namelist()
+                       if name != 'docProps/core.xml']
+            xlsx_file.close()
+
+            return members
+
+        exp = get_members({})
+        got = get_members({'memory_budget': 100000})
+
+        self.assertEqual(got, exp)
+
+    def test_memory_budget_in_memory(self):
+        """Test that the option is ignored in in_memory mode."""
+        output = BytesIO()
+        workbook = Workbook(output, {'memory_budget': '10KB',
+                                     'in_memory': True})
+        worksheet = workbook.add_worksheet()
+        workbook.close()
+
+        self.assertEqual(worksheet.memory_budget, None)
@@ -0,0 +1,91 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestOutputFile(unittest.TestCase):
+    """
+    Test that an existing output file is only replaced by a complete file.
+
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'keep.xlsx')
+
+        with open(self.filename, 'wb') as fh:
+            fh.write(b'Existing file')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_output_file_error(self):
+        """Test that an error doesn't overwrite an existing file."""
+        for options in ({}, {'in_memory': True}):
+            workbook = Workbook(self.filename, options)
+            worksheet = workbook.add_worksheet()
+            worksheet.write_number('A1', 1)
+
+            # A chart without a data series can't be written.
+            worksheet.insert_chart('C2', workbook.add_chart({'type': 'line'}))
+
+            with self.assertRaises(Exception):
+                workbook.close()
+
+            with open(self.filename, 'rb') as fh:
+                self.assertEqual(fh.read(), b'Existing file', options)
+
+            self.assertEqual(os.listdir(self.tmpdir), ['keep.xlsx'])
+
+    def test_output_file_replaced(self):
+        """Test that a complete file replaces an existing file."""
+        os.chmod(self.filename, 0o640)
+
+        workbook = Workbook(self.filename)
+        workbook.add_worksheet().write_number('A1', 1)
+        workbook.close()
+
+        xlsx_file = ZipFile(self.filename)
+        self.assertTrue('xl/worksheets/sheet1.xml' in xlsx_file.namelist())
+        xlsx_file.close()
+
+        self.assertEqual(os.listdir(self.tmpdir), ['keep.xlsx'])
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o640)
+
+    def test_output_file_part_error(self):
+        """Test that an error in a part isn't hidden by closing the file."""
+        unraisable = []
+
+        if hasattr(sys, 'unraisablehook'):
+            unraisablehook = sys.unraisablehook
+            sys.unraisablehook = unraisable.append
+
+        try:
+            for output in (self.filename, BytesIO()):
+                workbook = Workbook(output)
+                worksheet = workbook.add_worksheet()
+
+                # An invalid format raises an error in the worksheet part.
+                worksheet.write('A1', 1, 'notaformat')
+
+                with self.assertRaises(AttributeError):
+                    workbook.close()
+
+                del workbook
+        finally:
+            if hasattr(sys, 'unraisablehook'):
+                sys.unraisablehook = unraisablehook
+
+        self.assertEqual(unraisable, [])
@@ -0,0 +1,129 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+from ...sharedstrings import sqlite3
+
+
+@unittest.skipIf(sqlite3 is None, "sqlite3 is required for the option")
+class TestSharedStringsOnDisk(unittest.TestCase):
+    """
+    Test the 'shared_strings_on_disk' workbook option.
+
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _get_members(self, options):
+        # Create a workbook with repeated strings and return the zip file
+        # members.
+        output = BytesIO()
+        options['tmpdir'] = self.tmpdir
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+
+        for row in range(50):
+            worksheet.write_string(row, 0, 'Status %d' % (row % 7))
+            worksheet.write_number(row, 1, row)
+            worksheet.write_rich_string(row, 2, 'Foo ', bold, 'Bar')
+            worksheet.write_rows(row, 3, [['Country %d' % (row % 3), ' x ']])
+
+        workbook.close()
+
+        # The temporary files should be removed.
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+        # Remove the row spans, which aren't written in constant_memory mode.
+        xlsx_file = ZipFile(output)
+        members = [(name, re.sub(b' spans="[^"]*"', b'', xlsx_file.read(name)))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def test_shared_strings_on_disk(self):
+        """Test that disk shared strings match the default output."""
+        exp = self._get_members({})
+
+        got = self._get_members({'shared_strings_on_disk': True})
+        self.assertEqual(got, exp)
+
+        got = self._get_members({'constant_memory': True,
+                                 'shared_strings_on_disk': True})
+        self.assertEqual(got, exp)
+
+        # Test with a cache that is smaller than the number of strings.
+        got = self._get_members({'constant_memory': True,
+                                 'shared_strings_on_disk': True,
+                                 'shared_strings_cache_size': 2})
+        self.assertEqual(got, exp)
+
+    def test_shared_strings_on_disk_inline(self):
+        """Test that constant_memory uses inline strings by default."""
+        members = dict(self._get_members({'constant_memory': True}))
+
+        self.assertFalse('xl/sharedStrings.xml' in members)
+        self.assertTrue(b'inlineStr' in members['xl/worksheets/sheet1.xml'])
+
+    def test_shared_strings_on_disk_chart(self):
+        """Test chart string data with disk shared strings."""
+        output = BytesIO()
+        workbook = Workbook(output, {'shared_strings_on_disk': True,
+                                     'tmpdir': self.tmpdir})
+        worksheet = workbook.add_worksheet()
+        chart = workbook.add_chart({'type': 'column'})
+
+        worksheet.write_column('A1', ['Foo', 'Bar', 'Baz'])
+        worksheet.write_column('B1', [1, 2, 3])
+        chart.add_series({'categories': '=Sheet1!$A$1:$A$3',
+                          'values': '=Sheet1!$B$1:$B$3'})
+        worksheet.insert_chart('D2', chart)
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        chart_xml = xlsx_file.read('xl/charts/chart1.xml')
+        xlsx_file.close()
+
+        self.assertTrue(b'<c:v>Bar</c:v>' in chart_xml)
+
+    def test_shared_strings_on_disk_lazy(self):
+        """Test that the database is only created for the first string."""
+        output = BytesIO()
+        workbook = Workbook(output, {'shared_strings_on_disk': True,
+                                     'tmpdir': self.tmpdir})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_number('A1', 1)
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+        worksheet.write_string('A2', 'Foo')
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+
+        workbook.close()
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+        # A workbook without strings doesn't need the database.
+        workbook = Workbook(output, {'shared_strings_on_disk': True,
+                                     'tmpdir': self.tmpdir})
+        workbook.add_worksheet().write_number('A1', 1)
+        workbook.close()
+
+        self.assertEqual(workbook.str_table.filename, None)
@@ -0,0 +1,122 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import warnings
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestFinalize(unittest.TestCase):
+    """
+    Test the Worksheet finalize() method.
+
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _get_members(self, options, finalize=True):
+        # Create a workbook with worksheets that are built one at a time and
+        # return the zip file members and the worksheets.
+        output = BytesIO()
+        options['tmpdir'] = self.tmpdir
+        workbook = Workbook(output, options)
+        bold = workbook.add_format({'bold': True})
+        italic = workbook.add_format({'italic': True})
+
+        worksheets = []
+        for name in ('Data', 'Links', 'Summary'):
+            worksheet = workbook.add_worksheet(name)
+            worksheets.append(worksheet)
+
+            chart = workbook.add_chart({'type': 'column'})
+            chart.add_series({'categories': '=%s!$A$1:$A$50' % name,
+                              'values': '=%s!$B$1:$B$50' % name})
+            worksheet.insert_chart('J2', chart)
+
+            for row in range(50):
+                worksheet.write_string(row, 0, 'Item %d' % row, bold)
+                worksheet.write_number(row, 1, row * 2.5)
+                worksheet.write_formula(row, 2, '=B%d*2' % (row + 1),
+                                        italic, row * 5)
+
+            worksheet.add_table('G55:H58', {'data': [[1, 2], [3, 4], [5, 6]]})
+            worksheet.set_row(60, 30, italic)
+            worksheet.write_url('E10', 'http://example.com/' + name)
+            worksheet.write_url('E11', 'http://example.com/number')
+            worksheet.write_number('E11', 11)
+            if finalize:
+                worksheet.finalize()
+
+        workbook.close()
+
+        # Remove the row spans, which aren't written in constant_memory mode.
+        xlsx_file = ZipFile(output)
+        members = [(name, re.sub(b' spans="[^"]*"', b'', xlsx_file.read(name)))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members, worksheets
+
+    def test_finalize(self):
+        """Test that finalized worksheets give the same output."""
+        for options in ({}, {'in_memory': True}, {'memory_budget': '4KB'},
+                        {'constant_memory': True}, {'workers': 2}):
+            exp, _ = self._get_members(dict(options), finalize=False)
+            got, worksheets = self._get_members(dict(options))
+
+            self.assertEqual(got, exp, options)
+            self.assertIn(b"<c:v>Item 1</c:v>",
+                          dict(got)['xl/charts/chart1.xml'])
+
+            for worksheet in worksheets:
+                self.assertEqual(len(worksheet.table), 0)
+
+        # The temp files should be removed.
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_finalize_late_writes(self):
+        """Test that writes after finalize() are ignored."""
+        output = BytesIO()
+        workbook = Workbook(output)
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write(0, 0, 'Foo')
+        worksheet.write_comment('C3', 'A comment')
+        worksheet.finalize()
+        worksheet.finalize()
+
+        self.assertEqual(worksheet.write(1, 0, 'Bar'), -1)
+        self.assertEqual(worksheet.write_row(2, 0, [1, 2]), -1)
+        self.assertEqual(worksheet.get_late_writes(), 2)
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('ignore')
+            self.assertEqual(worksheet.add_table('A5:B6'), -1)
+
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        got = xlsx_file.read('xl/worksheets/sheet1.xml')
+        vml = xlsx_file.read('xl/drawings/vmlDrawing1.vml')
+        xlsx_file.close()
+
+        self.assertIn(b'<dimension ref="A1:C3"/>', got)
+        self.assertIn(b'<row r="1"', got)
+        self.assertNotIn(b'<row r="2"', got)
+        self.assertIn(b'<legacyDrawing r:id="rId1"/>', got)
+        self.assertIn(b'<x:Row>2</x:Row>', vml)
@@ -0,0 +1,124 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import re
+import unittest
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestReorderWindow(unittest.TestCase):
+    """
+    Test the 'reorder_window' workbook option in constant_memory mode.
+
+    """
+
+    def _get_members(self, row_order, options):
+        # Create a workbook with the rows written in the given order and
+        # return the zip file members and the number of late writes.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+
+        for row in row_order:
+            worksheet.write_string(row, 0, 'Row %d' % row)
+            worksheet.write_number(row, 1, row, bold)
+            worksheet.write_rows(row, 2, [[row * 2, 'x']])
+
+            if row % 5 == 0:
+                worksheet.set_row(row, 30)
+
+        workbook.close()
+
+        # Remove the row spans, which aren't written in constant_memory mode.
+        xlsx_file = ZipFile(output)
+        members = [(name, re.sub(b' spans="[^"]*"', b'', xlsx_file.read(name)))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members, worksheet.get_late_writes()
+
+    def test_in_order(self):
+        """Test that in order rows are the same with a reorder window."""
+        exp, late = self._get_members(range(40), {'constant_memory': True})
+        self.assertEqual(late, 0)
+
+        got, late = self._get_members(range(40), {'constant_memory': True,
+                                                  'reorder_window': 8})
+        self.assertEqual(got, exp)
+        self.assertEqual(late, 0)
+
+    def test_out_of_order(self):
+        """Test that rows within the window are written in order."""
+        exp, late = self._get_members(range(40), {'constant_memory': True})
+
+        # Swap neighbouring rows.
+        row_order = []
+        for row in range(0, 40, 2):
+            row_order.extend([row + 1, row])
+
+        got, late = self._get_members(row_order, {'constant_memory': True,
+                                                  'reorder_window': 2})
+        self.assertEqual(got, exp)
+        self.assertEqual(late, 0)
+
+    def test_late_writes(self):
+        """Test that writes outside the window are ignored and counted."""
+        exp, late = self._get_members([0, 1, 2, 3, 10, 11],
+                                      {'constant_memory': True})
+
+        got, late = self._get_members([0, 1, 10, 2, 3, 11],
+                                      {'constant_memory': True,
+                                       'reorder_window': 3})
+        self.assertNotEqual(got, exp)
+
+        # Rows 2 and 3 are outside the window. Each has 3 ignored writes.
+        self.assertEqual(late, 6)
+
+        got, late = self._get_members([0, 1, 10, 2, 3, 11],
+                                      {'constant_memory': True,
+                                       'reorder_window': 9})
+        self.assertEqual(got, exp)
+        self.assertEqual(late, 0)
+
+    def test_without_constant_memory(self):
+        """Test that the option doesn't affect the default mode."""
+        row_order = [3, 0, 19, 7, 1]
+        exp, late = self._get_members(row_order, {})
+
+        got, late = self._get_members(row_order, {'reorder_window': 1})
+        self.assertEqual(got, exp)
+        self.assertEqual(late, 0)
+
+    def test_late_writes_cells_only(self):
+        """Test that only ignored cell writes are counted."""
+        workbook = Workbook(BytesIO(), {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write_number(0, 0, 1)
+        worksheet.write_number(5, 0, 1)
+
+        worksheet.set_row(0, 30)
+        worksheet.write_comment(0, 1, 'Comment')
+        worksheet.data_validation(0, 0, 0, 0, {'validate': 'any'})
+        self.assertEqual(worksheet.get_late_writes(), 0)
+
+        # A merged range in written rows is counted once.
+        worksheet.merge_range(0, 2, 1, 3, 'Merged')
+        self.assertEqual(worksheet.get_late_writes(), 1)
+
+        worksheet.merge_range(6, 2, 7, 3, 'Merged')
+        self.assertEqual(worksheet.get_late_writes(), 1)
+
+        worksheet.write_number(0, 1, 2)
+        worksheet.write_string(1, 0, 'Late')
+        self.assertEqual(worksheet.get_late_writes(), 3)
+
+        workbook.close()
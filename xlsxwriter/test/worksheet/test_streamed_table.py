@@ -0,0 +1,157 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import re
+import unittest
+import warnings
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+from ...sharedstrings import sqlite3
+
+
+class TestStreamedTable(unittest.TestCase):
+    """
+    Test the Worksheet add_table() method in constant_memory mode.
+
+    """
+
+    def _get_members(self, options, first_data_row=3):
+        # Create a workbook with a table that is declared before its data
+        # is written and return the zip file members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        money = workbook.add_format({'num_format': '$#,##0'})
+
+        worksheet.write_string(0, 0, 'Before the table')
+
+        worksheet.add_table('B3:E9', {
+            'total_row': True,
+            'columns': [{'header': 'Product', 'total_string': 'Totals'},
+                        {'header': 'Quarter 1', 'total_function': 'sum',
+                         'format': money},
+                        {'header': 'Quarter 2', 'total_function': 'sum',
+                         'format': money},
+                        {'header': 'Year',
+                         'formula': '=SUM(Table1[@[Quarter 1]:[Quarter 2]])',
+                         'total_function': 'sum',
+                         'format': money}]})
+
+        for row in range(first_data_row, 8):
+            worksheet.write_string(row, 1, 'Item %d' % row)
+            worksheet.write_number(row, 2, row * 1000, money)
+            worksheet.write_number(row, 3, row * 2000, money)
+
+        # A cell after the table.
+        worksheet.write_number(11, 1, 42)
+        workbook.close()
+
+        # Remove the row spans, which aren't written in constant_memory mode.
+        xlsx_file = ZipFile(output)
+        members = [(name, re.sub(b' spans="[^"]*"', b'', xlsx_file.read(name)))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    @unittest.skipIf(sqlite3 is None, "sqlite3 is required for the option")
+    def test_streamed_table(self):
+        """Test a constant_memory table against the default mode."""
+        exp = self._get_members({})
+
+        got = self._get_members({'constant_memory': True,
+                                 'shared_strings_on_disk': True})
+        self.assertEqual(got, exp)
+
+        got = self._get_members({'constant_memory': True,
+                                 'shared_strings_on_disk': True,
+                                 'reorder_window': 3})
+        self.assertEqual(got, exp)
+
+        # Rows without data still get the table formulas.
+        exp = self._get_members({}, first_data_row=6)
+
+        got = self._get_members({'constant_memory': True,
+                                 'shared_strings_on_disk': True},
+                                first_data_row=6)
+        self.assertEqual(got, exp)
+
+    def test_streamed_table_inline_strings(self):
+        """Test the table cells with constant_memory in-line strings."""
+        members = dict(self._get_members({'constant_memory': True}))
+        got = members['xl/worksheets/sheet1.xml']
+
+        self.assertIn(b'<c r="B3" t="inlineStr"><is><t>Product</t></is></c>',
+                      got)
+        self.assertIn(b'<c r="B9" t="inlineStr"><is><t>Totals</t></is></c>',
+                      got)
+        self.assertIn(b'<f>SUBTOTAL(109,[Year])</f>', got)
+        self.assertEqual(got.count(b'<f>SUM(Table1[[#This Row],'), 5)
+        self.assertIn(b'<tableParts count="1">', got)
+        self.assertIn('xl/tables/table1.xml', members)
+
+    def test_streamed_table_rows_written(self):
+        """Test that a table can't start in a row that is written."""
+        output = BytesIO()
+        workbook = Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+
+        worksheet.write(5, 0, 'Foo')
+
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('ignore')
+            got = worksheet.add_table('A1:C4')
+        self.assertEqual(got, -1)
+
+        got = worksheet.add_table('A6:C9')
+        self.assertNotEqual(got, -1)
+
+        workbook.close()
+
+    @unittest.skipIf(sqlite3 is None, "sqlite3 is required for the option")
+    def test_streamed_tables(self):
+        """Test several tables that are added out of row order."""
+
+        def get_members(options):
+            output = BytesIO()
+            workbook = Workbook(output, options)
+            worksheet = workbook.add_worksheet()
+
+            for first_row in (40, 20, 2, 60):
+                worksheet.add_table(first_row, 1, first_row + 9, 3, {
+                    'total_row': True,
+                    'columns': [{'header': 'Item'},
+                                {'header': 'Value',
+                                 'total_function': 'sum'},
+                                {'header': 'Double',
+                                 'formula': '=[@Value]*2',
+                                 'total_function': 'sum'}]})
+
+            for row in range(3, 70, 3):
+                worksheet.write_string(row, 1, 'Item %d' % row)
+                worksheet.write_number(row, 2, row)
+
+            workbook.close()
+
+            xlsx_file = ZipFile(output)
+            members = [(name, re.sub(b' spans="[^"]*"', b'',
+                                     xlsx_file.read(name)))
+                       for name in xlsx_file.namelist()
+                       if name != 'docProps/core.xml']
+            xlsx_file.close()
+
+            return members
+
+        exp = get_members({})
+
+        for reorder_window in (0, 5):
+            got = get_members({'constant_memory': True,
+                               'shared_strings_on_disk': True,
+                               'reorder_window': reorder_window})
+            self.assertEqual(got, exp, reorder_window)
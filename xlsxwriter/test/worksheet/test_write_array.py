@@ -0,0 +1,156 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+import warnings
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+from ... import worksheet as worksheet_module
+from ...worksheet import get_numpy
+
+numpy = get_numpy()
+
+
+@unittest.skipIf(numpy is None, "NumPy is required for write_array()")
+class TestWriteArray(unittest.TestCase):
+    """
+    Test the Worksheet write_array() method against the equivalent
+    write_number() calls.
+
+    """
+
+    def _get_members(self, write_data, options=None):
+        # Create a workbook with the write function and return the zip file
+        # members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+
+        write_data(worksheet, bold)
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _check_array(self, data, options=None):
+        # Check write_array() against write() for each value.
+
+        def write_cells(worksheet, bold):
+            worksheet.write('A1', 'Header')
+            worksheet.write('D3', 'Overwritten')
+            for row, row_data in enumerate(numpy.atleast_2d(data).tolist()):
+                for col, number in enumerate(row_data):
+                    worksheet.write(row + 2, col + 1, number, bold)
+
+        def write_array(worksheet, bold):
+            worksheet.write('A1', 'Header')
+            worksheet.write('D3', 'Overwritten')
+            worksheet.write_array('B3', data, bold)
+
+        exp = self._get_members(write_cells, options)
+        got = self._get_members(write_array, options)
+
+        self.assertEqual(got, exp)
+
+    def test_write_array_2d(self):
+        """Test write_array() with a 2-D array."""
+        data = numpy.array([[1.5, 2, 3.0000000000000004],
+                            [-1e300, 0.1, 123456789012345678]])
+
+        self._check_array(data)
+        self._check_array(data, {'constant_memory': True})
+
+    def test_write_array_1d(self):
+        """Test write_array() with a 1-D integer array."""
+        self._check_array(numpy.arange(10))
+
+    def test_write_array_nan_inf(self):
+        """Test write_array() with NAN/INF values."""
+        data = numpy.array([[1, numpy.nan], [numpy.inf, -numpy.inf]])
+
+        self._check_array(data, {'nan_inf_to_errors': True})
+        self._check_array(data, {'nan_inf_to_errors': True,
+                                 'constant_memory': True})
+
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        self.assertRaises(TypeError, worksheet.write_array, 0, 0, data)
+
+        workbook.close()
+
+    def test_write_array_bounds(self):
+        """Test write_array() with out of bounds data."""
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        self.assertEqual(worksheet.write_array(0, 16383, numpy.ones(2)), -1)
+        self.assertEqual(worksheet.write_array(0, 0, numpy.ones((2, 2, 2))),
+                         -1)
+
+        self.assertEqual(worksheet.dim_rowmin, None)
+
+        workbook.close()
+
+
+class TestWriteArrayFallback(unittest.TestCase):
+    """
+    Test the Worksheet write_array() method without NumPy.
+
+    """
+
+    def setUp(self):
+        self.get_numpy = worksheet_module.get_numpy
+        worksheet_module.get_numpy = lambda: None
+
+    def tearDown(self):
+        worksheet_module.get_numpy = self.get_numpy
+
+    def _get_cells(self, data):
+        # Write the data and return the cell values and the return value.
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        got = worksheet.write_array(1, 1, data)
+        cells = dict(((row_num, col_num), cell.number)
+                     for row_num, row_data in worksheet.table.items()
+                     for col_num, cell in row_data.items())
+
+        workbook.close()
+
+        return got, cells
+
+    def test_write_array_fallback_1d(self):
+        """Test that a flat sequence is written as a single row."""
+        got, cells = self._get_cells([1, 2, 3])
+
+        self.assertEqual(got, 0)
+        self.assertEqual(cells, {(1, 1): 1, (1, 2): 2, (1, 3): 3})
+
+    def test_write_array_fallback_2d(self):
+        """Test that a sequence of rows is written as rows."""
+        got, cells = self._get_cells(([1, 2], (3, 4)))
+
+        self.assertEqual(got, 0)
+        self.assertEqual(cells, {(1, 1): 1, (1, 2): 2,
+                                 (2, 1): 3, (2, 2): 4})
+
+    def test_write_array_fallback_3d(self):
+        """Test that deeper nesting is rejected."""
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('ignore')
+            got, cells = self._get_cells([[[1, 2]], [[3, 4]]])
+
+        self.assertEqual(got, -1)
+        self.assertEqual(cells, {})
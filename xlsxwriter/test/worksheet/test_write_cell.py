@@ -7,8 +7,11 @@
 
 import unittest
 from ...compatibility import StringIO
-from ...compat_collections import namedtuple
+from ...celltable import cell_number_tuple, cell_string_tuple
+from ...celltable import cell_formula_tuple, cell_arformula_tuple
+from ...celltable import cell_blank_tuple, cell_boolean_tuple
 from ...worksheet import Worksheet
+from ...format import Format
 
 
 class TestWriteCell(unittest.TestCase):
@@ -25,8 +28,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_number(self):
         """Test the _write_cell() method for numbers."""
 
-        cell_tuple = namedtuple('Number', 'number, format')
-        cell = cell_tuple(1, None)
+        cell = cell_number_tuple(1, None)
 
         self.worksheet._write_cell(0, 0, cell)
 
@@ -38,8 +40,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_string(self):
         """Test the _write_cell() method for strings."""
 
-        cell_tuple = namedtuple('String', 'string, format')
-        cell = cell_tuple(0, None)
+        cell = cell_string_tuple(0, None)
 
         self.worksheet._write_cell(3, 1, cell)
 
@@ -51,8 +52,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_formula01(self):
         """Test the _write_cell() method for formulas."""
 
-        cell_tuple = namedtuple('Formula', 'formula, format, value')
-        cell = cell_tuple('A3+A5', None, 0)
+        cell = cell_formula_tuple('A3+A5', None, 0)
 
         self.worksheet._write_cell(1, 2, cell)
 
@@ -64,8 +64,7 @@ class TestWriteCell(unittest.TestCase):
     def test_write_cell_formula02(self):
         """Test the _write_cell() method for formulas."""
 
-        cell_tuple = namedtuple('Formula', 'formula, format, value')
-        cell = cell_tuple('A3+A5', None, 7)
+        cell = cell_formula_tuple('A3+A5', None, 7)
 
         self.worksheet._write_cell(1, 2, cell)
 
@@ -73,3 +72,87 @@ class TestWriteCell(unittest.TestCase):
         got = self.fh.getvalue()
 
         self.assertEqual(got, exp)
+
+    def test_write_cell_formula03(self):
+        """Test the _write_cell() method for formulas with string values."""
+
+        cell = cell_formula_tuple('A3&"<"', None, '#N/A')
+
+        self.worksheet._write_cell(1, 2, cell)
+
+        exp = """<c r="C2" t="e"><f>A3&amp;"&lt;"</f><v>#N/A</v></c>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_cell_array_formula(self):
+        """Test the _write_cell() method for array formulas."""
+
+        cell = cell_arformula_tuple('SUM(B1:C1*B2:C2)', None, 0, 'A1')
+
+        self.worksheet._write_cell(0, 0, cell)
+
+        exp = """<c r="A1"><f t="array" ref="A1">SUM(B1:C1*B2:C2)</f><v>0</v></c>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_cell_blank(self):
+        """Test the _write_cell() method for blanks."""
+
+        cell_format = Format({'xf_index': 1})
+        cell = cell_blank_tuple(cell_format)
+
+        self.worksheet._write_cell(0, 0, cell)
+
+        exp = """<c r="A1" s="1"/>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_cell_boolean(self):
+        """Test the _write_cell() method for booleans."""
+
+        cell = cell_boolean_tuple(1, None)
+
+        self.worksheet._write_cell(0, 0, cell)
+
+        exp = """<c r="A1" t="b"><v>1</v></c>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_cell_inline_string(self):
+        """Test the _write_cell() method for constant_memory strings."""
+
+        self.worksheet.constant_memory = True
+        self.worksheet.use_inline_strings = True
+
+        cell = cell_string_tuple(' Foo & Bar', None)
+
+        self.worksheet._write_cell(0, 0, cell)
+
+        exp = """<c r="A1" t="inlineStr"><is><t xml:space="preserve"> Foo &amp; Bar</t></is></c>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_cell_inline_string_cache(self):
+        """Test the _write_cell() method for repeated inline strings."""
+
+        self.worksheet.constant_memory = True
+        self.worksheet.use_inline_strings = True
+        self.worksheet.inline_string_cache_size = 2
+
+        for string in ('a<', 'b\x01', 'a<', 'c '):
+            self.worksheet._write_cell(0, 0, cell_string_tuple(string, None))
+
+        exp = ("""<c r="A1" t="inlineStr"><is><t>a&lt;</t></is></c>"""
+               """<c r="A1" t="inlineStr"><is><t>b_x0001_</t></is></c>"""
+               """<c r="A1" t="inlineStr"><is><t>a&lt;</t></is></c>"""
+               """<c r="A1" t="inlineStr"><is><t xml:space="preserve">"""
+               """c </t></is></c>""")
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+        self.assertEqual(len(self.worksheet.inline_strings), 1)
@@ -0,0 +1,144 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from datetime import date, datetime
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+from ...worksheet import get_numpy
+
+numpy = get_numpy()
+
+
+class TestWriteColumns(unittest.TestCase):
+    """
+    Test the Worksheet write_columns() method against the equivalent
+    write() calls.
+
+    """
+
+    def _get_members(self, write_data, options=None):
+        # Create a workbook with the write function and return the zip file
+        # members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+
+        write_data(worksheet, bold)
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _check_columns(self, columns, options=None, formats=None):
+        # Check write_columns() against write() for each value.
+
+        def write_cells(worksheet, bold):
+            # Write the headers and then the data in row order.
+            cells = []
+            for col, (name, values) in enumerate(columns):
+                worksheet.write(1, col + 1, name)
+                cell_format = None
+                if formats and name in formats:
+                    cell_format = bold
+                for row, value in enumerate(values):
+                    cells.append((row + 2, col + 1, value, cell_format))
+
+            for cell in sorted(cells, key=lambda cell: cell[:2]):
+                worksheet.write(*cell)
+
+        def write_columns(worksheet, bold):
+            cell_formats = None
+            if formats:
+                cell_formats = dict([(name, bold) for name in formats])
+            worksheet.write_columns('B2', columns, formats=cell_formats)
+
+        exp = self._get_members(write_cells, options)
+        got = self._get_members(write_columns, options)
+
+        self.assertEqual(got, exp)
+
+    def test_write_columns(self):
+        """Test write_columns() with typed and mixed columns."""
+        columns = [
+            ('Number', [1, 2.5, None, -3]),
+            ('String', ['Foo', 'Bar', 'Foo']),
+            ('Date', [date(2017, 1, 1), None, datetime(2017, 1, 2, 12)]),
+            ('Boolean', [True, False]),
+            ('Formula', ['=1+1', 'Foo']),
+            ('Url', ['http://www.python.org/', '']),
+            ('Mixed', [1, 'Foo', True, date(2017, 1, 1), None]),
+            ('Empty', [None]),
+        ]
+
+        self._check_columns(columns)
+        self._check_columns(columns, formats=['Number', 'Date', 'Empty'])
+        self._check_columns(columns, {'constant_memory': True})
+        self._check_columns(columns, {'strings_to_numbers': True,
+                                      'strings_to_urls': False})
+
+    def test_write_columns_dict(self):
+        """Test write_columns() with a dict and no headers."""
+        exp = self._get_members(
+            lambda worksheet, bold: worksheet.write_column('A1', [1, 2, 3]))
+
+        got = self._get_members(
+            lambda worksheet, bold: worksheet.write_columns(
+                0, 0, {'Number': [1, 2, 3]}, headers=False))
+
+        self.assertEqual(got, exp)
+
+    @unittest.skipIf(numpy is None, "NumPy is required for dtype columns")
+    def test_write_columns_numpy(self):
+        """Test write_columns() with NumPy array columns."""
+        dates = numpy.array(['2017-01-01', '2017-01-02T06:00'],
+                            dtype='datetime64[ns]')
+
+        columns = [
+            ('Int', numpy.arange(3)),
+            ('Float', numpy.array([1.5, 0.1])),
+            ('Bool', numpy.array([True, False])),
+            ('Date', dates),
+            ('String', numpy.array(['Foo', 'Bar'])),
+        ]
+
+        exp_columns = [(name, values.tolist()) for name, values in columns]
+        exp_columns[3] = ('Date', [datetime(2017, 1, 1),
+                                   datetime(2017, 1, 2, 6)])
+
+        exp = self._get_members(
+            lambda worksheet, bold: worksheet.write_columns('B2',
+                                                            exp_columns))
+        got = self._get_members(
+            lambda worksheet, bold: worksheet.write_columns('B2', columns))
+
+        self.assertEqual(got, exp)
+
+    def test_write_columns_bounds(self):
+        """Test that out of bounds columns aren't partly written."""
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        columns = [('Number', [1, 2])]
+
+        self.assertEqual(worksheet.write_columns(1048574, 0, columns), -1)
+        self.assertEqual(
+            worksheet.write_columns(0, 16383, columns + columns), -1)
+        self.assertEqual(
+            worksheet.write_columns(1048575, 0, [('Number', [1])], False), 0)
+
+        self.assertEqual(worksheet.dim_rowmin, 1048575)
+        self.assertEqual(worksheet.dim_rowmax, 1048575)
+
+        workbook.close()
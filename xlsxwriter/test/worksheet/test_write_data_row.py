@@ -0,0 +1,53 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from ...compatibility import StringIO
+from ...worksheet import Worksheet
+from ...format import Format
+
+
+class TestWriteDataRow(unittest.TestCase):
+    """
+    Test the Worksheet _write_data_row() method.
+
+    """
+
+    def setUp(self):
+        self.fh = StringIO()
+        self.worksheet = Worksheet()
+        self.worksheet._set_filehandle(self.fh)
+
+    def test_write_data_row(self):
+        """Test the _write_data_row() method"""
+
+        self.worksheet.write_number(0, 2, 3)
+        self.worksheet.write_number(0, 0, 1)
+        self.worksheet.write_boolean(0, 1, True)
+
+        self.worksheet._write_data_row(0, '1:3', self.worksheet.table[0])
+
+        exp = """<row r="1" spans="1:3"><c r="A1"><v>1</v></c><c r="B1" t="b"><v>1</v></c><c r="C1"><v>3</v></c></row>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_data_row_with_row_format(self):
+        """Test the _write_data_row() method with a row format"""
+
+        cell_format = Format({'xf_index': 1})
+
+        self.worksheet.set_row(1, 30, cell_format)
+        self.worksheet.write_number(1, 0, 1)
+        self.worksheet.write_number(1, 1, 2, Format({'xf_index': 2}))
+
+        self.worksheet._write_data_row(1, None, self.worksheet.table[1])
+
+        exp = """<row r="2" s="1" customFormat="1" ht="30" customHeight="1"><c r="A2" s="1"><v>1</v></c><c r="B2" s="2"><v>2</v></c></row>"""
+        got = self.fh.getvalue()
+
+        self.assertEqual(got, exp)
@@ -0,0 +1,124 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from decimal import Decimal
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class MyFloat(float):
+    pass
+
+
+class MyType(object):
+    def __init__(self, value):
+        self.value = value
+
+
+class TestWriteHandler(unittest.TestCase):
+    """
+    Test the Worksheet write() type dispatch and add_write_handler().
+
+    """
+
+    def setUp(self):
+        self.workbook = Workbook(BytesIO())
+        self.worksheet = self.workbook.add_worksheet()
+
+    def tearDown(self):
+        self.workbook.close()
+
+    def _get_cell(self, row, col):
+        return self.worksheet.table[row][col]
+
+    def test_write_dispatch(self):
+        """Test write() with the types that it dispatches on."""
+        worksheet = self.worksheet
+
+        worksheet.write(0, 0, True)
+        worksheet.write(0, 1, 1)
+        worksheet.write(0, 2, MyFloat(2.5))
+        worksheet.write(0, 3, Decimal('3.5'))
+        worksheet.write(0, 4, 'Foo')
+        worksheet.write(0, 5, '=A1')
+        worksheet.write(0, 6, '')
+
+        self.assertEqual(self._get_cell(0, 0).boolean, 1)
+        self.assertEqual(self._get_cell(0, 1).number, 1)
+        self.assertEqual(self._get_cell(0, 2).number, 2.5)
+        self.assertEqual(self._get_cell(0, 3).number, 3.5)
+        self.assertEqual(self._get_cell(0, 4).string, 0)
+        self.assertEqual(self._get_cell(0, 5).formula, 'A1')
+        self.assertFalse(6 in self.worksheet.table[0])
+
+        self.assertRaises(TypeError, worksheet.write, 0, 7, MyType(1))
+
+    def test_write_strings_options(self):
+        """Test write() string handling with the worksheet options."""
+        worksheet = self.worksheet
+
+        worksheet.strings_to_formulas = False
+        worksheet.strings_to_numbers = True
+
+        worksheet.write(0, 0, '=A1')
+        worksheet.write(0, 1, '1.5')
+        worksheet.write(0, 2, 'mailto:foo@example.com')
+
+        self.assertEqual(self._get_cell(0, 0).string, 0)
+        self.assertEqual(self._get_cell(0, 1).number, 1.5)
+        self.assertEqual(self._get_cell(0, 2).string, 1)
+        self.assertEqual(worksheet.hyperlinks[0][2]['url'],
+                         'mailto:foo@example.com')
+
+    def test_add_write_handler(self):
+        """Test add_write_handler() with a user defined type."""
+        worksheet = self.worksheet
+
+        def write_my_type(worksheet, row, col, token, cell_format=None):
+            if token.value is None:
+                return None
+
+            return worksheet.write_number(row, col, token.value * 2,
+                                          cell_format)
+
+        worksheet.add_write_handler(MyType, write_my_type)
+
+        self.assertEqual(worksheet.write(0, 0, MyType(2)), 0)
+        self.assertEqual(self._get_cell(0, 0).number, 4)
+
+        # Returning None writes the token as if there was no handler.
+        self.assertRaises(TypeError, worksheet.write, 0, 1, MyType(None))
+
+    def test_add_write_handler_override(self):
+        """Test add_write_handler() after the type has been written."""
+        worksheet = self.worksheet
+
+        worksheet.write(0, 0, 'Foo')
+
+        worksheet.add_write_handler(str, lambda worksheet, row, col, token:
+                                    worksheet.write_number(row, col,
+                                                           len(token)))
+
+        worksheet.write(0, 1, 'Foo')
+
+        self.assertEqual(self._get_cell(0, 0).string, 0)
+        self.assertEqual(self._get_cell(0, 1).number, 3)
+
+    def test_add_write_handler_bulk(self):
+        """Test add_write_handler() with write_rows() and write_columns()."""
+        worksheet = self.worksheet
+
+        worksheet.add_write_handler(float, lambda worksheet, row, col, *args:
+                                    worksheet.write_string(row, col, 'F'))
+
+        worksheet.write_rows(0, 0, [[1.5, 2]])
+        worksheet.write_columns(1, 0, {'Float': [2.5]}, headers=False)
+
+        self.assertEqual(self._get_cell(0, 0).string, 0)
+        self.assertEqual(self._get_cell(0, 1).number, 2)
+        self.assertEqual(self._get_cell(1, 0).string, 0)
@@ -0,0 +1,157 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import unittest
+from datetime import date
+from zipfile import ZipFile
+from ...compatibility import BytesIO
+from ...workbook import Workbook
+
+
+class TestWriteRows(unittest.TestCase):
+    """
+    Test the Worksheet write_rows() method against the equivalent write()
+    calls.
+
+    """
+
+    def _get_members(self, write_data, options=None):
+        # Create a workbook with the write function and return the zip file
+        # members.
+        output = BytesIO()
+        workbook = Workbook(output, options)
+        worksheet = workbook.add_worksheet()
+        bold = workbook.add_format({'bold': True})
+        dates = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+
+        write_data(worksheet, bold, dates)
+        workbook.close()
+
+        xlsx_file = ZipFile(output)
+        members = [(name, xlsx_file.read(name))
+                   for name in xlsx_file.namelist()
+                   if name != 'docProps/core.xml']
+        xlsx_file.close()
+
+        return members
+
+    def _check_rows(self, rows, options=None, formats=None,
+                    column_types=None):
+        # Check write_rows() against write() with per-column formats.
+
+        def write_cells(worksheet, bold, dates):
+            cell_formats = [None, bold, dates, None]
+            for row, row_data in enumerate(rows):
+                for col, token in enumerate(row_data):
+                    cell_format = None
+                    if formats:
+                        cell_format = cell_formats[col]
+                    if column_types and column_types[col] == 'datetime':
+                        worksheet.write_datetime(row + 2, col + 1, token,
+                                                 cell_format)
+                    else:
+                        worksheet.write(row + 2, col + 1, token, cell_format)
+
+        def write_rows(worksheet, bold, dates):
+            cell_formats = None
+            if formats:
+                cell_formats = [None, bold, dates]
+            worksheet.write_rows('B3', rows, cell_formats, column_types)
+
+        exp = self._get_members(write_cells, options)
+        got = self._get_members(write_rows, options)
+
+        self.assertEqual(got, exp)
+
+    def test_write_rows(self):
+        """Test write_rows() with mixed data types."""
+        rows = [
+            [1, 'Foo', 3.5, None],
+            ['=A1+1', None, 'http://www.python.org/', True],
+            [float('inf'), '', 'Foo', 2],
+            [],
+            [None, 'Bar', date(2017, 1, 1)],
+        ]
+
+        self._check_rows(rows, {'nan_inf_to_errors': True})
+        self._check_rows(rows, {'nan_inf_to_errors': True}, formats=True)
+        self._check_rows(rows, {'nan_inf_to_errors': True,
+                                'constant_memory': True}, formats=True)
+        self._check_rows(rows, {'nan_inf_to_errors': True,
+                                'strings_to_numbers': True})
+
+    def test_write_rows_column_types(self):
+        """Test write_rows() with column types."""
+        rows = [
+            [1, 'Foo', date(2017, 1, 1), True],
+            [2.5, '=Bar', date(2017, 2, 1), False],
+            [None, 'x' * 40000, None, None],
+        ]
+        column_types = ['number', 'string', 'datetime', 'boolean']
+
+        exp = self._get_members(
+            lambda worksheet, bold, dates: [
+                worksheet.write_number('B3', 1),
+                worksheet.write_string('C3', 'Foo', bold),
+                worksheet.write_datetime('D3', date(2017, 1, 1), dates),
+                worksheet.write_boolean('E3', True),
+                worksheet.write_number('B4', 2.5),
+                worksheet.write_string('C4', '=Bar', bold),
+                worksheet.write_datetime('D4', date(2017, 2, 1), dates),
+                worksheet.write_boolean('E4', False),
+                worksheet.write_string('C5', 'x' * 40000, bold),
+                worksheet.write_blank('D5', None, dates)])
+
+        got = self._get_members(
+            lambda worksheet, bold, dates: worksheet.write_rows(
+                2, 1, rows, [None, bold, dates], column_types))
+
+        self.assertEqual(got, exp)
+
+    def test_write_rows_mistyped_column_types(self):
+        """Test that values that don't match the column type use write()."""
+        rows = [
+            [1, 'x', 'Foo', date(2017, 1, 1)],
+            ['y', 2, True, 1],
+            [True, None, 3.5, None],
+        ]
+
+        self._check_rows(rows, column_types=['number', 'number',
+                                             'boolean', 'formula'])
+        self._check_rows(rows, column_types=['string', 'boolean',
+                                             'string', 'string'])
+
+    def test_write_rows_bounds(self):
+        """Test write_rows() with out of bounds data."""
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        self.assertEqual(worksheet.write_rows(-1, 0, [[1]]), -1)
+        self.assertEqual(worksheet.write_rows(0, 16383, [[1, 2]]), -1)
+        self.assertEqual(worksheet.write_rows(1048575, 0, [[1], [2]]), -1)
+        self.assertEqual(worksheet.write_rows(0, 0, [[1]], None, ['int']),
+                         -1)
+
+        # A list of rows isn't partly written when a row is out of range.
+        self.assertIsNone(worksheet.dim_rowmin)
+        self.assertEqual(len(worksheet.table), 0)
+
+        workbook.close()
+
+    def test_write_rows_bounds_iterator(self):
+        """Test write_rows() with out of bounds rows from an iterator."""
+        workbook = Workbook(BytesIO())
+        worksheet = workbook.add_worksheet()
+
+        rows = iter([[1], [2]])
+        self.assertEqual(worksheet.write_rows(1048575, 0, rows), -1)
+
+        # Rows from an iterator are checked as they are written.
+        self.assertEqual(worksheet.dim_rowmin, 1048575)
+        self.assertEqual(worksheet.dim_rowmax, 1048575)
+
+        workbook.close()
@@ -0,0 +1,71 @@
+###############################################################################
+# _*_ coding: utf-8
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+from __future__ import unicode_literals
+import unittest
+from ...compatibility import BytesIO
+from ...xmlwriter import XMLwriter
+from ...xmlwriter import BufferedStreamWriter
+
+
+class TestBufferedStreamWriter(unittest.TestCase):
+    """
+    Test the BufferedStreamWriter class.
+
+    """
+
+    def setUp(self):
+        self.stream = BytesIO()
+
+    def test_buffered_write(self):
+        """Test that writes are buffered until the buffer is full"""
+
+        writer = BufferedStreamWriter(self.stream, buffer_size=8,
+                                      close_stream=False)
+
+        writer.write('<foo>')
+        self.assertEqual(self.stream.getvalue(), b'')
+
+        writer.write('</foo>')
+        self.assertEqual(self.stream.getvalue(), b'<foo></foo>')
+
+    def test_utf8_encoding(self):
+        """Test that the buffered data is utf-8 encoded on close"""
+
+        writer = BufferedStreamWriter(self.stream, close_stream=False)
+
+        writer.write('<t>é</t>')
+        writer.close()
+
+        exp = '<t>é</t>'.encode('utf-8')
+        got = self.stream.getvalue()
+
+        self.assertEqual(got, exp)
+
+    def test_write_bytes(self):
+        """Test that encoded bytes are written after the buffered data"""
+
+        writer = BufferedStreamWriter(self.stream, close_stream=False)
+
+        writer.write('<a>')
+        writer.write_bytes(b'<b/>')
+        writer.write('</a>')
+        writer.close()
+
+        self.assertEqual(self.stream.getvalue(), b'<a><b/></a>')
+
+    def test_xml_writer(self):
+        """Test an XMLwriter with a buffered stream writer"""
+
+        writer = XMLwriter()
+        writer._set_xml_writer(BufferedStreamWriter(self.stream,
+                                                    close_stream=False))
+
+        writer._xml_empty_tag('foo', [('span', '8')])
+        writer._xml_close()
+
+        self.assertEqual(self.stream.getvalue(), b'<foo span="8"/>')
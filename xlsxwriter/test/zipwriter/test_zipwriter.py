@@ -0,0 +1,171 @@
+###############################################################################
+#
+# Tests for XlsxWriter.
+#
+# Copyright (c), 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+import sys
+import unittest
+from zlib import crc32
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED
+from ...compatibility import BytesIO
+from ...zipwriter import ZipWriter, ThreadPoolExecutor, DEFLATE_BLOCK_SIZE
+from ...zipwriter import PartCache, write_zip_member
+from ... import zipwriter as zipwriter_module
+
+
+class TestZipWriter(unittest.TestCase):
+    """
+    Test the ZipWriter class.
+
+    """
+
+    def setUp(self):
+        self.output = BytesIO()
+        self.zipwriter = ZipWriter(self.output)
+
+    def _read_members(self):
+        # Read back the members of the zip file and check their CRCs.
+        xlsx_file = ZipFile(self.output)
+        self.assertIsNone(xlsx_file.testzip())
+
+        members = [(info.filename, info.compress_type,
+                    xlsx_file.read(info.filename))
+                   for info in xlsx_file.infolist()]
+        xlsx_file.close()
+
+        return members
+
+    def test_writestr(self):
+        """Test writing deflated and stored members."""
+        self.zipwriter.writestr('[Content_Types].xml', b'<Types/>')
+        self.zipwriter.writestr('xl/media/image1.png', b'\x89PNG',
+                                compress_type=ZIP_STORED)
+        self.zipwriter.writestr('xl/empty.xml', b'')
+        self.zipwriter.close()
+
+        exp = [('[Content_Types].xml', ZIP_DEFLATED, b'<Types/>'),
+               ('xl/media/image1.png', ZIP_STORED, b'\x89PNG'),
+               ('xl/empty.xml', ZIP_DEFLATED, b'')]
+        got = self._read_members()
+
+        self.assertEqual(got, exp)
+
+    @unittest.skipIf(ThreadPoolExecutor is None,
+                     'concurrent.futures is not available')
+    def test_write_parallel(self):
+        """Test deflating members split into blocks in parallel."""
+        rows = [b'<row r="%d"><c><v>%d</v></c></row>' % (i, i * i)
+                for i in range(100000)]
+        sheet = b''.join(rows)
+
+        self.assertGreater(len(sheet), 2 * DEFLATE_BLOCK_SIZE)
+
+        members = [('xl/workbook.xml', b'<workbook/>', ZIP_DEFLATED, None),
+                   ('xl/worksheets/sheet1.xml', sheet, ZIP_DEFLATED, 1),
+                   ('xl/media/image1.png', b'\x89PNG', ZIP_STORED, None),
+                   ('xl/empty.xml', b'', ZIP_DEFLATED, 9)]
+
+        self.zipwriter.write_parallel(members, 4, ['xl/workbook.xml'])
+        self.zipwriter.close()
+
+        exp = [(name, compress_type, data)
+               for name, data, compress_type, _ in members]
+        got = self._read_members()
+
+        self.assertEqual(got, exp)
+
+    def test_part_cache(self):
+        """Test that identical parts are only compressed once."""
+        cache = PartCache(max_size=2)
+
+        got = cache.get(b'<theme/>')
+        self.assertIs(cache.get(b'<theme/>'), got)
+        self.assertIsNot(cache.get(b'<theme/>', ZIP_DEFLATED, 9), got)
+        self.assertEqual(cache.get(b'<theme/>', ZIP_STORED)[0], b'<theme/>')
+
+        # The cache is cleared when it is full.
+        self.assertEqual(len(cache.parts), 1)
+
+    def test_part_cache_keys(self):
+        """Test that the part cache doesn't keep the uncompressed parts."""
+        cache = PartCache(max_part_size=100)
+        data = b'<styles/>' * 10
+
+        compressed, crc = cache.get(data)
+
+        for key in cache.parts:
+            self.assertNotIn(data, key)
+
+        # Parts larger than the size limit aren't stored.
+        self.assertEqual(cache.get(data * 2)[1], crc32(data * 2))
+        self.assertEqual(len(cache.parts), 1)
+
+    @unittest.skipIf(sys.version_info < (3, 6, 0),
+                     'ZipFile streaming requires Python 3.6')
+    def test_write_zip_member(self):
+        """Test adding cached parts to a standard library ZipFile."""
+        xlsx_file = ZipFile(self.output, 'w', compression=ZIP_DEFLATED)
+
+        with xlsx_file.open('xl/workbook.xml', 'w') as member:
+            member.write(b'<workbook/>')
+
+        for name in ('xl/theme/theme1.xml', 'xl/styles.xml'):
+            data = name.encode('ascii') * 100
+            write_zip_member(xlsx_file, name, data)
+
+        xlsx_file.writestr('docProps/core.xml', b'<core/>')
+        xlsx_file.close()
+
+        exp = [('xl/workbook.xml', ZIP_DEFLATED, b'<workbook/>'),
+               ('xl/theme/theme1.xml', ZIP_DEFLATED,
+                b'xl/theme/theme1.xml' * 100),
+               ('xl/styles.xml', ZIP_DEFLATED, b'xl/styles.xml' * 100),
+               ('docProps/core.xml', ZIP_DEFLATED, b'<core/>')]
+        got = self._read_members()
+
+        self.assertEqual(got, exp)
+
+    @unittest.skipIf(sys.version_info < (3, 6, 0),
+                     'ZipFile streaming requires Python 3.6')
+    def test_write_zip_member_writing(self):
+        """Test that cached parts aren't added while a member is open."""
+        xlsx_file = ZipFile(self.output, 'w', compression=ZIP_DEFLATED)
+
+        with xlsx_file.open('xl/workbook.xml', 'w') as member:
+            member.write(b'<workbook/>')
+
+            with self.assertRaises(ValueError):
+                write_zip_member(xlsx_file, 'xl/theme/theme1.xml',
+                                 b'<theme/>')
+
+        xlsx_file.close()
+
+        with self.assertRaises(ValueError):
+            write_zip_member(xlsx_file, 'xl/theme/theme1.xml', b'<theme/>')
+
+        self.assertEqual([name for name, _, _ in self._read_members()],
+                         ['xl/workbook.xml'])
+
+    @unittest.skipIf(sys.version_info < (3, 6, 0),
+                     'ZipFile streaming requires Python 3.6')
+    def test_write_zip_member_fallback(self):
+        """Test adding parts without the ZipFile internals."""
+        supported = zipwriter_module.ZIP_INTERNALS_SUPPORTED
+        zipwriter_module.ZIP_INTERNALS_SUPPORTED = False
+
+        try:
+            xlsx_file = ZipFile(self.output, 'w', compression=ZIP_DEFLATED)
+            write_zip_member(xlsx_file, 'xl/theme/theme1.xml', b'<theme/>')
+            write_zip_member(xlsx_file, 'xl/media/image1.png', b'\x89PNG',
+                             ZIP_STORED)
+            xlsx_file.close()
+        finally:
+            zipwriter_module.ZIP_INTERNALS_SUPPORTED = supported
+
+        exp = [('xl/theme/theme1.xml', ZIP_DEFLATED, b'<theme/>'),
+               ('xl/media/image1.png', ZIP_STORED, b'\x89PNG')]
+        got = self._read_members()
+
+        self.assertEqual(got, exp)
@@ -6,12 +6,14 @@
 #
 
 # Standard packages.
-import codecs
 import sys
 
 # Standard packages in Python 2/3 compatibility mode.
 from .compatibility import StringIO
 
+# Package imports.
+from .xmlwriter import BufferedStreamWriter
+
 
 class Theme(object):
     """
@@ -52,9 +54,12 @@ class Theme(object):
         if isinstance(filename, StringIO):
             self.internal_fh = False
             self.fh = filename
+        elif isinstance(filename, BufferedStreamWriter):
+            self.internal_fh = True
+            self.fh = filename
         else:
             self.internal_fh = True
-            self.fh = codecs.open(filename, 'w', 'utf-8')
+            self.fh = BufferedStreamWriter(open(filename, 'wb'))
 
     ###########################################################################
     #
@@ -11,6 +11,17 @@ from warnings import warn
 COL_NAMES = {}
 range_parts = re.compile(r'(\$?)([A-Z]{1,3})(\$?)(\d+)')
 
+# The day ordinals of the Excel epochs and of 1900-01-01.
+EPOCH_1900_ORDINAL = datetime.date(1899, 12, 31).toordinal()
+EPOCH_1904_ORDINAL = datetime.date(1904, 1, 1).toordinal()
+DAY_1900_ORDINAL = datetime.date(1900, 1, 1).toordinal()
+
+# Caches of the serial numbers of dates, for each epoch. The caches are
+# bounded and are cleared when they are full.
+DATE_SERIALS_CACHE_SIZE = 4096
+DATE_SERIALS_1900 = {}
+DATE_SERIALS_1904 = {}
+
 
 def xl_rowcol_to_cell(row, col, row_abs=False, col_abs=False):
     """
@@ -626,6 +637,106 @@ def remove_datetime_timezone(dt_obj, remove_timezone):
 
 
 def datetime_to_excel_datetime(dt_obj, date_1904, remove_timezone):
+    # Convert a datetime object to an Excel serial date and time. The integer
+    # part of the number stores the number of days since the epoch and the
+    # fractional part stores the percentage of the day.
+    return datetimes_to_excel_serials((dt_obj,), date_1904, remove_timezone)[0]
+
+
+def datetimes_to_excel_serials(seq, date_1904=False, remove_timezone=False):
+    """
+    Convert a sequence of datetime objects to Excel serial dates and times.
+
+    Args:
+       seq:             A sequence of datetime.datetime, datetime.date,
+                        datetime.time or datetime.timedelta objects, or
+                        None.
+       date_1904:       Use the Excel for Mac 1904 epoch. Bool.
+       remove_timezone: Remove the timezone from datetimes and times
+                        instead of raising a TypeError. Bool.
+
+    Returns:
+        A list of Excel serial dates, as floats. None values are returned
+        as None.
+
+    """
+    # The conversion uses the day ordinals of the epochs and the time fields
+    # directly instead of creating datetime and timedelta objects.
+    if date_1904:
+        epoch = EPOCH_1904_ORDINAL
+        date_serials = DATE_SERIALS_1904
+    else:
+        epoch = EPOCH_1900_ORDINAL
+        date_serials = DATE_SERIALS_1900
+
+    serials = []
+    append = serials.append
+
+    for dt_obj in seq:
+        dt_type = type(dt_obj)
+
+        if dt_type is datetime.date:
+            # Dates are repeated in most data so their serials are cached.
+            excel_time = date_serials.get(dt_obj)
+
+            if excel_time is None:
+                excel_time = float(dt_obj.toordinal() - epoch)
+
+                # Account for Excel erroneously treating 1900 as a leap year.
+                if not date_1904 and excel_time > 59:
+                    excel_time += 1
+
+                if len(date_serials) >= DATE_SERIALS_CACHE_SIZE:
+                    date_serials.clear()
+
+                date_serials[dt_obj] = excel_time
+
+        elif dt_type is datetime.datetime:
+            if dt_obj.tzinfo is not None and not remove_timezone:
+                remove_datetime_timezone(dt_obj, remove_timezone)
+
+            days = dt_obj.toordinal()
+            seconds = (dt_obj.hour * 3600 + dt_obj.minute * 60
+                       + dt_obj.second)
+
+            excel_time = (days - epoch
+                          + (float(seconds)
+                             + float(dt_obj.microsecond) / 1E6)
+                          / (60 * 60 * 24))
+
+            # A datetime on 1900-01-01 is treated as a time only value, see
+            # _datetime_to_excel_datetime().
+            if days == DAY_1900_ORDINAL:
+                excel_time -= 1
+
+            if not date_1904 and excel_time > 59:
+                excel_time += 1
+
+        elif dt_type is datetime.time:
+            if dt_obj.tzinfo is not None and not remove_timezone:
+                remove_datetime_timezone(dt_obj, remove_timezone)
+
+            seconds = (dt_obj.hour * 3600 + dt_obj.minute * 60
+                       + dt_obj.second)
+
+            excel_time = (0 + (float(seconds)
+                               + float(dt_obj.microsecond) / 1E6)
+                          / (60 * 60 * 24))
+
+        elif dt_obj is None:
+            excel_time = None
+
+        else:
+            # Timedeltas and subclasses of the datetime types.
+            excel_time = _datetime_to_excel_datetime(dt_obj, date_1904,
+                                                     remove_timezone)
+
+        append(excel_time)
+
+    return serials
+
+
+def _datetime_to_excel_datetime(dt_obj, date_1904, remove_timezone):
     # Convert a datetime object to an Excel serial date and time. The integer
     # part of the number stores the number of days since the epoch and the
     # fractional part stores the percentage of the day.
@@ -8,23 +8,40 @@
 # Standard packages.
 import sys
 import re
+import copy
 import os
 import operator
+import shutil
+import threading
 import warnings
 from warnings import warn
 from datetime import datetime
 from zipfile import ZipFile, ZIP_DEFLATED
 from struct import unpack
 
+try:
+    # For Python 3.5+.
+    import asyncio
+    StopAsyncIteration
+except (ImportError, NameError):
+    asyncio = None
+
 from .compatibility import int_types, num_types, str_types, force_unicode
+from .compatibility import Queue, Empty
 
 # Package imports.
 from . import xmlwriter
 from .worksheet import Worksheet
 from .chartsheet import Chartsheet
 from .sharedstrings import SharedStringTable
+from .sharedstrings import DiskSharedStringTable
+from .sharedstrings import DEFAULT_STRING_CACHE_SIZE
+from .sharedstrings import sqlite3
 from .format import Format
-from .packager import Packager
+from .packager import Packager, CACHED_PARTS
+from .xmlwriter import DEFAULT_BUFFER_SIZE
+from .zipwriter import ZipWriter, ThreadPoolExecutor
+
 from .utility import xl_cell_to_rowcol
 from .chart_area import ChartArea
 from .chart_bar import ChartBar
@@ -36,6 +53,9 @@ from .chart_radar import ChartRadar
 from .chart_scatter import ChartScatter
 from .chart_stock import ChartStock
 
+# ZipFile can write members directly with ZipFile.open() in Python 3.6+.
+ZIP_STREAMING = sys.version_info >= (3, 6, 0)
+
 
 class Workbook(xmlwriter.XMLwriter):
     """
@@ -63,6 +83,7 @@ class Workbook(xmlwriter.XMLwriter):
         super(Workbook, self).__init__()
 
         self.filename = filename
+        self.options = dict(options)
 
         self.tmpdir = options.get('tmpdir', None)
         self.date_1904 = options.get('date_1904', False)
@@ -72,11 +93,24 @@ class Workbook(xmlwriter.XMLwriter):
         self.nan_inf_to_errors = options.get('nan_inf_to_errors', False)
         self.default_date_format = options.get('default_date_format', None)
         self.constant_memory = options.get('constant_memory', False)
+        self.reorder_window = options.get('reorder_window', 0)
+        self.memory_budget = options.get('memory_budget', None)
         self.in_memory = options.get('in_memory', False)
+        self.buffer_size = options.get('buffer_size', DEFAULT_BUFFER_SIZE)
+        self.workers = options.get('workers', 1)
+        self.compression_workers = options.get('compression_workers', 1)
+        self.compression_level = options.get('compression_level', None)
+        self.compression_levels = options.get('compression_levels', {})
         self.excel2003_style = options.get('excel2003_style', False)
         self.remove_timezone = options.get('remove_timezone', False)
+        self.shared_strings_on_disk = options.get('shared_strings_on_disk',
+                                                  False)
+        self.shared_strings_cache_size = \
+            options.get('shared_strings_cache_size',
+                        DEFAULT_STRING_CACHE_SIZE)
         self.default_format_properties = \
             options.get('default_format_properties', {})
+        self.intern_formats = options.get('intern_formats', False)
 
         self.worksheet_meta = WorksheetMeta()
         self.selected = 0
@@ -89,6 +123,7 @@ class Workbook(xmlwriter.XMLwriter):
         self.chartname_count = 0
         self.worksheets_objs = []
         self.charts = []
+        self.chart_ranges = []
         self.drawings = []
         self.sheetnames = {}
         self.formats = []
@@ -96,6 +131,7 @@ class Workbook(xmlwriter.XMLwriter):
         self.xf_format_indices = {}
         self.dxf_formats = []
         self.dxf_format_indices = {}
+        self.interned_formats = {}
         self.palette = []
         self.font_count = 0
         self.num_format_count = 0
@@ -125,10 +161,30 @@ class Workbook(xmlwriter.XMLwriter):
         self.calc_on_load = True
         self.allow_zip64 = False
         self.calc_id = 124519
+        self.template = None
+        self.is_template = False
+        self.template_styles = None
+        self.template_styles_xml = None
+        self.styles_template = None
+        self.dxf_format_copies = {}
 
         # We can't do 'constant_memory' mode while doing 'in_memory' mode.
         if self.in_memory:
             self.constant_memory = False
+            self.shared_strings_on_disk = False
+            self.memory_budget = None
+
+        if self.memory_budget:
+            self.memory_budget = self._get_memory_budget(self.memory_budget)
+
+        if self.shared_strings_on_disk and sqlite3 is None:
+            warn("The 'shared_strings_on_disk' option requires the sqlite3 "
+                 "module. Strings will be stored in memory.")
+            self.shared_strings_on_disk = False
+
+        if self.shared_strings_on_disk:
+            self.str_table = DiskSharedStringTable(
+                self.tmpdir, self.shared_strings_cache_size)
 
         # Add the default cell format.
         if self.excel2003_style:
@@ -145,6 +201,9 @@ class Workbook(xmlwriter.XMLwriter):
             self.default_date_format = \
                 self.add_format({'num_format': self.default_date_format})
 
+        # The default formats aren't returned for user formats.
+        self.interned_formats.clear()
+
     def __del__(self):
         """Close file in destructor if it hasn't been closed explicitly."""
         try:
@@ -214,15 +273,63 @@ class Workbook(xmlwriter.XMLwriter):
         if properties:
             format_properties.update(properties)
 
+        # Return an existing format with the same properties, if it hasn't
+        # been changed since it was added.
+        intern_key = None
+        if self.intern_formats:
+            try:
+                intern_key = tuple(sorted(format_properties.items()))
+                xf_format = self.interned_formats.get(intern_key)
+            except TypeError:
+                # The properties contain unhashable values.
+                intern_key = None
+                xf_format = None
+
+            if xf_format is not None and xf_format.intern_key == intern_key:
+                return xf_format
+
         xf_format = Format(format_properties,
                            self.xf_format_indices,
                            self.dxf_format_indices)
 
+        if intern_key is not None:
+            xf_format.intern_key = intern_key
+            self.interned_formats[intern_key] = xf_format
+
         # Store the format reference.
         self.formats.append(xf_format)
 
         return xf_format
 
+    def instantiate(self, filename=None, options=None):
+        """
+        Create a new workbook that uses this workbook as a template. The new
+        workbook shares the formats and the prepared style table of the
+        template and copies its workbook properties and defined names.
+
+        Args:
+            filename: The filename of the new workbook.
+            options:  Optional workbook options that override the template
+                      options.
+
+        Returns:
+            Reference to a Workbook object.
+
+        """
+        if (self.template_styles is None
+                or self.template_styles[0] != len(self.formats)
+                or self.template_styles[1] != len(self.dxf_format_indices)):
+            self._prepare_template()
+
+        workbook_options = dict(self.options)
+        if options:
+            workbook_options.update(options)
+
+        workbook = self.__class__(filename, workbook_options)
+        workbook._set_template(self)
+
+        return workbook
+
     def add_chart(self, options):
         """
         Create a chart object.
@@ -271,6 +378,10 @@ class Workbook(xmlwriter.XMLwriter):
         chart.date_1904 = self.date_1904
         chart.remove_timezone = self.remove_timezone
 
+        # Register the chart ranges so that their data can be kept for
+        # worksheets in constant_memory mode or that are finalized.
+        chart.range_capture = self._add_chart_range_capture
+
         self.charts.append(chart)
 
         return chart
@@ -306,9 +417,74 @@ class Workbook(xmlwriter.XMLwriter):
             Nothing.
 
         """
+        if self.is_template and self.filename is not None:
+            warn("A workbook that is used as a template by instantiate() "
+                 "isn't written to its filename")
+
         if not self.fileclosed:
             self.fileclosed = 1
-            self._store_workbook()
+            try:
+                self._store_workbook()
+            finally:
+                self._remove_temp_files()
+
+    def close_stream(self, chunk_size=DEFAULT_BUFFER_SIZE):
+        """
+        Close the workbook and return an iterator of the bytes of the XLSX
+        file instead of writing it to the workbook filename.
+
+        Args:
+            chunk_size: The approximate size of the chunks. Default 65536.
+
+        Returns:
+            An iterator of bytes objects.
+
+        """
+        if self.fileclosed:
+            return iter(())
+
+        self.fileclosed = 1
+        stream = ChunkStream(chunk_size)
+        self.filename = stream
+
+        return ChunkIterator(stream, self._stream_workbook,
+                             self._remove_temp_files)
+
+    def close_async(self, executor=None):
+        """
+        Close the workbook and write the XLSX file in an executor so that
+        the asyncio event loop isn't blocked.
+
+        Args:
+            executor: An optional concurrent.futures executor. Defaults to
+                      the event loop's default executor.
+
+        Returns:
+            An awaitable object.
+
+        """
+        self._check_asyncio()
+
+        return ExecutorCall(self.close, executor)
+
+    def close_stream_async(self, chunk_size=DEFAULT_BUFFER_SIZE,
+                           executor=None):
+        """
+        Close the workbook and return an asynchronous iterator of the bytes
+        of the XLSX file.
+
+        Args:
+            chunk_size: The approximate size of the chunks. Default 65536.
+            executor:   An optional concurrent.futures executor. Defaults to
+                        the event loop's default executor.
+
+        Returns:
+            An asynchronous iterator of bytes objects.
+
+        """
+        self._check_asyncio()
+
+        return AsyncChunkIterator(self.close_stream(chunk_size), executor)
 
     def set_size(self, width, height):
         """
@@ -544,7 +720,10 @@ class Workbook(xmlwriter.XMLwriter):
         # Assemble and write the XML file.
 
         # Prepare format object for passing to Style.pm.
-        self._prepare_format_properties()
+        if self.template is not None:
+            self._prepare_template_formats()
+        else:
+            self._prepare_format_properties()
 
         # Write the XML declaration.
         self._xml_declaration()
@@ -576,6 +755,44 @@ class Workbook(xmlwriter.XMLwriter):
         # Close the file.
         self._xml_close()
 
+    def _stream_workbook(self, stream):
+        # Write the workbook to a ChunkStream. This is run in a background
+        # thread while the chunks are read from the stream.
+        try:
+            self._store_workbook()
+            stream.close()
+        except BaseException as error:
+            stream._set_error(error)
+        finally:
+            self._remove_temp_files()
+
+    def _remove_temp_files(self):
+        # Remove the temporary shared strings database and any worksheet
+        # temp files that remain if the workbook isn't written, such as when
+        # a close_stream() iterator is discarded.
+        self.str_table._close()
+
+        for sheet in self.worksheets():
+            sheet._remove_temp_files()
+
+    def _check_asyncio(self):
+        # Check that asyncio is available for the asynchronous close methods.
+        if asyncio is None:
+            raise Exception("The asynchronous close methods require "
+                            "Python 3.5 or later.")
+
+    def _is_seekable(self):
+        # Check if the output file is seekable. Filenames are seekable.
+        fh = self.filename
+
+        if not hasattr(fh, 'write'):
+            return True
+
+        try:
+            return fh.seekable()
+        except AttributeError:
+            return hasattr(fh, 'seek') and hasattr(fh, 'tell')
+
     def _store_workbook(self):
         # Assemble worksheets into a workbook.
         packager = Packager()
@@ -612,26 +829,114 @@ class Workbook(xmlwriter.XMLwriter):
         # Prepare the worksheet tables.
         self._prepare_tables()
 
+        compression_workers = self.compression_workers
+        if compression_workers > 1 and ThreadPoolExecutor is None:
+            warn("The 'compression_workers' option requires the "
+                 "concurrent.futures module. Parts will be compressed "
+                 "serially.")
+            compression_workers = 1
+
+        # Parts that are assembled or compressed in parallel are held in
+        # memory until they are added to the zip file in the package order.
+        parallel = self.workers > 1 or compression_workers > 1
+        in_memory = self.in_memory or parallel
+
+        # Without zip streaming, parts for non-seekable outputs, such as
+        # sockets or pipes, are held in memory and written with ZipWriter.
+        seekable = self._is_seekable()
+        if not seekable:
+            in_memory = True
+
         # Package the workbook.
         packager._add_workbook(self)
         packager._set_tmpdir(self.tmpdir)
-        packager._set_in_memory(self.in_memory)
+        packager._set_in_memory(in_memory)
+        packager._set_buffer_size(self.buffer_size)
+        packager._set_workers(self.workers)
+        packager._set_compression(self.compression_level,
+                                  self.compression_levels)
+
+        if not parallel and ZIP_STREAMING:
+            # Stream the XML parts directly into the zip file. This doesn't
+            # need temp files so it is also used in in_memory mode. ZipFile
+            # writes data descriptors after the members if the output isn't
+            # seekable.
+            if hasattr(self.filename, 'write'):
+                output = self.filename
+                temp_filename = None
+            else:
+                # Write to a temp file that replaces the output file once the
+                # package is complete, so that an error while the parts are
+                # assembled doesn't overwrite an existing file.
+                output, temp_filename = self._open_temp_output()
+
+            xlsx_file = ZipFile(output, "w", compression=ZIP_DEFLATED,
+                                allowZip64=self.allow_zip64)
+
+            packager._set_zip_file(xlsx_file, self.allow_zip64)
+
+            try:
+                try:
+                    packager._create_package()
+                except BaseException:
+                    # Close the member of the part that raised the error so
+                    # that closing the zip file doesn't hide the error.
+                    packager._close_zip_member()
+                    raise
+                finally:
+                    xlsx_file.close()
+
+                    if temp_filename is not None:
+                        output.close()
+            except BaseException:
+                if temp_filename is not None:
+                    os.remove(temp_filename)
+                raise
+
+            if temp_filename is not None:
+                os.replace(temp_filename, self.filename)
+
+            return
+
         xml_files = packager._create_package()
 
-        # Free up the Packager object.
-        packager = None
+        if compression_workers > 1 or not seekable:
+            # Deflate the parts, concurrently if required, and write the
+            # compressed data directly into the zip file.
+            members = []
+            for os_filename, xml_filename, _ in xml_files:
+                compress_type, level = packager._get_compression(xml_filename)
+                members.append((xml_filename, os_filename.getvalue(),
+                                compress_type, level))
+
+            xlsx_file = ZipWriter(self.filename, allow_zip64=self.allow_zip64)
+
+            if compression_workers > 1:
+                xlsx_file.write_parallel(members, compression_workers,
+                                         CACHED_PARTS)
+            else:
+                for member in members:
+                    xlsx_file.writestr(*member,
+                                       cached=member[0] in CACHED_PARTS)
+
+            xlsx_file.close()
+
+            return
 
         xlsx_file = ZipFile(self.filename, "w", compression=ZIP_DEFLATED,
                             allowZip64=self.allow_zip64)
 
         # Add XML sub-files to the Zip file with their Excel filename.
         for os_filename, xml_filename, is_binary in xml_files:
-            if self.in_memory:
-                if is_binary:
-                    xlsx_file.writestr(xml_filename, os_filename.getvalue())
-                else:
-                    xlsx_file.writestr(xml_filename,
-                                       os_filename.getvalue().encode('utf-8'))
+            packager._set_zip_compression(xlsx_file, xml_filename)
+
+            if in_memory and ZIP_STREAMING and xml_filename in CACHED_PARTS:
+                # Add the compressed data from the part cache.
+                packager._write_cached_part(xlsx_file, xml_filename,
+                                            os_filename.getvalue())
+            elif in_memory:
+                # The XML and binary files are both byte streams.
+                xlsx_file.writestr(xml_filename, os_filename.getvalue())
             else:
                 # The files are tempfiles.
                 xlsx_file.write(os_filename, xml_filename)
@@ -639,6 +944,29 @@ class Workbook(xmlwriter.XMLwriter):
 
         xlsx_file.close()
 
+    def _open_temp_output(self):
+        # Open a temp file in the directory of the output file. It is created
+        # with the default permissions of a new file, or with those of the
+        # existing file that it replaces.
+        filename = os.fspath(self.filename)
+        directory, basename = os.path.split(filename)
+
+        while True:
+            temp_filename = os.path.join(directory, '.%s.%s.tmp' % (
+                basename, os.urandom(4).hex()))
+            try:
+                fd = os.open(temp_filename,
+                             os.O_WRONLY | os.O_CREAT | os.O_EXCL |
+                             getattr(os, 'O_BINARY', 0), 0o666)
+                break
+            except FileExistsError:
+                continue
+
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp_filename)
+
+        return os.fdopen(fd, 'wb'), temp_filename
+
     def _add_sheet(self, name, is_chartsheet=None, worksheet_class=None):
         # Utility for shared code in add_worksheet() and add_chartsheet().
 
@@ -671,6 +999,10 @@ class Workbook(xmlwriter.XMLwriter):
             'str_table': self.str_table,
             'worksheet_meta': self.worksheet_meta,
             'constant_memory': self.constant_memory,
+            'in_memory': self.in_memory,
+            'reorder_window': self.reorder_window,
+            'memory_budget': self.memory_budget,
+            'shared_strings_on_disk': self.shared_strings_on_disk,
             'tmpdir': self.tmpdir,
             'date_1904': self.date_1904,
             'strings_to_numbers': self.strings_to_numbers,
@@ -685,6 +1017,14 @@ class Workbook(xmlwriter.XMLwriter):
 
         worksheet._initialize(init_data)
 
+        if self.template is not None:
+            worksheet.dxf_format_copy = self._get_dxf_format_copy
+
+        # Register any chart ranges that refer to the new worksheet.
+        for sheetname, cells in self.chart_ranges:
+            if sheetname == name:
+                worksheet._add_range_capture(*cells)
+
         self.worksheets_objs.append(worksheet)
         self.sheetnames[name] = worksheet
 
@@ -779,6 +1119,124 @@ class Workbook(xmlwriter.XMLwriter):
             index = dxf_format.dxf_index
             self.dxf_formats[index] = dxf_format
 
+    def _prepare_template(self):
+        # Give the template formats an XF index, in creation order, so that
+        # they can be used in the workbooks created from the template. The
+        # style table is then prepared once and stored for those workbooks.
+        # A workbook that is used as a template isn't written.
+        self.fileclosed = 1
+        self.is_template = True
+
+        for xf_format in self.formats:
+            xf_format._get_xf_index()
+            xf_format.template = self
+
+        self._prepare_format_copies(len(self.formats))
+        self.template_styles_xml = None
+
+        self.template_styles = (len(self.formats),
+                                len(self.dxf_format_indices),
+                                self.xf_formats,
+                                self.dxf_formats,
+                                self.font_count,
+                                self.num_format_count,
+                                self.border_count,
+                                self.fill_count)
+
+    def _prepare_template_formats(self):
+        # Workbooks created from a template reuse its prepared style table
+        # unless formats have been added or used as DXF formats.
+        styles = self.template.template_styles
+
+        # Prepare the style table again if a template format has changed.
+        if styles is None:
+            self.template._prepare_template()
+            styles = self.template.template_styles
+
+        if (styles[0] == len(self.formats)
+                and styles[1] == len(self.dxf_format_indices)):
+            (self.xf_formats, self.dxf_formats, self.font_count,
+             self.num_format_count, self.border_count,
+             self.fill_count) = styles[2:]
+
+            # The styles XML of the template is also reused.
+            self.styles_template = self.template
+        else:
+            self._prepare_format_copies(styles[0])
+
+    def _prepare_format_copies(self, count):
+        # Prepare the format properties using copies of the first count
+        # formats. These formats are shared with a template and the
+        # properties, such as the reversed fill colors, can only be set once.
+        formats = self.formats
+        self.formats = ([self._get_format_copy(xf_format)
+                         for xf_format in formats[:count]]
+                        + formats[count:])
+
+        try:
+            self._prepare_format_properties()
+        finally:
+            self.formats = formats
+
+    def _get_format_copy(self, xf_format):
+        # Copy a template format. Changes to the copy don't affect the
+        # template.
+        xf_format = copy.copy(xf_format)
+        xf_format.template = None
+
+        return xf_format
+
+    def _clear_template_styles(self):
+        # Clear the prepared style table of a template when one of its
+        # formats is changed. It is prepared again when it is next used.
+        self.template_styles = None
+        self.template_styles_xml = None
+
+    def _set_template(self, template):
+        # Share the formats, and copy the workbook properties, of a template.
+        self.template = template
+
+        self.formats = list(template.formats)
+        self.xf_format_indices = template.xf_format_indices.copy()
+        self.dxf_format_indices = template.dxf_format_indices.copy()
+        self.interned_formats = template.interned_formats.copy()
+        self.default_url_format = template.default_url_format
+        self.default_date_format = template.default_date_format
+
+        self.defined_names = [list(name) for name in template.defined_names]
+        self.doc_properties = template.doc_properties.copy()
+        self.custom_properties = list(template.custom_properties)
+        self.custom_colors = list(template.custom_colors)
+        self.calc_mode = template.calc_mode
+        self.calc_on_load = template.calc_on_load
+        self.calc_id = template.calc_id
+        self.window_width = template.window_width
+        self.window_height = template.window_height
+        self.tab_ratio = template.tab_ratio
+        self.vba_project = template.vba_project
+        self.vba_is_stream = template.vba_is_stream
+        self.vba_codename = template.vba_codename
+
+    def _get_dxf_format_copy(self, xf_format):
+        # Return a copy of a format that is shared with the template so that
+        # it is given a DXF index in this workbook and not in the template.
+        if xf_format.dxf_format_indices is self.dxf_format_indices:
+            return xf_format
+
+        key = id(xf_format)
+
+        if key not in self.dxf_format_copies:
+            dxf_format = self._get_format_copy(xf_format)
+            dxf_format.xf_index = None
+            dxf_format.dxf_index = None
+            dxf_format.xf_format_indices = self.xf_format_indices
+            dxf_format.dxf_format_indices = self.dxf_format_indices
+
+            self.formats.append(dxf_format)
+            self.dxf_format_copies[key] = dxf_format
+
+        return self.dxf_format_copies[key]
+
     def _set_default_xf_indices(self):
         # Set the default index for each format. Only used for testing.
 
@@ -928,6 +1386,9 @@ class Workbook(xmlwriter.XMLwriter):
                 xf_format.bg_color = 0
                 xf_format.pattern = 1
 
+            # The fill properties may have changed so clear the cached keys.
+            xf_format._clear_keys()
+
             key = xf_format._get_fill_key()
 
             if key in fills:
@@ -1459,6 +1920,39 @@ class Workbook(xmlwriter.XMLwriter):
                 # Store range data locally to avoid lookup if seen again.
                 seen_ranges[c_range] = data
 
+    def _get_memory_budget(self, memory_budget):
+        # Convert a memory budget such as 512MB, or a number of bytes, to a
+        # number of bytes.
+        if isinstance(memory_budget, num_types):
+            return int(memory_budget)
+
+        match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*$',
+                         str(memory_budget), re.IGNORECASE)
+
+        if not match:
+            warn("Invalid 'memory_budget' option '%s' in Workbook()"
+                 % force_unicode(memory_budget))
+            return None
+
+        units = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+        return int(float(match.group(1)) * units[match.group(2).upper()])
+
+    def _add_chart_range_capture(self, c_range):
+        # Register a chart range formula with its worksheet so that the range
+        # data can be kept for the chart cached data as the rows are written
+        # in constant_memory mode or by finalize().
+        (sheetname, cells) = self._get_chart_range(c_range)
+
+        # Skip ranges that we couldn't parse or that are non-contiguous.
+        if sheetname is None or sheetname.startswith('('):
+            return
+
+        self.chart_ranges.append((sheetname, cells))
+
+        if sheetname in self.sheetnames:
+            self.sheetnames[sheetname]._add_range_capture(*cells)
+
     def _get_chart_range(self, c_range):
         # Convert a range formula such as Sheet1!$B$1:$B$5 into a sheet name
         # and cell range such as ( 'Sheet1', 0, 1, 4, 1 ).
@@ -1664,3 +2158,201 @@ class WorksheetMeta(object):
     def __init__(self):
         self.activesheet = 0
         self.firstsheet = 0
+
+
+class ChunkStream(object):
+    """
+    A non-seekable file-like object that passes the bytes written to it, in
+    chunks, to an iterator in another thread. The chunks are passed through
+    a bounded queue so the writer waits for the reader and the memory used
+    doesn't depend on the size of the output.
+
+    """
+
+    def __init__(self, chunk_size=DEFAULT_BUFFER_SIZE, queue_size=8):
+        self.chunk_size = chunk_size
+        self.queue = Queue(queue_size)
+        self.buffer = []
+        self.buffer_size = 0
+        self.cancelled = False
+        self.stopped = False
+
+    def write(self, data):
+        if self.cancelled:
+            # Stop the writer with an error. Any later writes, such as from
+            # the cleanup of the zip file, are discarded.
+            if not self.stopped:
+                self.stopped = True
+                raise IOError("The XLSX output stream was closed by the "
+                              "reader")
+            return len(data)
+
+        data = bytes(data)
+        self.buffer.append(data)
+        self.buffer_size += len(data)
+
+        if self.buffer_size >= self.chunk_size:
+            self._put(b''.join(self.buffer))
+            self.buffer = []
+            self.buffer_size = 0
+
+        return len(data)
+
+    def flush(self):
+        # The data is only passed on in chunks, or when the stream is closed.
+        pass
+
+    def close(self):
+        # Pass on any remaining data and the end of the stream.
+        if self.buffer:
+            self._put(b''.join(self.buffer))
+            self.buffer = []
+            self.buffer_size = 0
+
+        self._put(None)
+
+    def _set_error(self, error):
+        # Pass an error from the writer thread to the reader.
+        self._put(error)
+
+    def _put(self, item):
+        # Add an item to the queue unless the reader has stopped.
+        if not self.cancelled:
+            self.queue.put(item)
+
+    def _get(self):
+        # Get the next chunk, None at the end of the stream or an error.
+        return self.queue.get()
+
+    def _start(self, write_function):
+        # Start a daemon thread to write to the stream.
+        thread = threading.Thread(target=write_function, args=(self,))
+        thread.daemon = True
+        thread.start()
+
+    def _cancel(self):
+        # Stop the writer if the reader stops before the end of the stream.
+        # The queue is emptied so that a waiting writer isn't blocked.
+        self.cancelled = True
+
+        try:
+            while True:
+                self.queue.get_nowait()
+        except Empty:
+            pass
+
+
+class ChunkIterator(object):
+    """
+    An iterator of the chunks written to a ChunkStream by a write function.
+    The function is started in a thread when the first chunk is requested.
+    If the iterator is closed, or discarded, before it is read the function
+    isn't run and the release function is called to free its resources.
+
+    """
+
+    def __init__(self, stream, write_function, release_function):
+        self.stream = stream
+        self.write_function = write_function
+        self.release_function = release_function
+        self.started = False
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.finished:
+            raise StopIteration
+
+        if not self.started:
+            self.started = True
+            self.stream._start(self.write_function)
+
+        chunk = self.stream._get()
+
+        if chunk is None:
+            self.finished = True
+            raise StopIteration
+
+        if isinstance(chunk, BaseException):
+            self.finished = True
+            raise chunk
+
+        return chunk
+
+    # Python 2 iterator protocol.
+    next = __next__
+
+    def close(self):
+        # Stop the writer if the reader stops before the end of the stream,
+        # or release the resources of a writer that wasn't started.
+        if self.finished:
+            return
+
+        self.finished = True
+
+        if self.started:
+            self.stream._cancel()
+        else:
+            self.release_function()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ExecutorCall(object):
+    """
+    An awaitable call of a function in an executor. The function is run in
+    the event loop of the coroutine that awaits the call.
+
+    """
+
+    def __init__(self, function, executor=None):
+        self.function = function
+        self.executor = executor
+
+    def __await__(self):
+        if sys.version_info >= (3, 7, 0):
+            loop = asyncio.get_running_loop()
+        else:
+            loop = asyncio.get_event_loop()
+
+        future = loop.run_in_executor(self.executor, self.function)
+
+        return future.__await__()
+
+
+class AsyncChunkIterator(object):
+    """
+    An asynchronous iterator of the chunks of an XLSX file. The chunks are
+    read from a close_stream() iterator in an executor so that the event
+    loop isn't blocked while the file is created.
+
+    """
+
+    def __init__(self, chunks, executor=None):
+        self.chunks = chunks
+        self.executor = executor
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return ExecutorCall(self._next_chunk, self.executor)
+
+    def aclose(self):
+        # Stop the creation of the file if the iterator isn't read to the
+        # end.
+        return ExecutorCall(self.chunks.close, self.executor)
+
+    def _next_chunk(self):
+        # Get the next chunk, converting the end of the synchronous
+        # iterator to the end of the asynchronous iterator.
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
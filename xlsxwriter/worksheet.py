@@ -6,27 +6,36 @@
 #
 
 # Standard packages.
-import codecs
+import datetime
 import os
 import re
-import sys
 import tempfile
+from bisect import bisect_left, bisect_right
+from heapq import merge
 
+from array import array
 from warnings import warn
 
 # Standard packages in Python 2/3 compatibility mode.
 from .compatibility import StringIO
+from .compatibility import BytesIO
 from .compatibility import defaultdict
-from .compatibility import namedtuple
 from .compatibility import force_unicode
 from .compatibility import num_types, str_types
+from .compatibility import plain_num_types, plain_str_types
 
 # Package imports.
 from . import xmlwriter
+from .celltable import CellTable
+from .celltable import CellRow
+from .celltable import SpillCellTable
+from .celltable import CELL_NUMBER, CELL_STRING, CELL_BLANK, CELL_BOOLEAN
+from .celltable import CELL_FORMULA, CELL_ARRAY_FORMULA
 from .format import Format
 from .drawing import Drawing
 from .shape import Shape
 from .xmlwriter import XMLwriter
+from .xmlwriter import BufferedStreamWriter
 from .utility import xl_rowcol_to_cell
 from .utility import xl_rowcol_to_cell_fast
 from .utility import xl_cell_to_rowcol
@@ -36,6 +45,7 @@ from .utility import xl_color
 from .utility import get_sparkline_style
 from .utility import supported_datetime
 from .utility import datetime_to_excel_datetime
+from .utility import datetimes_to_excel_serials
 from .utility import quote_sheetname
 
 
@@ -126,16 +136,78 @@ def convert_column_args(method):
 
 ###############################################################################
 #
-# Named tuples used for cell types.
+# Templates used to serialize the <c> cell elements in the inner loop. The
+# first two fields are the cell reference and the optional style attribute.
 #
 ###############################################################################
-cell_string_tuple = namedtuple('String', 'string, format')
-cell_number_tuple = namedtuple('Number', 'number, format')
-cell_blank_tuple = namedtuple('Blank', 'format')
-cell_boolean_tuple = namedtuple('Boolean', 'boolean, format')
-cell_formula_tuple = namedtuple('Formula', 'formula, format, value')
-cell_arformula_tuple = namedtuple('ArrayFormula',
-                                  'formula, format, value, range')
+cell_number_template = '<c r="%s"%s><v>%.16g</v></c>'
+cell_string_template = '<c r="%s"%s t="s"><v>%d</v></c>'
+cell_inline_template = '<c r="%s"%s t="inlineStr"><is><t%s>%s</t></is></c>'
+cell_rich_inline_template = '<c r="%s"%s t="inlineStr"><is>%s</is></c>'
+cell_formula_template = '<c r="%s"%s%s><f>%s</f><v>%s</v></c>'
+cell_arformula_template = ('<c r="%s"%s%s><f t="array" ref="%s">%s</f>'
+                           '<v>%s</v></c>')
+cell_blank_template = '<c r="%s"%s/>'
+cell_boolean_template = '<c r="%s"%s t="b"><v>%s</v></c>'
+
+# Excel error codes that can be stored as formula values.
+excel_error_codes = ('#DIV/0!', '#N/A', '#NAME?', '#NULL!',
+                     '#NUM!', '#REF!', '#VALUE!')
+
+# The string prefixes that write() stores as formulas, in group 1, or urls.
+string_prefixes = re.compile('(=)|(?:ftp|http)s?://|mailto:|(?:in|ex)ternal:')
+
+# The column types that can be passed to write_rows().
+column_type_codes = {
+    None: 0,
+    'number': 1,
+    'string': 2,
+    'boolean': 3,
+    'datetime': 4,
+    'formula': 5,
+}
+
+# The type code used by write_columns() for datetimes that have already been
+# converted to Excel serial dates.
+SERIAL_TYPE_CODE = 6
+
+# The datetime types that write() stores with write_datetime().
+datetime_types = (datetime.datetime, datetime.date, datetime.time,
+                  datetime.timedelta)
+
+# The value used to pad short columns in write_columns(). It isn't written.
+missing_cell = object()
+
+# The exact value types that write_columns() can store as a column type.
+column_number_types = set(plain_num_types)
+column_string_types = set(plain_str_types)
+column_datetime_types = set(datetime_types)
+
+# The value types that can be written directly for each column type code.
+# Other values, such as those with a mistyped column type, use write().
+column_code_types = {
+    1: column_number_types,
+    2: column_string_types,
+    3: set([bool]),
+    4: column_datetime_types,
+    5: column_string_types,
+}
+
+# NumPy is optional and is only imported when write_array() is first called.
+numpy_modules = []
+
+
+def get_numpy():
+    # Return the NumPy module, or None if it isn't installed.
+    if not numpy_modules:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        numpy_modules.append(numpy)
+
+    return numpy_modules[0]
 
 
 ###############################################################################
@@ -168,6 +240,9 @@ class Worksheet(xmlwriter.XMLwriter):
         self.str_table = None
         self.palette = None
         self.constant_memory = 0
+        self.reorder_window = 0
+        self.memory_budget = None
+        self.use_inline_strings = False
         self.tmpdir = None
         self.is_chartsheet = False
 
@@ -264,8 +339,33 @@ class Worksheet(xmlwriter.XMLwriter):
         self.default_row_zeroed = 0
 
         self.names = {}
-        self.write_match = []
-        self.table = defaultdict(dict)
+        self.range_captures = {}
+        self.range_capture_rows = []
+        self.range_capture_queue = []
+        self.range_capture_index = 0
+        self.range_capture_row = -1
+        self.active_range_captures = []
+        self.spill_runs_captured = False
+        self.dxf_format_copy = None
+        self.table_cells = []
+        self.table_cell_rows = []
+        self.table_cells_index = 0
+        self.table_cells_row = -1
+        self.active_table_cells = []
+        self.write_handlers = {}
+        self.write_dispatch = {}
+        self.table = CellTable()
+        self.link_rows = {}
+
+        # The methods that get the XML of each cell type, keyed by cell tag.
+        self.cell_xml_writers = {
+            CELL_NUMBER: self._get_number_xml,
+            CELL_STRING: self._get_string_xml,
+            CELL_BLANK: self._get_blank_xml,
+            CELL_BOOLEAN: self._get_boolean_xml,
+            CELL_FORMULA: self._get_formula_xml,
+            CELL_ARRAY_FORMULA: self._get_array_formula_xml,
+        }
         self.merge = []
         self.row_spans = {}
 
@@ -315,6 +415,10 @@ class Worksheet(xmlwriter.XMLwriter):
 
         self.rstring = ''
         self.previous_row = 0
+        self.first_open_row = 0
+        self.late_writes = 0
+        self.finalized = False
+        self.in_memory = False
 
         self.validations = []
         self.cond_formats = {}
@@ -346,6 +450,11 @@ class Worksheet(xmlwriter.XMLwriter):
         self.row_data_fh = None
         self.row_data_fh_closed = False
 
+        # A bounded cache of sanitized inline strings for constant_memory
+        # mode, where repeated strings are common. A size of 0 disables it.
+        self.inline_strings = {}
+        self.inline_string_cache_size = 1000
+
         self.vertical_dpi = 0
         self.horizontal_dpi = 0
 
@@ -370,74 +479,36 @@ class Worksheet(xmlwriter.XMLwriter):
         if not len(args):
             raise TypeError("write() takes at least 4 arguments (3 given)")
 
-        # The first arg should be the token for all write calls.
-        token = args[0]
-
-        # Write None as a blank cell.
-        if token is None:
-            return self.write_blank(row, col, *args)
-
-        # Write boolean types.
-        if isinstance(token, bool):
-            return self.write_boolean(row, col, *args)
-
-        # Write datetime objects.
-        if supported_datetime(token):
-            return self.write_datetime(row, col, *args)
-
-        # Write number types.
-        if isinstance(token, num_types):
-            return self.write_number(row, col, *args)
+        # Get the write method for the type of the token, the first arg.
+        token_type = type(args[0])
+        write_method = self.write_dispatch.get(token_type)
 
-        # Write string types.
-        if isinstance(token, str_types):
-            # Map the data to the appropriate write_*() method.
-            if token == '':
-                return self.write_blank(row, col, *args)
+        if write_method is None:
+            write_method = self._get_write_method(token_type)
+            self.write_dispatch[token_type] = write_method
 
-            elif self.strings_to_formulas and token.startswith('='):
-                return self.write_formula(row, col, *args)
+        return write_method(row, col, *args)
 
-            elif self.strings_to_urls and re.match('(ftp|http)s?://', token):
-                return self.write_url(row, col, *args)
-
-            elif self.strings_to_urls and re.match('mailto:', token):
-                return self.write_url(row, col, *args)
-
-            elif self.strings_to_urls and re.match('(in|ex)ternal:', token):
-                return self.write_url(row, col, *args)
-
-            elif self.strings_to_numbers:
-                try:
-                    f = float(token)
-                    if (self.nan_inf_to_errors or
-                            (not self._isnan(f) and not self._isinf(f))):
-                        return self.write_number(row, col, f, *args[1:])
-                except ValueError:
-                    # Not a number, write as a string.
-                    pass
+    def add_write_handler(self, user_type, user_function):
+        """
+        Add a callback function to the write() method to handle user
+        defined types.
 
-                return self.write_string(row, col, *args)
+        Args:
+            user_type:     The type() of the data to handle.
+            user_function: A function that is called as
+                           user_function(worksheet, row, col, *args) to
+                           write the data. If it returns None the data is
+                           written as if there was no handler.
 
-            else:
-                # We have a plain string.
-                return self.write_string(row, col, *args)
+        Returns:
+            Nothing.
 
-        # We haven't matched a supported type. Try float.
-        try:
-            f = float(token)
-            return self.write_number(row, col, f, *args[1:])
-        except ValueError:
-            pass
-        except TypeError:
-            raise TypeError("Unsupported type %s in write()" % type(token))
+        """
+        self.write_handlers[user_type] = user_function
 
-        # Finally try string.
-        try:
-            str(token)
-            return self.write_string(row, col, *args)
-        except ValueError:
-            raise TypeError("Unsupported type %s in write()" % type(token))
+        # Clear the cached write method for the type.
+        self.write_dispatch.pop(user_type, None)
 
     @convert_cell_args
     def write_string(self, row, col, string, cell_format=None):
@@ -459,7 +530,7 @@ class Worksheet(xmlwriter.XMLwriter):
         str_error = 0
 
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Check that the string is < 32767 chars.
@@ -468,7 +539,7 @@ class Worksheet(xmlwriter.XMLwriter):
             str_error = -2
 
         # Write a shared string or an in-line string in constant_memory mode.
-        if not self.constant_memory:
+        if not self.use_inline_strings:
             string_index = self.str_table._get_shared_string_index(string)
         else:
             string_index = string
@@ -478,7 +549,7 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(row)
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_string_tuple(string_index, cell_format)
+        self.table[row]._set_cell(col, CELL_STRING, cell_format, string_index)
 
         return str_error
 
@@ -512,7 +583,7 @@ class Worksheet(xmlwriter.XMLwriter):
                     "without 'nan_inf_to_errors' Workbook() option")
 
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Write previous row if in in-line string constant_memory mode.
@@ -520,7 +591,7 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(row)
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_number_tuple(number, cell_format)
+        self.table[row]._set_cell(col, CELL_NUMBER, cell_format, number)
 
         return 0
 
@@ -546,7 +617,7 @@ class Worksheet(xmlwriter.XMLwriter):
             return 0
 
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Write previous row if in in-line string constant_memory mode.
@@ -554,7 +625,7 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(row)
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_blank_tuple(cell_format)
+        self.table[row]._set_cell(col, CELL_BLANK, cell_format)
 
         return 0
 
@@ -576,7 +647,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         """
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Hand off array formulas.
@@ -593,7 +664,8 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(row)
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_formula_tuple(formula, cell_format, value)
+        self.table[row]._set_cell(col, CELL_FORMULA, cell_format,
+                                  data=(formula, value))
 
         return 0
 
@@ -625,7 +697,7 @@ class Worksheet(xmlwriter.XMLwriter):
             first_col, last_col = last_col, first_col
 
         # Check that row and col are valid and store max and min values
-        if self._check_dimensions(last_row, last_col):
+        if self._check_cell_dimensions(last_row, last_col):
             return -1
 
         # Define array range
@@ -648,10 +720,9 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(first_row)
 
         # Store the cell data in the worksheet data table.
-        self.table[first_row][first_col] = cell_arformula_tuple(formula,
-                                                                cell_format,
-                                                                value,
-                                                                cell_range)
+        self.table[first_row]._set_cell(first_col, CELL_ARRAY_FORMULA,
+                                        cell_format,
+                                        data=(formula, value, cell_range))
 
         # Pad out the rest of the area with formatted zeroes.
         if not self.constant_memory:
@@ -679,7 +750,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         """
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Write previous row if in in-line string constant_memory mode.
@@ -694,7 +765,7 @@ class Worksheet(xmlwriter.XMLwriter):
             cell_format = self.default_date_format
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_number_tuple(number, cell_format)
+        self.table[row]._set_cell(col, CELL_NUMBER, cell_format, number)
 
         return 0
 
@@ -715,7 +786,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         """
         # Check that row and col are valid and store max and min values.
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Write previous row if in in-line string constant_memory mode.
@@ -728,7 +799,7 @@ class Worksheet(xmlwriter.XMLwriter):
             value = 0
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_boolean_tuple(value, cell_format)
+        self.table[row]._set_cell(col, CELL_BOOLEAN, cell_format, value)
 
         return 0
 
@@ -787,7 +858,7 @@ class Worksheet(xmlwriter.XMLwriter):
         string = string.replace('mailto:', '')
 
         # Check that row and col are valid and store max and min values
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # Check that the string is < 32767 chars
@@ -883,7 +954,7 @@ class Worksheet(xmlwriter.XMLwriter):
         string_index = 0
 
         # Check that row and col are valid and store max and min values
-        if self._check_dimensions(row, col):
+        if self._check_cell_dimensions(row, col):
             return -1
 
         # If the last arg is a format we use it as the cell format.
@@ -959,7 +1030,7 @@ class Worksheet(xmlwriter.XMLwriter):
             return -2
 
         # Write a shared string or an in-line string in constant_memory mode.
-        if not self.constant_memory:
+        if not self.use_inline_strings:
             string_index = self.str_table._get_shared_string_index(string)
         else:
             string_index = string
@@ -969,7 +1040,7 @@ class Worksheet(xmlwriter.XMLwriter):
             self._write_single_row(row)
 
         # Store the cell data in the worksheet data table.
-        self.table[row][col] = cell_string_tuple(string_index, cell_format)
+        self.table[row]._set_cell(col, CELL_STRING, cell_format, string_index)
 
         return 0
 
@@ -1019,6 +1090,215 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return 0
 
+    @convert_cell_args
+    def write_rows(self, first_row, first_col, rows, formats=None,
+                   column_types=None):
+        """
+        Write a block of rows of data starting from (first_row, first_col).
+
+        Args:
+            first_row:    The first cell row (zero indexed).
+            first_col:    The first cell column (zero indexed).
+            rows:         An iterable of sequences of tokens, one per row.
+            formats:      An optional cell Format object or a list of
+                          Format objects, one for each column.
+            column_types: An optional list of the data type of each column:
+                          'number', 'string', 'boolean', 'datetime',
+                          'formula' or None to get the type from the data.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+            other: Return value of write() method.
+
+        """
+        type_codes = []
+        for column_type in column_types or []:
+            if column_type not in column_type_codes:
+                warn("Unknown column type '%s' in write_rows()"
+                     % column_type)
+                return -1
+
+            type_codes.append(column_type_codes[column_type])
+
+        return self._write_rows_block(first_row, first_col, rows, formats,
+                                      type_codes)
+
+    @convert_cell_args
+    def write_columns(self, first_row, first_col, columns, headers=True,
+                      formats=None):
+        """
+        Write columns of data, such as a dict of column names to lists of
+        values, starting from (first_row, first_col). The data type of each
+        column is determined once from its dtype or its values.
+
+        Args:
+            first_row: The first cell row (zero indexed).
+            first_col: The first cell column (zero indexed).
+            columns:   A dict of column names to sequences of values or a
+                       sequence of (name, values) pairs.
+            headers:   Write the column names in the first row. Default
+                       is True.
+            formats:   An optional cell Format object for the data or a
+                       list, or dict keyed by column name, of Formats.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+            other: Return value of write_rows() method.
+
+        """
+        if hasattr(columns, 'keys'):
+            columns = [(name, columns[name]) for name in columns.keys()]
+
+        names = []
+        column_data = []
+        type_codes = []
+
+        for name, values in columns:
+            values, type_code = self._get_column_data(values)
+            names.append(name)
+            column_data.append(values)
+            type_codes.append(type_code)
+
+        if isinstance(formats, dict):
+            formats = [formats.get(name) for name in names]
+
+        # Check the range of the columns before writing the headers so that
+        # an out of range block isn't partly written.
+        row_count = max([len(values) for values in column_data] or [0])
+        last_row = first_row + row_count - 1
+        last_col = first_col + len(names) - 1
+
+        if headers:
+            last_row += 1
+
+        if last_row >= self.xls_rowmax or last_col >= self.xls_colmax:
+            return -1
+
+        if headers:
+            error = self.write_rows(first_row, first_col, [names])
+            if error:
+                return error
+
+            first_row += 1
+
+        # Pad short columns with missing cells, which need the type of each
+        # value to be checked, and write the columns as rows.
+        for index, values in enumerate(column_data):
+            if len(values) < row_count:
+                padding = [missing_cell] * (row_count - len(values))
+                column_data[index] = values + padding
+                type_codes[index] = 0
+
+        return self._write_rows_block(first_row, first_col,
+                                      zip(*column_data), formats, type_codes)
+
+    @convert_cell_args
+    def write_array(self, first_row, first_col, data, cell_format=None):
+        """
+        Write a 1-D or 2-D NumPy array of numbers starting from
+        (first_row, first_col). A 1-D array is written as a single row.
+
+        Args:
+            first_row:   The first cell row (zero indexed).
+            first_col:   The first cell column (zero indexed).
+            data:        A NumPy array.
+            cell_format: An optional cell Format object.
+        Returns:
+            0:  Success.
+            -1: Row or column is out of worksheet bounds.
+            other: Return value of write_rows() method.
+
+        """
+        numpy = get_numpy()
+
+        if numpy is None:
+            # Without NumPy the data is written as a sequence of rows. A
+            # flat sequence is written as a single row, like a 1-D array.
+            data = list(data)
+
+            if data and not self._is_array_sequence(data[0]):
+                data = [data]
+            else:
+                data = [list(row_data) for row_data in data]
+
+                for row_data in data:
+                    for value in row_data:
+                        if self._is_array_sequence(value):
+                            warn("Array must be 1-D or 2-D in write_array()")
+                            return -1
+
+            return self.write_rows(first_row, first_col, data, cell_format)
+
+        data = numpy.asarray(data)
+
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+
+        if data.ndim != 2:
+            warn("Array must be 1-D or 2-D in write_array()")
+            return -1
+
+        if data.dtype.kind not in 'iuf':
+            # Arrays of other types, such as strings, are written with the
+            # type of each value.
+            return self.write_rows(first_row, first_col, data.tolist(),
+                                   cell_format)
+
+        row_count, col_count = data.shape
+        if not row_count or not col_count:
+            return 0
+
+        last_row = first_row + row_count - 1
+        last_col = first_col + col_count - 1
+
+        if (self._check_dimensions(first_row, first_col, True, True)
+                or self._check_dimensions(last_row, last_col, True, True)):
+            return -1
+
+        if ((self.constant_memory or self.finalized)
+                and first_row < self.first_open_row):
+            self.late_writes += 1
+            return -1
+
+        data = numpy.ascontiguousarray(data, dtype=numpy.float64)
+
+        # Find the NAN/INF values in a single pass over the array.
+        non_finite = ~numpy.isfinite(data)
+        has_non_finite = non_finite.any()
+
+        if has_non_finite and not self.nan_inf_to_errors:
+            raise TypeError("NAN/INF not supported in write_array() "
+                            "without 'nan_inf_to_errors' Workbook() option")
+
+        self._check_dimensions(first_row, first_col, ignore_col=True)
+        self._check_dimensions(last_row, last_col, ignore_col=True)
+        self._check_dimensions(first_row, first_col, ignore_row=True)
+        self._check_dimensions(last_row, last_col, ignore_row=True)
+
+        for index in range(row_count):
+            row = first_row + index
+
+            if self.constant_memory and row > self.previous_row:
+                self._write_single_row(row)
+
+            # Copy the row of doubles into the cell table without
+            # converting each value to a Python float.
+            numbers = array('d')
+            if hasattr(numbers, 'frombytes'):
+                numbers.frombytes(data[index].tobytes())
+            else:
+                numbers.fromstring(data[index].tobytes())
+
+            self.table[row]._set_numbers(first_col, numbers, cell_format)
+
+            # Overwrite any NAN/INF values with the equivalent errors.
+            if has_non_finite:
+                for col in numpy.flatnonzero(non_finite[index]):
+                    self.write_number(row, first_col + int(col),
+                                      data[index, col], cell_format)
+
+        return 0
+
     @convert_cell_args
     def insert_image(self, row, col, filename, options=None):
         """
@@ -1198,6 +1478,47 @@ class Worksheet(xmlwriter.XMLwriter):
         # There is no set_name() method. Name must be set in add_worksheet().
         return self.name
 
+    def get_late_writes(self):
+        """
+        Retrieve the number of writes that were ignored in constant_memory
+        mode, or after finalize(), because their row had already been written
+        to the file.
+
+        Args:
+            None.
+
+        Returns:
+            The number of ignored writes.
+
+        """
+        return self.late_writes
+
+    def finalize(self):
+        """
+        Write the cell data of a completed worksheet and release it from
+        memory. Any later cell writes to the worksheet are ignored.
+
+        Args:
+            None.
+
+        Returns:
+            Nothing.
+
+        """
+        if self.finalized:
+            return
+
+        if self.constant_memory:
+            # Write the rows that are still held in memory.
+            self._write_single_row()
+        else:
+            self._write_finalized_rows()
+
+        # Treat all of the rows as written, as in constant_memory mode.
+        self.finalized = True
+        self.first_open_row = self.xls_rowmax
+        self.previous_row = self.xls_rowmax
+
     def activate(self):
         """
         Set this worksheet as the active worksheet, i.e. the worksheet that is
@@ -1472,6 +1793,9 @@ class Worksheet(xmlwriter.XMLwriter):
         # Store the merge range.
         self.merge.append([first_row, first_col, last_row, last_col])
 
+        # A merged range with ignored cells is counted as one late write.
+        late_writes = self.late_writes
+
         # Write the first cell
         self.write(first_row, first_col, data, cell_format)
 
@@ -1482,6 +1806,9 @@ class Worksheet(xmlwriter.XMLwriter):
                     continue
                 self.write_blank(row, col, '', cell_format)
 
+        if self.late_writes > late_writes:
+            self.late_writes = late_writes + 1
+
     @convert_range_args
     def autofilter(self, first_row, first_col, last_row, last_col):
         """
@@ -2090,7 +2417,7 @@ class Worksheet(xmlwriter.XMLwriter):
 
         # Get the dxf format index.
         if 'format' in options and options['format']:
-            options['format'] = options['format']._get_dxf_index()
+            options['format'] = self._get_dxf_index(options['format'])
 
         # Set the priority based on the order of adding.
         options['priority'] = self.dxf_priority
@@ -2272,7 +2599,8 @@ class Worksheet(xmlwriter.XMLwriter):
 
         Returns:
             0:  Success.
-            -1: Not supported in constant_memory mode.
+            -1: Table rows already written in constant_memory mode or
+                after finalize().
             -2: Row or column is out of worksheet bounds.
             -3: Incorrect parameter or option.
         """
@@ -2282,8 +2610,16 @@ class Worksheet(xmlwriter.XMLwriter):
         if options is None:
             options = {}
 
-        if self.constant_memory:
-            warn("add_table() isn't supported in 'constant_memory' mode")
+        # In constant_memory mode the table cells are written as the rows
+        # are written so the table can't start in a row that is written.
+        if ((self.constant_memory or self.finalized)
+                and min(first_row, last_row) < self.first_open_row):
+            if self.finalized:
+                warn("add_table() rows have already been written by "
+                     "finalize()")
+            else:
+                warn("add_table() rows have already been written in "
+                     "'constant_memory' mode")
             return -1
 
         # Check that row and col are valid without storing the values.
@@ -2454,8 +2790,16 @@ class Worksheet(xmlwriter.XMLwriter):
 
                         col_data['formula'] = formula
 
-                        for row in range(first_data_row, last_data_row + 1):
-                            self.write_formula(row, col_num, formula, xformat)
+                        if self.constant_memory:
+                            self._add_table_cells(first_data_row,
+                                                  last_data_row, col_num,
+                                                  CELL_FORMULA, formula,
+                                                  xformat)
+                        else:
+                            for row in range(first_data_row,
+                                             last_data_row + 1):
+                                self.write_formula(row, col_num, formula,
+                                                   xformat)
 
                     # Handle the function for the total row.
                     if user_data.get('total_function'):
@@ -2479,20 +2823,30 @@ class Worksheet(xmlwriter.XMLwriter):
 
                         value = user_data.get('total_value', 0)
 
-                        self.write_formula(last_row, col_num, formula, xformat,
-                                           value)
+                        if self.constant_memory:
+                            self._add_table_cells(last_row, last_row, col_num,
+                                                  CELL_FORMULA, formula,
+                                                  xformat, value)
+                        else:
+                            self.write_formula(last_row, col_num, formula,
+                                               xformat, value)
 
                     elif user_data.get('total_string'):
                         # Total label only (not a function).
                         total_string = user_data['total_string']
                         col_data['total_string'] = total_string
 
-                        self.write_string(last_row, col_num, total_string,
-                                          user_data.get('format'))
+                        if self.constant_memory:
+                            self._add_table_cells(last_row, last_row, col_num,
+                                                  CELL_STRING, total_string,
+                                                  user_data.get('format'))
+                        else:
+                            self.write_string(last_row, col_num, total_string,
+                                              user_data.get('format'))
 
                     # Get the dxf format index.
                     if xformat is not None:
-                        col_data['format'] = xformat._get_dxf_index()
+                        col_data['format'] = self._get_dxf_index(xformat)
 
                     # Store the column format for writing the cell data.
                     # It doesn't matter if it is undefined.
@@ -2502,7 +2856,11 @@ class Worksheet(xmlwriter.XMLwriter):
             table['columns'].append(col_data)
 
             # Write the column headers to the worksheet.
-            if options['header_row']:
+            if options['header_row'] and self.constant_memory:
+                self._add_table_cells(first_row, first_row, col_num,
+                                      CELL_STRING, col_data['name'],
+                                      col_data['name_format'])
+            elif options['header_row']:
                 self.write_string(first_row, col_num, col_data['name'],
                                   col_data['name_format'])
 
@@ -3442,6 +3800,11 @@ class Worksheet(xmlwriter.XMLwriter):
         self.str_table = init_data['str_table']
         self.worksheet_meta = init_data['worksheet_meta']
         self.constant_memory = init_data['constant_memory']
+        self.reorder_window = init_data['reorder_window']
+        self.memory_budget = init_data['memory_budget']
+        self.in_memory = init_data['in_memory']
+        self.use_inline_strings = (self.constant_memory and not
+                                   init_data['shared_strings_on_disk'])
         self.tmpdir = init_data['tmpdir']
         self.date_1904 = init_data['date_1904']
         self.strings_to_numbers = init_data['strings_to_numbers']
@@ -3465,14 +3828,21 @@ class Worksheet(xmlwriter.XMLwriter):
             self.margin_footer = 0.5
             self.header_footer_aligns = False
 
+        # Store the cell data in a table that spills sorted runs of rows to
+        # temp files when it is over the memory budget.
+        if self.memory_budget and not self.constant_memory:
+            self.table = SpillCellTable(self.memory_budget, self.tmpdir)
+        else:
+            self.memory_budget = None
+
         # Open a temp filehandle to store row data in constant_memory mode.
         if self.constant_memory:
-            # This is sub-optimal but we need to create a temp file
-            # with utf8 encoding in Python < 3.
+            # The row data is stored as utf-8 encoded bytes so that it can
+            # be copied directly to the worksheet XML file.
             (fd, filename) = tempfile.mkstemp(dir=self.tmpdir)
             os.close(fd)
             self.row_data_filename = filename
-            self.row_data_fh = codecs.open(filename, 'w+', 'utf-8')
+            self.row_data_fh = BufferedStreamWriter(open(filename, 'wb'))
 
             # Set as the worksheet filehandle until the file is assembled.
             self.fh = self.row_data_fh
@@ -3502,7 +3872,7 @@ class Worksheet(xmlwriter.XMLwriter):
         self._write_cols()
 
         # Write the worksheet data such as rows columns and cells.
-        if not self.constant_memory:
+        if not self.constant_memory and not self.finalized:
             self._write_sheet_data()
         else:
             self._write_optimized_sheet_data()
@@ -3581,10 +3951,11 @@ class Worksheet(xmlwriter.XMLwriter):
         if row >= self.xls_rowmax or col >= self.xls_colmax:
             return -1
 
-        # In constant_memory mode we don't change dimensions for rows
-        # that are already written.
-        if not ignore_row and not ignore_col and self.constant_memory:
-            if row < self.previous_row:
+        # In constant_memory mode, or after finalize(), we don't change
+        # dimensions for rows that are already written.
+        if (not ignore_row and not ignore_col
+                and (self.constant_memory or self.finalized)):
+            if row < self.first_open_row:
                 return -2
 
         if not ignore_row:
@@ -3601,6 +3972,16 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return 0
 
+    def _check_cell_dimensions(self, row, col):
+        # Check the dimensions of a cell that is written and count the
+        # writes that are ignored because the row is already written.
+        status = self._check_dimensions(row, col)
+
+        if status == -2:
+            self.late_writes += 1
+
+        return status
+
     def _convert_date_time(self, dt_obj):
         # Convert a datetime object to an Excel serial date and time.
         return datetime_to_excel_datetime(dt_obj,
@@ -4463,6 +4844,47 @@ class Worksheet(xmlwriter.XMLwriter):
                                               + '.xml'])
             table_id += 1
 
+    def _prepare_xf_indices(self):
+        # Assign the XF indices of the column, row and cell formats in the
+        # same order as they are written by _assemble_xml_file(). Once this
+        # is done the worksheet can be assembled independently of the other
+        # worksheets in the workbook.
+        for col in sorted(self.colinfo.keys()):
+            cell_format = self.colinfo[col][3]
+            if cell_format:
+                cell_format._get_xf_index()
+
+        # In constant_memory mode, or after finalize(), the rows have
+        # already been written.
+        if (self.constant_memory or self.finalized
+                or self.dim_rowmin is None):
+            return
+
+        if self.memory_budget:
+            rows = self._get_merged_rows()
+        else:
+            rows = ((row_num, self.table.get(row_num))
+                    for row_num in range(self.dim_rowmin, self.dim_rowmax + 1))
+
+        for row_num, row_data in rows:
+            properties = self.set_rows.get(row_num)
+
+            row_xf = None
+            if properties and properties[1]:
+                row_xf = properties[1]
+                row_xf._get_xf_index()
+
+            if not row_data:
+                continue
+
+            for col_num, cell_format in row_data._get_formats():
+                if cell_format:
+                    cell_format._get_xf_index()
+                elif row_xf:
+                    row_xf._get_xf_index()
+                elif col_num in self.col_formats:
+                    self.col_formats[col_num]._get_xf_index()
+
     def _table_function_to_formula(self, function, col_name):
         # Convert a table total function to a worksheet formula.
         formula = ''
@@ -4486,6 +4908,77 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return formula
 
+    def _add_table_cells(self, first_row, last_row, col, tag, token,
+                         cell_format, value=0):
+        # Store the header, formula and total cells of a table column in
+        # constant_memory mode. The cells are added to their rows as the
+        # rows are written, unless the row already has data in the column.
+        if first_row > last_row:
+            return
+
+        if tag == CELL_STRING:
+            number = token[:self.xls_strmax]
+            data = None
+
+            if not self.use_inline_strings:
+                number = self.str_table._get_shared_string_index(number)
+        else:
+            number = 0
+            data = (token.lstrip('='), value)
+
+        # Store the dimensions of the cells.
+        self._check_dimensions(first_row, col, ignore_col=True)
+        self._check_dimensions(last_row, col, ignore_col=True)
+        self._check_dimensions(first_row, col, ignore_row=True)
+
+        table_cell = (first_row, last_row, col, tag, cell_format, number,
+                      data)
+
+        # The cells are kept in order of their first row so that the cells
+        # of each row can be found as the rows are written in row order.
+        if first_row <= self.table_cells_row:
+            self.active_table_cells.append(table_cell)
+        else:
+            index = bisect_right(self.table_cell_rows, first_row)
+            self.table_cell_rows.insert(index, first_row)
+            self.table_cells.insert(index, table_cell)
+
+    def _get_table_row_data(self, row_num, row_data):
+        # Add any table cells for a row that is about to be written in
+        # constant_memory mode. Returns the row data, which is created if
+        # the row only contains table cells. The rows are written in row
+        # order so the cells that start in the row are moved to the active
+        # cells and the cells that have ended are removed.
+        table_cells = self.table_cells
+        active_cells = self.active_table_cells
+        index = self.table_cells_index
+
+        while index < len(table_cells) and table_cells[index][0] <= row_num:
+            active_cells.append(table_cells[index])
+            index += 1
+
+        self.table_cells_index = index
+        self.table_cells_row = row_num
+
+        for table_cell in active_cells:
+            if table_cell[1] < row_num:
+                active_cells = [cell for cell in active_cells
+                                if cell[1] >= row_num]
+                self.active_table_cells = active_cells
+                break
+
+        for table_cell in active_cells:
+            col = table_cell[2]
+
+            if row_data is None:
+                row_data = CellRow(self.table)
+            elif col in row_data:
+                continue
+
+            row_data._set_cell(col, *table_cell[3:])
+
+        return row_data
+
     def _set_spark_color(self, sparkline, options, user_color):
         # Set the sparkline color.
         if user_color not in options:
@@ -4493,60 +4986,171 @@ class Worksheet(xmlwriter.XMLwriter):
 
         sparkline[user_color] = {'rgb': xl_color(options[user_color])}
 
+    def _is_array_sequence(self, value):
+        # Check if a value in the data of write_array() is a nested sequence,
+        # such as a row, rather than a cell value.
+        if isinstance(value, (str_types, bytes)):
+            return False
+
+        return hasattr(value, '__len__') and hasattr(value, '__getitem__')
+
     def _get_range_data(self, row_start, col_start, row_end, col_end):
         # Returns a range of data from the worksheet _table to be used in
         # chart cached data. Strings are returned as SST ids and decoded
         # in the workbook. Return None for data that doesn't exist since
         # Excel can chart series with data missing.
 
-        if self.constant_memory:
-            return ()
+        # In constant_memory mode, or after finalize(), only the data of the
+        # ranges that were registered before the rows were written is
+        # available.
+        cells = (row_start, col_start, row_end, col_end)
+        captured_rows = None
+        if self.constant_memory or self.finalized:
+            captured_rows = self.range_captures.get(cells)
+            if captured_rows is None:
+                return ()
+
+        table = self.table
+        if self.memory_budget and table.spill_runs:
+            # Read the spill runs once and capture the data of all the
+            # registered chart ranges in a single pass.
+            if not self.spill_runs_captured:
+                for row_num, row_data in table._get_rows():
+                    self._capture_row_data(row_num, row_data)
+
+                self.spill_runs_captured = True
+
+            captured_rows = self.range_captures.get(cells)
+
+            # Read the rows of a range that wasn't registered.
+            if captured_rows is None:
+                table = dict((row_num, row_data)
+                             for row_num, row_data in table._get_rows()
+                             if row_start <= row_num <= row_end)
 
         data = []
 
         # Iterate through the table data.
         for row_num in range(row_start, row_end + 1):
+            if captured_rows and row_num in captured_rows:
+                data.extend(captured_rows[row_num])
+                continue
+
+            row_data = table.get(row_num)
+
             # Store None if row doesn't exist.
-            if row_num not in self.table:
+            if row_data is None:
                 data.append(None)
                 continue
 
-            for col_num in range(col_start, col_end + 1):
+            data.extend(self._get_row_range_data(row_data, col_start,
+                                                 col_end))
 
-                if col_num in self.table[row_num]:
-                    cell = self.table[row_num][col_num]
+        return data
 
-                    if type(cell).__name__ == 'Number':
-                        # Return a number with Excel's precision.
-                        data.append("%.16g" % cell.number)
+    def _get_row_range_data(self, row_data, col_start, col_end):
+        # Returns the chart cached data for a range of columns in a row.
+        data = []
 
-                    elif type(cell).__name__ == 'String':
-                        # Return a string from it's shared string index.
-                        index = cell.string
-                        string = self.str_table._get_shared_string(index)
+        for col_num in range(col_start, col_end + 1):
+            cell = row_data.get(col_num)
 
-                        data.append(string)
+            if cell is not None:
 
-                    elif (type(cell).__name__ == 'Formula'
-                            or type(cell).__name__ == 'ArrayFormula'):
-                        # Return the formula value.
-                        value = cell.value
+                if cell.tag == CELL_NUMBER:
+                    # Return a number with Excel's precision.
+                    data.append("%.16g" % cell.number)
 
-                        if value is None:
-                            value = 0
+                elif cell.tag == CELL_STRING:
+                    # Return a string from it's shared string index.
+                    string = cell.string
 
-                        data.append(value)
+                    if not self.use_inline_strings:
+                        string = self.str_table._get_shared_string(string)
 
-                    elif type(cell).__name__ == 'Blank':
-                        # Return a empty cell.
-                        data.append('')
-                else:
+                    data.append(string)
+
+                elif (cell.tag == CELL_FORMULA
+                        or cell.tag == CELL_ARRAY_FORMULA):
+                    # Return the formula value.
+                    value = cell.value
+
+                    if value is None:
+                        value = 0
+
+                    data.append(value)
+
+                elif cell.tag == CELL_BLANK:
+                    # Return a empty cell.
+                    data.append('')
+            else:
 
-                    # Store None if column doesn't exist.
-                    data.append(None)
+                # Store None if column doesn't exist.
+                data.append(None)
 
         return data
 
+    def _add_range_capture(self, row_start, col_start, row_end, col_end):
+        # Register a chart range. In constant_memory mode, or for finalize(),
+        # the data of the range is kept as the rows are written so that it
+        # can be used in the chart cached data.
+        # A range that starts in a row that has already been written can't
+        # be captured and it isn't stored so that its chart data is empty.
+        cells = (row_start, col_start, row_end, col_end)
+
+        if cells in self.range_captures:
+            return
+
+        if row_start < self.first_open_row:
+            return
+
+        captured_rows = {}
+        self.range_captures[cells] = captured_rows
+
+        # The ranges are kept in order of their first row so that the ranges
+        # of each row can be found as the rows are written in row order.
+        if row_start <= self.range_capture_row:
+            self.active_range_captures.append((cells, captured_rows))
+        else:
+            index = bisect_right(self.range_capture_rows, row_start)
+            self.range_capture_rows.insert(index, row_start)
+            self.range_capture_queue.insert(index, (cells, captured_rows))
+
+    def _capture_row_data(self, row_num, row_data):
+        # Store the data of a row that is about to be written for any of
+        # the registered chart ranges that contain it. The ranges that start
+        # in the row are moved to the active ranges and the ranges that have
+        # ended are removed.
+        queue = self.range_capture_queue
+        active_captures = self.active_range_captures
+        index = self.range_capture_index
+
+        while index < len(queue) and queue[index][0][0] <= row_num:
+            active_captures.append(queue[index])
+            index += 1
+
+        self.range_capture_index = index
+        self.range_capture_row = row_num
+
+        for cells, _ in active_captures:
+            if cells[2] < row_num:
+                active_captures = [capture for capture in active_captures
+                                   if capture[0][2] >= row_num]
+                self.active_range_captures = active_captures
+                break
+
+        for cells, captured_rows in active_captures:
+            captured_rows[row_num] = self._get_row_range_data(
+                row_data, cells[1], cells[3])
+
+    def _get_dxf_index(self, xf_format):
+        # Get the DXF index of a format. In workbooks created from a template
+        # the formats shared with the template are replaced by a copy.
+        if self.dxf_format_copy:
+            xf_format = self.dxf_format_copy(xf_format)
+
+        return xf_format._get_dxf_index()
+
     def _csv_join(self, *items):
         # Create a csv string for use with data validation formulas and lists.
 
@@ -4667,6 +5271,392 @@ class Worksheet(xmlwriter.XMLwriter):
 
         return "FF" + color.upper()
 
+    def _write_rows_block(self, first_row, first_col, rows, formats,
+                          type_codes):
+        # Write a block of rows for write_rows() and write_columns() with a
+        # list of column type codes.
+        if isinstance(formats, Format) or formats is None:
+            cell_formats = []
+            default_format = formats
+        else:
+            cell_formats = list(formats)
+            default_format = None
+
+        if self._check_dimensions(first_row, first_col, True, True):
+            return -1
+
+        # Check the last row and column of a block with a known length
+        # before writing anything so that it isn't partly written. Rows from
+        # an iterator are checked as they are written.
+        if hasattr(rows, '__len__') and len(rows):
+            last_row = first_row + len(rows) - 1
+            last_col = first_col + max(len(row_data) for row_data in rows) - 1
+
+            if last_row >= self.xls_rowmax or last_col >= self.xls_colmax:
+                return -1
+
+        # The dimensions of the cells that are stored directly are updated
+        # once at the end of the block.
+        dims = [None, None, None, None]
+
+        try:
+            return self._write_rows_data(first_row, first_col, rows,
+                                         cell_formats, default_format,
+                                         type_codes, dims)
+        finally:
+            if dims[0] is not None:
+                self._check_dimensions(dims[0], dims[2], ignore_col=True)
+                self._check_dimensions(dims[1], dims[3], ignore_col=True)
+                self._check_dimensions(dims[0], dims[2], ignore_row=True)
+                self._check_dimensions(dims[1], dims[3], ignore_row=True)
+
+    def _write_rows_data(self, row, first_col, rows, cell_formats,
+                         default_format, type_codes, dims):
+        # Write the rows of data for write_rows(). Common types are stored
+        # directly in the cell table and the remaining tokens are passed to
+        # the write*() methods. Errors other than out of range cells, such
+        # as truncated strings, don't stop the writing and are returned at
+        # the end. The row and column range of the directly stored cells is
+        # returned in dims as [min_row, max_row, min_col, max_col].
+        table = self.table
+        str_table = self.str_table
+        constant_memory = self.constant_memory or self.finalized
+        use_inline_strings = self.use_inline_strings
+        check_prefixes = self.strings_to_formulas or self.strings_to_urls
+        strings_to_numbers = self.strings_to_numbers
+        xls_strmax = self.xls_strmax
+        default_date_format = self.default_date_format
+        date_1904 = self.date_1904
+        remove_timezone = self.remove_timezone
+
+        # Types with user write handlers are always written with write().
+        float_type = int_type = str_type = None
+        if float not in self.write_handlers:
+            float_type = float
+        if int not in self.write_handlers:
+            int_type = int
+        if str not in self.write_handlers:
+            str_type = str
+
+        code_types = column_code_types
+        if self.write_handlers:
+            handler_types = set(self.write_handlers)
+            code_types = dict((type_code, value_types - handler_types)
+                              for type_code, value_types
+                              in column_code_types.items())
+        status = 0
+
+        for row_data in rows:
+            last_col = first_col + len(row_data) - 1
+
+            if row >= self.xls_rowmax or last_col >= self.xls_colmax:
+                return -1
+
+            if constant_memory:
+                # In constant_memory mode rows must be written in order,
+                # or within the reorder window.
+                if row < self.first_open_row:
+                    self.late_writes += 1
+                    return -1
+
+                if row > self.previous_row:
+                    self._write_single_row(row)
+
+            # Extend the column formats and types to the width of the row.
+            while len(cell_formats) < len(row_data):
+                cell_formats.append(default_format)
+
+            while len(type_codes) < len(row_data):
+                type_codes.append(0)
+
+            cells = table[row]
+            first_stored = None
+            last_stored = None
+
+            for index, token in enumerate(row_data):
+                col = first_col + index
+                cell_format = cell_formats[index]
+                type_code = type_codes[index]
+
+                if token is None:
+                    # Write a blank cell. It is only stored with a format.
+                    if cell_format is None:
+                        continue
+
+                    cells._set_cell(col, CELL_BLANK, cell_format)
+
+                    if first_stored is None:
+                        first_stored = col
+                    last_stored = col
+                    continue
+
+                if type_code == 0:
+                    # Get the type of common tokens that can be stored
+                    # directly and write anything else with write().
+                    token_type = type(token)
+
+                    if token_type is float_type or token_type is int_type:
+                        type_code = 1
+                    elif (token_type is str_type and token
+                            and not (check_prefixes
+                                     and string_prefixes.match(token))
+                            and not strings_to_numbers):
+                        type_code = 2
+                    elif token is missing_cell:
+                        continue
+                    else:
+                        error = self.write(row, col, token, cell_format)
+                        if error == -1:
+                            return error
+                        status = status or error
+                        continue
+
+                elif (type_code in code_types
+                        and type(token) not in code_types[type_code]):
+                    # The token doesn't match the column type so it is
+                    # written with write().
+                    error = self.write(row, col, token, cell_format)
+                    if error == -1:
+                        return error
+                    status = status or error
+                    continue
+
+                if type_code == 1:
+                    # Write a number. NAN/INF is handled by write_number().
+                    if token != token or token - token != 0:
+                        error = self.write_number(row, col, token,
+                                                  cell_format)
+                        if error == -1:
+                            return error
+                        status = status or error
+                        continue
+
+                    cells._set_cell(col, CELL_NUMBER, cell_format, token)
+
+                elif type_code == 2:
+                    # Write a string. Long strings are truncated by
+                    # write_string().
+                    if type(token) is not str or len(token) > xls_strmax:
+                        error = self.write_string(row, col, token,
+                                                  cell_format)
+                        if error == -1:
+                            return error
+                        status = status or error
+                        continue
+
+                    if not use_inline_strings:
+                        token = str_table._get_shared_string_index(token)
+
+                    cells._set_cell(col, CELL_STRING, cell_format, token)
+
+                elif type_code == 3:
+                    # Write a boolean.
+                    if token:
+                        token = 1
+                    else:
+                        token = 0
+
+                    cells._set_cell(col, CELL_BOOLEAN, cell_format, token)
+
+                elif type_code == 4:
+                    # Write a datetime.
+                    if cell_format is None:
+                        cell_format = default_date_format
+
+                    cells._set_cell(col, CELL_NUMBER, cell_format,
+                                    datetime_to_excel_datetime(
+                                        token, date_1904, remove_timezone))
+
+                elif type_code == SERIAL_TYPE_CODE:
+                    # Write a datetime from write_columns() that has already
+                    # been converted to an Excel serial date.
+                    if cell_format is None:
+                        cell_format = default_date_format
+
+                    cells._set_cell(col, CELL_NUMBER, cell_format, token)
+
+                else:
+                    # Write a formula.
+                    error = self.write_formula(row, col, token, cell_format)
+                    if error == -1:
+                        return error
+                    status = status or error
+                    continue
+
+                if first_stored is None:
+                    first_stored = col
+                last_stored = col
+
+            if first_stored is not None:
+                if dims[0] is None:
+                    dims[:] = [row, row, first_stored, last_stored]
+                else:
+                    dims[1] = row
+                    dims[2] = min(dims[2], first_stored)
+                    dims[3] = max(dims[3], last_stored)
+
+            row += 1
+
+        return status
+
+    def _get_write_method(self, token_type):
+        # Get the method that write() uses for a type of token. The type is
+        # only checked once per worksheet since the result is stored in the
+        # write_dispatch table.
+        user_function = self.write_handlers.get(token_type)
+
+        if user_function is not None:
+            default_method = self._get_default_write_method(token_type)
+
+            def write_user_type(row, col, *args):
+                # Call the user handler and write the token as usual if it
+                # returns None.
+                error = user_function(self, row, col, *args)
+
+                if error is None:
+                    return default_method(row, col, *args)
+
+                return error
+
+            return write_user_type
+
+        return self._get_default_write_method(token_type)
+
+    def _get_default_write_method(self, token_type):
+        # Get the write*() method for a type of token. Bool is checked first
+        # since it is a subclass of int.
+        if token_type is type(None):
+            return self.write_blank
+
+        if issubclass(token_type, bool):
+            return self.write_boolean
+
+        if issubclass(token_type, datetime_types):
+            return self.write_datetime
+
+        if issubclass(token_type, num_types):
+            return self.write_number
+
+        if issubclass(token_type, str_types):
+            return self._write_token_string
+
+        return self._write_token_other
+
+    def _write_token_string(self, row, col, *args):
+        # Write a string token with the write*() method that it maps to.
+        token = args[0]
+
+        if token == '':
+            return self.write_blank(row, col, *args)
+
+        # Check for formula and url prefixes with a single match.
+        match = string_prefixes.match(token)
+
+        if match:
+            if match.group(1):
+                if self.strings_to_formulas:
+                    return self.write_formula(row, col, *args)
+
+            elif self.strings_to_urls:
+                return self.write_url(row, col, *args)
+
+        if self.strings_to_numbers:
+            try:
+                f = float(token)
+                if (self.nan_inf_to_errors or
+                        (not self._isnan(f) and not self._isinf(f))):
+                    return self.write_number(row, col, f, *args[1:])
+            except ValueError:
+                # Not a number, write as a string.
+                pass
+
+        # We have a plain string.
+        return self.write_string(row, col, *args)
+
+    def _write_token_other(self, row, col, *args):
+        # Write a token of an unsupported type as a number or a string.
+        token = args[0]
+
+        # Try float.
+        try:
+            f = float(token)
+            return self.write_number(row, col, f, *args[1:])
+        except ValueError:
+            pass
+        except TypeError:
+            raise TypeError("Unsupported type %s in write()" % type(token))
+
+        # Finally try string.
+        try:
+            str(token)
+            return self.write_string(row, col, *args)
+        except ValueError:
+            raise TypeError("Unsupported type %s in write()" % type(token))
+
+    def _get_column_data(self, values):
+        # Get the values of a write_columns() column as a list and the
+        # column type code to write them with. The type is found once from
+        # the dtype of an array or from the set of value types. It is 0 if
+        # the type of each value has to be checked by write(). Datetimes are
+        # converted to Excel serial dates in one pass.
+        dtype = getattr(values, 'dtype', None)
+
+        if dtype is not None and hasattr(values, 'tolist'):
+            if dtype.kind == 'M':
+                # Convert datetime64 values to datetimes.
+                values = values.astype('datetime64[us]')
+
+            values = values.tolist()
+
+            # The values of number and boolean arrays only need to be
+            # checked if there are user write handlers.
+            if not self.write_handlers:
+                if dtype.kind in 'iuf':
+                    return values, column_type_codes['number']
+
+                if dtype.kind == 'b':
+                    return values, column_type_codes['boolean']
+        else:
+            values = list(values)
+
+        value_types = set(map(type, values))
+        value_types.discard(type(None))
+
+        if not value_types or value_types & set(self.write_handlers):
+            return values, 0
+
+        if value_types <= column_number_types:
+            return values, column_type_codes['number']
+
+        if value_types == set([bool]):
+            return values, column_type_codes['boolean']
+
+        if value_types <= column_datetime_types:
+            serials = datetimes_to_excel_serials(values, self.date_1904,
+                                                 self.remove_timezone)
+            return serials, SERIAL_TYPE_CODE
+
+        if value_types <= column_string_types:
+            # Strings that write() would store as something else, such as
+            # formulas or urls, are written as strings by write_string()
+            # so the column type is only used for plain strings.
+            if self.strings_to_numbers:
+                return values, 0
+
+            check_prefixes = self.strings_to_formulas or self.strings_to_urls
+
+            for value in values:
+                if value is None:
+                    continue
+
+                if not value or (check_prefixes
+                                 and string_prefixes.match(value)):
+                    return values, 0
+
+            return values, column_type_codes['string']
+
+        return values, 0
+
     def _isnan(self, x):
         # Workaround for lack of math.isnan in Python 2.5/Jython.
         return x != x
@@ -4685,10 +5675,24 @@ class Worksheet(xmlwriter.XMLwriter):
         # Reopen the row data filehandle in constant_memory mode.
         if self.row_data_fh_closed:
             filename = self.row_data_filename
-            self.row_data_fh = codecs.open(filename, 'a+', 'utf-8')
+            self.row_data_fh = BufferedStreamWriter(open(filename, 'ab'))
             self.row_data_fh_closed = False
             self.fh = self.row_data_fh
 
+    def _remove_temp_files(self):
+        # Remove the row data and spill run temp files. They are normally
+        # removed when the worksheet is assembled but remain if the workbook
+        # isn't written.
+        if self.memory_budget:
+            self.table._close()
+
+        if self.row_data_filename is not None:
+            self.row_data_fh.close()
+            self.row_data_fh_closed = True
+
+            if os.path.exists(self.row_data_filename):
+                os.unlink(self.row_data_filename)
+
     def _set_icon_props(self, total_icons, user_props=None):
         # Set the sub-properties for icons.
         props = []
@@ -4977,9 +5981,17 @@ class Worksheet(xmlwriter.XMLwriter):
             self._xml_empty_tag('sheetData')
         else:
             self._xml_start_tag('sheetData')
-            self._write_rows()
+
+            if self.memory_budget:
+                self._write_merged_rows()
+            else:
+                self._write_rows()
+
             self._xml_end_tag('sheetData')
 
+        if self.memory_budget:
+            self.table._close()
+
     def _write_optimized_sheet_data(self):
         # Write the <sheetData> element when constant_memory is on. In this
         # case we read the data stored in the temp file and rewrite it to the
@@ -4990,17 +6002,23 @@ class Worksheet(xmlwriter.XMLwriter):
         else:
             self._xml_start_tag('sheetData')
 
-            # Rewind the filehandle that was used for temp row data.
+            # Flush the temp row data and copy the encoded bytes directly.
             buff_size = 65536
-            self.row_data_fh.seek(0)
-            data = self.row_data_fh.read(buff_size)
+            self.row_data_fh.close()
 
-            while data:
-                self.fh.write(data)
-                data = self.row_data_fh.read(buff_size)
+            if self.row_data_filename is None:
+                # The rows of a finalized worksheet in in_memory mode.
+                self.fh.write_bytes(self.row_data_fh.stream.getvalue())
+            else:
+                row_data_fh = open(self.row_data_filename, 'rb')
+                data = row_data_fh.read(buff_size)
 
-            self.row_data_fh.close()
-            os.unlink(self.row_data_filename)
+                while data:
+                    self.fh.write_bytes(data)
+                    data = row_data_fh.read(buff_size)
+
+                row_data_fh.close()
+                os.unlink(self.row_data_filename)
 
             self._xml_end_tag('sheetData')
 
@@ -5142,8 +6160,10 @@ class Worksheet(xmlwriter.XMLwriter):
 
         for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
 
+            row_data = self.table.get(row_num)
+
             if (row_num in self.set_rows or row_num in self.comments
-                    or self.table[row_num]):
+                    or row_data):
                 # Only process rows with formatting, cell data and/or comments.
 
                 span_index = int(row_num / 16)
@@ -5153,67 +6173,263 @@ class Worksheet(xmlwriter.XMLwriter):
                 else:
                     span = None
 
-                if self.table[row_num]:
-                    # Write the cells if the row contains data.
-                    if row_num not in self.set_rows:
-                        self._write_row(row_num, span)
-                    else:
-                        self._write_row(row_num, span, self.set_rows[row_num])
+                if row_data:
+                    # Write the row and its cells if the row contains data.
+                    self._write_data_row(row_num, span, row_data)
+                else:
+                    # Blank row with attributes and/or comments only.
+                    self._write_empty_row(row_num, span,
+                                          self.set_rows.get(row_num))
+
+    def _get_merged_rows(self):
+        # Return an iterator of the (row, row_data) pairs, in row order, of
+        # a table with a memory budget. The rows with data in the table and
+        # its spill runs are merged with the rows that only have properties
+        # or comments. The row_data of these rows is None.
+        other_rows = set(self.set_rows)
+        other_rows.update(self.comments)
+
+        rows = merge(((row_num, 0, row_data)
+                      for row_num, row_data in self.table._get_rows()),
+                     ((row_num, 1, None) for row_num in sorted(other_rows)))
+
+        previous_row_num = None
+
+        for row_num, _, row_data in rows:
+            if row_num != previous_row_num:
+                previous_row_num = row_num
+                yield row_num, row_data
+
+    def _write_merged_rows(self):
+        # Write out the worksheet data when the table has a memory budget.
+        # The rows are merged from the spill runs and written in blocks of
+        # 16 rows so that the spans of each block can be calculated.
+        block = []
+        block_index = None
+
+        for row_num, row_data in self._get_merged_rows():
+            if row_data is not None and row_num in self.hyperlinks:
+                # Keep the cells with hyperlinks for _write_hyperlinks().
+                self.link_rows[row_num] = row_data
+
+            if int(row_num / 16) != block_index:
+                self._write_row_block(block_index, block)
+                block = []
+                block_index = int(row_num / 16)
+
+            block.append((row_num, row_data))
+
+        self._write_row_block(block_index, block)
+
+    def _write_row_block(self, span_index, block):
+        # Write a block of up to 16 rows with the same spans.
+        span_min = None
+        span_max = None
 
-                    for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                        if col_num in self.table[row_num]:
-                            col_ref = self.table[row_num][col_num]
-                            self._write_cell(row_num, col_num, col_ref)
+        for row_num, row_data in block:
+            cols = []
 
-                    self._xml_end_tag('row')
+            if row_data:
+                cols.append(row_data._get_first_col())
+                cols.append(row_data._get_last_col())
 
-                elif row_num in self.comments:
-                    # Row with comments in cells.
-                    self._write_empty_row(row_num, span,
-                                          self.set_rows[row_num])
+            if row_num in self.comments:
+                cols.extend(self.comments[row_num].keys())
+
+            if cols:
+                if span_min is None:
+                    span_min = min(cols)
+                    span_max = max(cols)
                 else:
-                    # Blank row with attributes only.
-                    self._write_empty_row(row_num, span,
-                                          self.set_rows[row_num])
+                    span_min = min(span_min, min(cols))
+                    span_max = max(span_max, max(cols))
+
+        span = None
+        if span_min is not None:
+            span = "%s:%s" % (span_min + 1, span_max + 1)
+
+        for row_num, row_data in block:
+            if row_data:
+                self._write_data_row(row_num, span, row_data)
+            else:
+                self._write_empty_row(row_num, span,
+                                      self.set_rows.get(row_num))
+
+    def _write_finalized_rows(self):
+        # Write the rows of a worksheet for finalize() to a temp file, or to
+        # memory in in_memory mode, and release the cell data table. The
+        # rows are copied into the worksheet file when it is assembled.
+        if self.in_memory:
+            self.row_data_fh = BufferedStreamWriter(BytesIO(),
+                                                    close_stream=False)
+        else:
+            (fd, filename) = tempfile.mkstemp(dir=self.tmpdir)
+            os.close(fd)
+            self.row_data_filename = filename
+            self.row_data_fh = BufferedStreamWriter(open(filename, 'wb'))
+
+        # Keep the data of the chart ranges and of the rows with hyperlinks,
+        # which are used after the cell data is released.
+        if self.range_captures or self.hyperlinks:
+            for row_num, row_data in self.table._get_rows():
+                if self.range_captures:
+                    self._capture_row_data(row_num, row_data)
+
+                if row_num in self.hyperlinks:
+                    self.link_rows[row_num] = row_data
+
+        if self.dim_rowmin is not None:
+            fh = self.fh
+            self.fh = self.row_data_fh
+
+            if self.memory_budget:
+                self._write_merged_rows()
+            else:
+                self._write_rows()
+
+            self.fh = fh
 
-    def _write_single_row(self, current_row_num=0):
+        self.row_data_fh.close()
+        self.row_data_fh_closed = True
+
+        # Release the cell data. The memory budget no longer applies since
+        # there are no more rows to store.
+        if self.memory_budget:
+            self.table._close()
+            self.memory_budget = None
+
+        self.table = CellTable()
+
+    def _write_single_row(self, current_row_num=None):
         # Write out the worksheet data as a single row with cells.
         # This method is used when constant_memory is on. A single
         # row is written and the data table is reset. That way only
         # one row of data is kept in memory at any one time. We don't
         # write span data in the optimized case since it is optional.
+        # A current_row_num of None writes the remaining data at close.
+        if self.reorder_window or self.table_cells:
+            self._write_window_rows(current_row_num)
+            return
+
+        if current_row_num is None:
+            current_row_num = 0
 
         # Set the new previous row as the current row.
         row_num = self.previous_row
         self.previous_row = current_row_num
+        self.first_open_row = current_row_num
+
+        row_data = self.table.get(row_num)
 
         if (row_num in self.set_rows or row_num in self.comments
-                or self.table[row_num]):
+                or row_data):
             # Only process rows with formatting, cell data and/or comments.
 
             # No span data in optimized mode.
             span = None
 
-            if self.table[row_num]:
-                # Write the cells if the row contains data.
-                if row_num not in self.set_rows:
-                    self._write_row(row_num, span)
-                else:
-                    self._write_row(row_num, span, self.set_rows[row_num])
+            if row_data and self.range_captures:
+                self._capture_row_data(row_num, row_data)
 
-                for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                    if col_num in self.table[row_num]:
-                        col_ref = self.table[row_num][col_num]
-                        self._write_cell(row_num, col_num, col_ref)
-
-                self._xml_end_tag('row')
+            if row_data:
+                # Write the row and its cells if the row contains data.
+                self._write_data_row(row_num, span, row_data)
             else:
                 # Row attributes or comments only.
-                self._write_empty_row(row_num, span, self.set_rows[row_num])
+                self._write_empty_row(row_num, span,
+                                      self.set_rows.get(row_num))
 
         # Reset table.
         self.table.clear()
 
+    def _write_window_rows(self, current_row_num):
+        # Write out the rows that have fallen out of the reorder window in
+        # constant_memory mode. The rows of the last reorder_window rows
+        # are kept in the table so that they can be written out of order.
+        # Older rows are written in row order and removed from the table.
+        # Rows that only contain table cells are also written.
+        table = self.table
+        set_rows = self.set_rows
+        comments = self.comments
+        table_cells = self.table_cells
+        first_row = self.first_open_row
+
+        if current_row_num is None:
+            # Write all of the remaining rows.
+            last_row = self.xls_rowmax
+        else:
+            self.previous_row = current_row_num
+            last_row = current_row_num - self.reorder_window
+
+            if last_row <= first_row:
+                return
+
+        self.first_open_row = last_row
+
+        if last_row - first_row <= len(table):
+            # Usually only a few rows have left the window so we can check
+            # each of them.
+            row_nums = range(first_row, last_row)
+        else:
+            row_nums = set(row for row in table if row < last_row)
+            row_nums.update(row for row in set_rows
+                            if first_row <= row < last_row)
+            row_nums.update(row for row in comments
+                            if first_row <= row < last_row)
+            row_nums = sorted(row_nums)
+
+            # Add the rows of any table cells, in order.
+            if table_cells:
+                end = bisect_left(self.table_cell_rows, last_row)
+                cells = (self.active_table_cells +
+                         table_cells[self.table_cells_index:end])
+                table_rows = [range(max(cell[0], first_row),
+                                    min(cell[1] + 1, last_row))
+                              for cell in cells]
+                row_nums = merge(row_nums, *table_rows)
+
+        previous_row_num = None
+
+        for row_num in row_nums:
+            # Skip rows that are repeated in the merged rows.
+            if row_num == previous_row_num:
+                continue
+            previous_row_num = row_num
+
+            row_data = table.pop(row_num, None)
+
+            if table_cells:
+                row_data = self._get_table_row_data(row_num, row_data)
+
+            if row_data and self.range_captures:
+                self._capture_row_data(row_num, row_data)
+
+            # No span data in optimized mode.
+            if row_data:
+                self._write_data_row(row_num, None, row_data)
+            elif row_num in set_rows or row_num in comments:
+                self._write_empty_row(row_num, None, set_rows.get(row_num))
+
+    def _write_data_row(self, row_num, span, row_data):
+        # Write a <row> element and its <c> cells. The row is serialized to
+        # a single string and written with one write() call.
+        properties = self.set_rows.get(row_num)
+
+        # Get the row format, if any, for cells without a format.
+        row_xf = None
+        if properties and properties[1]:
+            row_xf = properties[1]
+
+        get_cell_xml = self._get_cell_xml
+        parts = [self._get_row_tag(row_num, span, properties)]
+
+        for col_num, cell in row_data.items():
+            parts.append(get_cell_xml(row_num, col_num, cell, row_xf))
+
+        parts.append('</row>')
+
+        self.fh.write(''.join(parts))
+
     def _calculate_spans(self):
         # Calculate the "spans" attribute of the <row> tag. This is an
         # XLSX optimization and isn't strictly required. However, it
@@ -5225,18 +6441,21 @@ class Worksheet(xmlwriter.XMLwriter):
 
         for row_num in range(self.dim_rowmin, self.dim_rowmax + 1):
 
-            if row_num in self.table:
-                # Calculate spans for cell data.
-                for col_num in range(self.dim_colmin, self.dim_colmax + 1):
-                    if col_num in self.table[row_num]:
-                        if span_min is None:
-                            span_min = col_num
-                            span_max = col_num
-                        else:
-                            if col_num < span_min:
-                                span_min = col_num
-                            if col_num > span_max:
-                                span_max = col_num
+            row_data = self.table.get(row_num)
+
+            if row_data:
+                # Calculate spans for cell data. The row columns are sorted.
+                first_col = row_data._get_first_col()
+                last_col = row_data._get_last_col()
+
+                if span_min is None:
+                    span_min = first_col
+                    span_max = last_col
+                else:
+                    if first_col < span_min:
+                        span_min = first_col
+                    if last_col > span_max:
+                        span_max = last_col
 
             if row_num in self.comments:
                 # Calculate spans for comments.
@@ -5265,6 +6484,10 @@ class Worksheet(xmlwriter.XMLwriter):
 
     def _write_row(self, row, spans, properties=None, empty_row=False):
         # Write the <row> element.
+        self.fh.write(self._get_row_tag(row, spans, properties, empty_row))
+
+    def _get_row_tag(self, row, spans, properties=None, empty_row=False):
+        # Get the <row> start tag, or empty tag, as a string.
         xf_index = 0
 
         if properties:
@@ -5309,10 +6532,13 @@ class Worksheet(xmlwriter.XMLwriter):
         if self.excel_version == 2010:
             attributes.append(('x14ac:dyDescent', '0.25'))
 
+        attr = ''.join([' %s="%s"' % (key, value)
+                        for key, value in attributes])
+
         if empty_row:
-            self._xml_empty_tag_unencoded('row', attributes)
+            return '<row%s/>' % attr
         else:
-            self._xml_start_tag_unencoded('row', attributes)
+            return '<row%s>' % attr
 
     def _write_empty_row(self, row, spans, properties=None):
         # Write and empty <row> element.
@@ -5320,130 +6546,121 @@ class Worksheet(xmlwriter.XMLwriter):
 
     def _write_cell(self, row, col, cell):
         # Write the <cell> element.
-        # Note. This is the innermost loop so efficiency is important.
+        row_xf = None
+        if row in self.set_rows and self.set_rows[row][1]:
+            row_xf = self.set_rows[row][1]
 
-        error_codes = ['#DIV/0!', '#N/A', '#NAME?', '#NULL!',
-                       '#NUM!', '#REF!', '#VALUE!']
+        self.fh.write(self._get_cell_xml(row, col, cell, row_xf))
 
-        cell_range = xl_rowcol_to_cell_fast(row, col)
+    def _get_inline_string(self, string):
+        # Sanitize an inline string, using the cache for repeated strings.
+        sanitized = self.inline_strings.get(string)
+
+        if sanitized is None:
+            sanitized = self._sanitize_string(string)
+
+            if self.inline_string_cache_size:
+                if len(self.inline_strings) >= self.inline_string_cache_size:
+                    self.inline_strings.clear()
 
-        attributes = [('r', cell_range)]
+                self.inline_strings[string] = sanitized
+
+        return sanitized
+
+    def _get_cell_xml(self, row, col, cell, row_xf=None):
+        # Get the <c> cell element as a string using the cell templates.
+        # Note. This is the innermost loop so efficiency is important.
+        cell_range = xl_rowcol_to_cell_fast(row, col)
 
         if cell.format:
             # Add the cell format index.
-            xf_index = cell.format._get_xf_index()
-            attributes.append(('s', xf_index))
-        elif row in self.set_rows and self.set_rows[row][1]:
+            style = ' s="%d"' % cell.format._get_xf_index()
+        elif row_xf:
             # Add the row format.
-            row_xf = self.set_rows[row][1]
-            attributes.append(('s', row_xf._get_xf_index()))
+            style = ' s="%d"' % row_xf._get_xf_index()
         elif col in self.col_formats:
             # Add the column format.
-            col_xf = self.col_formats[col]
-            attributes.append(('s', col_xf._get_xf_index()))
+            style = ' s="%d"' % self.col_formats[col]._get_xf_index()
+        else:
+            style = ''
 
-        # Write the various cell types.
-        if type(cell).__name__ == 'Number':
-            # Write a number.
-            self._xml_number_element(cell.number, attributes)
+        return self.cell_xml_writers[cell.tag](cell_range, style, cell)
 
-        elif type(cell).__name__ == 'String':
-            # Write a string.
-            string = cell.string
+    def _get_number_xml(self, cell_range, style, cell):
+        # Get the XML for a number cell.
+        return cell_number_template % (cell_range, style, cell.number)
 
-            if not self.constant_memory:
-                # Write a shared string.
-                self._xml_string_element(string, attributes)
-            else:
-                # Write an optimized in-line string.
-
-                # Escape control characters. See SharedString.pm for details.
-                string = re.sub('(_x[0-9a-fA-F]{4}_)', r'_x005F\1', string)
-                string = re.sub(r'([\x00-\x08\x0B-\x1F])',
-                                lambda match: "_x%04X_" %
-                                ord(match.group(1)), string)
-
-                # Escape non characters.
-                if sys.version_info[0] == 2:
-                    non_char1 = unichr(0xFFFE)
-                    non_char2 = unichr(0xFFFF)
-                else:
-                    non_char1 = "\uFFFE"
-                    non_char2 = "\uFFFF"
+    def _get_string_xml(self, cell_range, style, cell):
+        # Get the XML for a string cell.
+        string = cell.string
 
-                string = re.sub(non_char1, '_xFFFE_', string)
-                string = re.sub(non_char2, '_xFFFF_', string)
+        if not self.use_inline_strings:
+            # Write a shared string.
+            return cell_string_template % (cell_range, style, string)
 
-                # Write any rich strings without further tags.
-                if re.search('^<r>', string) and re.search('</r>$', string):
-                    self._xml_rich_inline_string(string, attributes)
-                else:
-                    # Add attribute to preserve leading or trailing whitespace.
-                    preserve = 0
-                    if re.search('^\s', string) or re.search('\s$', string):
-                        preserve = 1
-
-                    self._xml_inline_string(string, preserve, attributes)
-
-        elif type(cell).__name__ == 'Formula':
-            # Write a formula. First check the formula value type.
-            value = cell.value
-            if type(cell.value) == bool:
-                attributes.append(('t', 'b'))
-                if cell.value:
-                    value = 1
-                else:
-                    value = 0
+        # Write an optimized in-line string.
+        string, preserve, is_rich = self._get_inline_string(string)
 
-            elif isinstance(cell.value, str_types):
-                if cell.value in error_codes:
-                    attributes.append(('t', 'e'))
-                else:
-                    attributes.append(('t', 'str'))
+        # Write any rich strings without further tags.
+        if is_rich:
+            return cell_rich_inline_template % (cell_range, style, string)
+
+        # Add attribute to preserve leading or trailing whitespace.
+        if preserve:
+            preserve = ' xml:space="preserve"'
+        else:
+            preserve = ''
 
-            self._xml_formula_element(cell.formula, value, attributes)
+        return cell_inline_template % (cell_range, style, preserve, string)
 
-        elif type(cell).__name__ == 'ArrayFormula':
-            # Write a array formula.
+    def _get_formula_xml(self, cell_range, style, cell):
+        # Get the XML for a formula cell. First check the formula value type.
+        value = cell.value
+        value_type = ''
+
+        if type(value) == bool:
+            value_type = ' t="b"'
+            if value:
+                value = 1
+            else:
+                value = 0
+
+        elif isinstance(value, str_types):
+            if value in excel_error_codes:
+                value_type = ' t="e"'
+            else:
+                value_type = ' t="str"'
+
+        return cell_formula_template % (cell_range, style, value_type,
+                                        self._escape_data(cell.formula),
+                                        self._escape_data(value))
+
+    def _get_array_formula_xml(self, cell_range, style, cell):
+        # Get the XML for an array formula cell.
+        value = cell.value
+        value_type = ''
+
+        # First check if the formula value is a string.
+        try:
+            float(value)
+        except ValueError:
+            value_type = ' t="str"'
 
-            # First check if the formula value is a string.
-            try:
-                float(cell.value)
-            except ValueError:
-                attributes.append(('t', 'str'))
-
-            # Write an array formula.
-            self._xml_start_tag('c', attributes)
-            self._write_cell_array_formula(cell.formula, cell.range)
-            self._write_cell_value(cell.value)
-            self._xml_end_tag('c')
-
-        elif type(cell).__name__ == 'Blank':
-            # Write a empty cell.
-            self._xml_empty_tag('c', attributes)
-
-        elif type(cell).__name__ == 'Boolean':
-            # Write a boolean cell.
-            attributes.append(('t', 'b'))
-            self._xml_start_tag('c', attributes)
-            self._write_cell_value(cell.boolean)
-            self._xml_end_tag('c')
-
-    def _write_cell_value(self, value):
-        # Write the cell value <v> element.
         if value is None:
             value = ''
 
-        self._xml_data_element('v', value)
+        return cell_arformula_template % (cell_range, style, value_type,
+                                          cell.range,
+                                          self._escape_data(cell.formula),
+                                          self._escape_data(value))
 
-    def _write_cell_array_formula(self, formula, cell_range):
-        # Write the cell array formula <f> element.
-        attributes = [
-            ('t', 'array'),
-            ('ref', cell_range)
-        ]
+    def _get_blank_xml(self, cell_range, style, cell):
+        # Get the XML for an empty cell.
+        return cell_blank_template % (cell_range, style)
 
-        self._xml_data_element('f', formula, attributes)
+    def _get_boolean_xml(self, cell_range, style, cell):
+        # Get the XML for a boolean cell.
+        return cell_boolean_template % (cell_range, style, cell.boolean)
 
     def _write_sheet_pr(self):
         # Write the <sheetPr> element for Sheet level properties.
@@ -5619,12 +6836,17 @@ class Worksheet(xmlwriter.XMLwriter):
                 link_type = link["link_type"]
 
                 # If the cell isn't a string then we have to add the url as
-                # the string to display.
-                if (self.table
-                        and self.table[row_num]
-                        and self.table[row_num][col_num]):
-                    cell = self.table[row_num][col_num]
-                    if type(cell).__name__ != 'String':
+                # the string to display. The rows of a table with a memory
+                # budget, or of a finalized worksheet, were kept when the
+                # rows were written.
+                if self.memory_budget or self.finalized:
+                    row_data = self.link_rows.get(row_num)
+                else:
+                    row_data = self.table.get(row_num)
+
+                if row_data and col_num in row_data:
+                    cell = row_data[col_num]
+                    if cell.tag != CELL_STRING:
                         display = link["url"]
 
                 if link_type == 1:
@@ -9,12 +9,80 @@
 
 # Standard packages.
 import re
-import codecs
 
 # Standard packages in Python 2/3 compatibility mode.
 from .compatibility import StringIO
 
 
+# The default size, in characters, of the XML write buffer.
+DEFAULT_BUFFER_SIZE = 65536
+
+# The characters and literal _xHHHH_ strings that Excel escapes in shared and
+# inline strings, with and without the XML data characters.
+excel_escapes = re.compile(u'(_x[0-9a-fA-F]{4}_)'
+                           u'|[\x00-\x08\x0B-\x1F\uFFFE\uFFFF]')
+string_escapes = re.compile(u'(_x[0-9a-fA-F]{4}_)'
+                            u'|[\x00-\x08\x0B-\x1F&<>\uFFFE\uFFFF]')
+
+# The replacement for each of the escaped characters.
+string_escape_chars = {'&': '&amp;', '<': '&lt;', '>': '&gt;',
+                       u'\uFFFE': '_xFFFE_', u'\uFFFF': '_xFFFF_'}
+
+for char_code in list(range(0x00, 0x09)) + list(range(0x0B, 0x20)):
+    string_escape_chars[chr(char_code)] = '_x%04X_' % char_code
+
+
+def _escape_string_match(match):
+    # Return the escape for a character or literal _xHHHH_ string.
+    if match.group(1):
+        return '_x005F' + match.group(1)
+    else:
+        return string_escape_chars[match.group(0)]
+
+
+class BufferedStreamWriter(object):
+    """
+    A file-like writer that accumulates str XML fragments and writes them
+    to a binary stream as large utf-8 encoded blocks.
+
+    """
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE,
+                 close_stream=True):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.close_stream = close_stream
+        self.chunks = []
+        self.chunks_size = 0
+
+    def write(self, data):
+        # Add a str fragment to the buffer and flush it when it is full.
+        self.chunks.append(data)
+        self.chunks_size += len(data)
+
+        if self.chunks_size >= self.buffer_size:
+            self.flush()
+
+    def write_bytes(self, data):
+        # Write already encoded data directly to the stream.
+        self.flush()
+        self.stream.write(data)
+
+    def flush(self):
+        # Encode the buffered fragments and write them to the stream.
+        if self.chunks:
+            self.stream.write(''.join(self.chunks).encode('utf-8'))
+            self.chunks = []
+            self.chunks_size = 0
+
+    def close(self):
+        # Flush the buffer and close the stream if we own it.
+        self.flush()
+
+        if self.close_stream:
+            self.stream.close()
+
+
 class XMLwriter(object):
     """
     Simple XML writer class.
@@ -36,9 +104,12 @@ class XMLwriter(object):
         if isinstance(filename, StringIO):
             self.internal_fh = False
             self.fh = filename
+        elif isinstance(filename, BufferedStreamWriter):
+            self.internal_fh = True
+            self.fh = filename
         else:
             self.internal_fh = True
-            self.fh = codecs.open(filename, 'w', 'utf-8')
+            self.fh = BufferedStreamWriter(open(filename, 'wb'))
 
     def _xml_close(self):
         # Close the XML filehandle if we created it.
@@ -177,6 +248,29 @@ class XMLwriter(object):
         self.fh.write("""<c%s t="inlineStr"><is>%s</is></c>""" %
                       (attr, string))
 
+    def _sanitize_string(self, string):
+        # Escape a shared or inline string in a single pass. Excel escapes
+        # control characters and the Unicode non-characters FFFE and FFFF
+        # with _xHHHH_ and also escapes any literal strings of that type by
+        # encoding the leading underscore. So "\0" -> _x0000_ and
+        # "_x0000_" -> _x005F_x0000_. The XML data characters are escaped
+        # in the same pass, except in rich strings which are already XML.
+        # Returns the string and flags for xml:space="preserve" and rich
+        # strings.
+        if string.startswith('<r>') and string.endswith('</r>'):
+            if excel_escapes.search(string):
+                string = excel_escapes.sub(_escape_string_match, string)
+
+            return string, False, True
+
+        if string_escapes.search(string):
+            string = string_escapes.sub(_escape_string_match, string)
+
+        # Check for leading or trailing whitespace.
+        preserve = string[:1].isspace() or string[-1:].isspace()
+
+        return string, preserve, False
+
     def _escape_attributes(self, attribute):
         # Escape XML characters in attributes.
         try:
@@ -0,0 +1,476 @@
+###############################################################################
+#
+# ZipWriter - A class for writing precompressed members to a zip file.
+#
+# Copyright 2013-2017, John McNamara, jmcnamara@cpan.org
+#
+
+# Standard packages.
+import hashlib
+import platform
+import sys
+import time
+import zlib
+from struct import pack
+from zipfile import ZIP_STORED, ZIP_DEFLATED, LargeZipFile, ZipInfo
+
+try:
+    # For Python 3.2+ or with the futures backport.
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+# The size of the blocks that large members are split into so that they can
+# be deflated concurrently.
+DEFLATE_BLOCK_SIZE = 1024 * 1024
+
+# The size of the deflate window used to prime each block with the end of
+# the previous block.
+DEFLATE_WINDOW_SIZE = 32768
+
+# The limits of the standard zip header fields.
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+# The zip record signatures.
+LOCAL_HEADER_SIGNATURE = 0x04034b50
+CENTRAL_HEADER_SIGNATURE = 0x02014b50
+END_RECORD_SIGNATURE = 0x06054b50
+ZIP64_END_RECORD_SIGNATURE = 0x06064b50
+ZIP64_END_LOCATOR_SIGNATURE = 0x07064b50
+
+# The maximum number of entries in the compressed part cache and the size of
+# the largest part that is stored in it.
+PART_CACHE_SIZE = 64
+PART_CACHE_MAX_PART_SIZE = 1024 * 1024
+
+# write_zip_member() adds compressed data to a standard library ZipFile with
+# the ZipFile internals of these CPython versions. Other versions, or a
+# ZipFile without the expected attributes, use the public writestr().
+ZIP_INTERNALS_SUPPORTED = (platform.python_implementation() == 'CPython'
+                           and (3, 6) <= sys.version_info[:2] <= (3, 13))
+ZIP_INTERNALS = ('_lock', '_seekable', '_writecheck', '_didModify',
+                 '_writing', 'start_dir', 'fp', 'filelist', 'NameToInfo')
+
+
+def deflate_block(data, level, zdict=None, is_last=True):
+    # Deflate a block of data to a raw deflate stream. Blocks other than the
+    # last are ended with a sync flush so that they can be concatenated with
+    # the following blocks into a single stream.
+    if level is None:
+        level = zlib.Z_DEFAULT_COMPRESSION
+
+    if zdict and sys.version_info >= (3, 3, 0):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS,
+                                      zlib.DEF_MEM_LEVEL,
+                                      zlib.Z_DEFAULT_STRATEGY, zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    compressed = compressor.compress(data)
+
+    if is_last:
+        compressed += compressor.flush(zlib.Z_FINISH)
+    else:
+        compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    return compressed
+
+
+def crc32(data):
+    # Return the CRC-32 of the data as an unsigned int.
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def write_zip_member(zip_file, name, data, compress_type=ZIP_DEFLATED,
+                     level=None):
+    # Add a part to a standard library ZipFile, in Python 3.6+, using the
+    # compressed data from the part cache. ZipFile doesn't have a public API
+    # for this so the member is added with the ZipFile internals, in the
+    # same way as ZipFile.writestr(), on the versions where they are known.
+    if not (ZIP_INTERNALS_SUPPORTED
+            and all(hasattr(zip_file, attr) for attr in ZIP_INTERNALS)):
+        if sys.version_info >= (3, 7, 0):
+            zip_file.writestr(name, data, compress_type, level)
+        else:
+            zip_file.writestr(name, data, compress_type)
+        return
+
+    compressed, crc = part_cache.get(data, compress_type, level)
+
+    zinfo = ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = compress_type
+    zinfo.external_attr = 0o600 << 16
+    zinfo.CRC = crc
+    zinfo.file_size = len(data)
+    zinfo.compress_size = len(compressed)
+
+    # Check the state of the ZipFile in the same way as writestr().
+    if not zip_file.fp:
+        raise ValueError(
+            "Attempt to write to ZIP archive that was already closed")
+
+    if zip_file._writing:
+        raise ValueError(
+            "Can't write to ZIP archive while an open writing handle exists.")
+
+    with zip_file._lock:
+        if zip_file._seekable:
+            zip_file.fp.seek(zip_file.start_dir)
+
+        zinfo.header_offset = zip_file.fp.tell()
+        zip_file._writecheck(zinfo)
+        zip_file._didModify = True
+
+        zip_file.fp.write(zinfo.FileHeader(False))
+        zip_file.fp.write(compressed)
+
+        zip_file.start_dir = zip_file.fp.tell()
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[zinfo.filename] = zinfo
+
+
+class PartCache(object):
+    """
+    A cache of the compressed data and CRC-32 of package parts that are
+    byte-identical between files, such as the theme. The parts are looked
+    up by a SHA-256 digest and the length of their uncompressed data, so the
+    uncompressed data isn't kept. Large parts aren't stored. A single cache
+    is shared by the workbooks of a process.
+
+    """
+
+    def __init__(self, max_size=PART_CACHE_SIZE,
+                 max_part_size=PART_CACHE_MAX_PART_SIZE):
+        self.max_size = max_size
+        self.max_part_size = max_part_size
+        self.parts = {}
+
+    def get(self, data, compress_type=ZIP_DEFLATED, level=None):
+        # Get the compressed data and CRC-32 of a part, compressing and
+        # storing it if it isn't in the cache. The cache is cleared when it
+        # is full so that parts that change don't fill it.
+        key = (hashlib.sha256(data).digest(), len(data), compress_type,
+               level)
+        part = self.parts.get(key)
+
+        if part is None:
+            if compress_type == ZIP_STORED:
+                compressed = data
+            else:
+                compressed = deflate_block(data, level)
+
+            part = (compressed, crc32(data))
+
+            if len(data) > self.max_part_size:
+                return part
+
+            if len(self.parts) >= self.max_size:
+                self.parts.clear()
+
+            self.parts[key] = part
+
+        return part
+
+
+# The process-wide cache of compressed package parts.
+part_cache = PartCache()
+
+
+class ZipWriter(object):
+    """
+    A class for writing the members of a zip file from data that may
+    already be compressed. This allows the package parts to be deflated
+    concurrently, or to be reused, and then spliced into the XLSX file.
+
+    """
+
+    ###########################################################################
+    #
+    # Public API.
+    #
+    ###########################################################################
+
+    def __init__(self, filename, allow_zip64=False):
+        """
+        Constructor.
+
+        """
+        super(ZipWriter, self).__init__()
+
+        if hasattr(filename, 'write'):
+            self.fh = filename
+            self.internal_fh = False
+        else:
+            self.fh = open(filename, 'wb')
+            self.internal_fh = True
+
+        self.allow_zip64 = allow_zip64
+        self.offset = 0
+        self.central_headers = []
+        self.date_time = time.localtime(time.time())[:6]
+
+        if sys.platform == 'win32':
+            self.create_system = 0
+        else:
+            self.create_system = 3
+
+    def write_compressed(self, name, data, crc, file_size,
+                         compress_type=ZIP_DEFLATED):
+        """
+        Write a member to the zip file from data that has already been
+        compressed.
+
+        Args:
+            name:          The name of the member in the zip file.
+            data:          The compressed data.
+            crc:           The CRC-32 of the uncompressed data.
+            file_size:     The size of the uncompressed data.
+            compress_type: ZIP_DEFLATED or ZIP_STORED.
+
+        Returns:
+            Nothing.
+
+        """
+        compress_size = len(data)
+        header_offset = self.offset
+        zip64 = file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT
+
+        if zip64 and not self.allow_zip64:
+            raise LargeZipFile("Filesize would require ZIP64 extensions")
+
+        filename = name.encode('utf-8')
+        flags = 0
+
+        # Set the language encoding flag for non-ASCII names.
+        if filename != name.encode('ascii', 'replace'):
+            flags |= 0x800
+
+        dos_date, dos_time = self._get_dos_date_time()
+
+        if zip64:
+            extra = pack('<HHQQ', 0x0001, 16, file_size, compress_size)
+            version = 45
+            header_sizes = (0xFFFFFFFF, 0xFFFFFFFF)
+        else:
+            extra = b''
+            version = 20
+            header_sizes = (compress_size, file_size)
+
+        header = pack('<IHHHHHIIIHH',
+                      LOCAL_HEADER_SIGNATURE, version, flags, compress_type,
+                      dos_time, dos_date, crc,
+                      header_sizes[0], header_sizes[1],
+                      len(filename), len(extra))
+
+        self._write(header + filename + extra)
+        self._write(data)
+
+        self.central_headers.append((filename, flags, compress_type,
+                                     dos_time, dos_date, crc, compress_size,
+                                     file_size, header_offset))
+
+    def writestr(self, name, data, compress_type=ZIP_DEFLATED, level=-1,
+                 cached=False):
+        """
+        Compress and write a member to the zip file.
+
+        Args:
+            name:          The name of the member in the zip file.
+            data:          The uncompressed data as bytes.
+            compress_type: ZIP_DEFLATED or ZIP_STORED.
+            level:         The zlib compression level.
+            cached:        Get the compressed data from the part cache.
+
+        Returns:
+            Nothing.
+
+        """
+        if cached:
+            compressed, crc = part_cache.get(data, compress_type, level)
+        else:
+            if compress_type == ZIP_STORED:
+                compressed = data
+            else:
+                compressed = deflate_block(data, level)
+            crc = crc32(data)
+
+        self.write_compressed(name, compressed, crc, len(data),
+                              compress_type)
+
+    def write_parallel(self, members, workers, cached_names=()):
+        """
+        Compress a list of members concurrently and write them to the zip
+        file in list order. Large deflated members are split into blocks
+        that are compressed independently and then joined into one stream.
+
+        Args:
+            members:      A list of (name, data, compress_type, level) tuples.
+            workers:      The number of threads to compress the data with.
+            cached_names: The names of members whose compressed data is
+                          taken from the part cache.
+
+        Returns:
+            Nothing.
+
+        """
+        executor = ThreadPoolExecutor(workers)
+        jobs = []
+
+        try:
+            for name, data, compress_type, level in members:
+                if name in cached_names:
+                    # The compressed data is taken from the cache when the
+                    # member is written.
+                    crc_job = block_jobs = None
+                elif compress_type == ZIP_STORED:
+                    crc_job = executor.submit(crc32, data)
+                    block_jobs = None
+                else:
+                    crc_job = executor.submit(crc32, data)
+                    block_jobs = self._submit_blocks(executor, data, level)
+
+                jobs.append((name, data, compress_type, level, crc_job,
+                             block_jobs))
+
+            for name, data, compress_type, level, crc_job, block_jobs in jobs:
+                if crc_job is None:
+                    self.writestr(name, data, compress_type, level,
+                                  cached=True)
+                    continue
+
+                file_size = len(data)
+
+                if block_jobs is not None:
+                    data = b''.join([job.result() for job in block_jobs])
+
+                self.write_compressed(name, data, crc_job.result(),
+                                      file_size, compress_type)
+        finally:
+            executor.shutdown()
+
+    def close(self):
+        """
+        Write the zip central directory and close the file if required.
+
+        Args:
+            None.
+
+        Returns:
+            Nothing.
+
+        """
+        central_dir_offset = self.offset
+        made_by = (self.create_system << 8) | 20
+
+        for (filename, flags, compress_type, dos_time, dos_date, crc,
+             compress_size, file_size, header_offset) in self.central_headers:
+
+            # Move any values that don't fit the header into a zip64 field.
+            zip64_fields = []
+            if file_size > ZIP64_LIMIT:
+                zip64_fields.append(file_size)
+                file_size = 0xFFFFFFFF
+            if compress_size > ZIP64_LIMIT:
+                zip64_fields.append(compress_size)
+                compress_size = 0xFFFFFFFF
+            if header_offset > ZIP64_LIMIT:
+                zip64_fields.append(header_offset)
+                header_offset = 0xFFFFFFFF
+
+            if zip64_fields:
+                if not self.allow_zip64:
+                    raise LargeZipFile("Zipfile size would require ZIP64 "
+                                       "extensions")
+
+                extra = pack('<HH' + 'Q' * len(zip64_fields),
+                             0x0001, 8 * len(zip64_fields), *zip64_fields)
+                version = 45
+            else:
+                extra = b''
+                version = 20
+
+            header = pack('<IHHHHHHIIIHHHHHII',
+                          CENTRAL_HEADER_SIGNATURE, made_by, version, flags,
+                          compress_type, dos_time, dos_date, crc,
+                          compress_size, file_size, len(filename),
+                          len(extra), 0, 0, 0, 0o600 << 16, header_offset)
+
+            self._write(header + filename + extra)
+
+        central_dir_size = self.offset - central_dir_offset
+        count = len(self.central_headers)
+
+        if (count > ZIP_FILECOUNT_LIMIT or central_dir_offset > ZIP64_LIMIT
+                or central_dir_size > ZIP64_LIMIT):
+
+            if not self.allow_zip64:
+                raise LargeZipFile("Zipfile size would require ZIP64 "
+                                   "extensions")
+
+            # Write the zip64 end of central directory record and locator.
+            zip64_end_offset = self.offset
+
+            self._write(pack('<IQHHIIQQQQ',
+                             ZIP64_END_RECORD_SIGNATURE, 44, made_by, 45,
+                             0, 0, count, count,
+                             central_dir_size, central_dir_offset))
+
+            self._write(pack('<IIQI',
+                             ZIP64_END_LOCATOR_SIGNATURE, 0,
+                             zip64_end_offset, 1))
+
+            count = min(count, 0xFFFF)
+            central_dir_size = min(central_dir_size, 0xFFFFFFFF)
+            central_dir_offset = min(central_dir_offset, 0xFFFFFFFF)
+
+        self._write(pack('<IHHHHIIH',
+                         END_RECORD_SIGNATURE, 0, 0, count, count,
+                         central_dir_size, central_dir_offset, 0))
+
+        if self.internal_fh:
+            self.fh.close()
+        elif hasattr(self.fh, 'flush'):
+            self.fh.flush()
+
+    ###########################################################################
+    #
+    # Private API.
+    #
+    ###########################################################################
+
+    def _write(self, data):
+        # Write data to the file and track the offset. We don't use tell()
+        # so that non-seekable files can be written to.
+        self.fh.write(data)
+        self.offset += len(data)
+
+    def _get_dos_date_time(self):
+        # Convert the member timestamp to the MS-DOS date and time format.
+        (year, month, day, hour, minute, second) = self.date_time
+
+        dos_date = (year - 1980) << 9 | month << 5 | day
+        dos_time = hour << 11 | minute << 5 | second // 2
+
+        return dos_date, dos_time
+
+    def _submit_blocks(self, executor, data, level):
+        # Submit the blocks of a member to be deflated. Each block is primed
+        # with the end of the previous block so that the compression ratio
+        # is close to that of a single stream.
+        view = memoryview(data)
+        data_size = len(data)
+        jobs = []
+
+        for start in range(0, max(data_size, 1), DEFLATE_BLOCK_SIZE):
+            end = start + DEFLATE_BLOCK_SIZE
+            is_last = end >= data_size
+
+            zdict = None
+            if start:
+                zdict = view[start - DEFLATE_WINDOW_SIZE:start].tobytes()
+
+            jobs.append(executor.submit(deflate_block, view[start:end],
+                                        level, zdict, is_last))
+
+        return jobs